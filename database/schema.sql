@@ -2,10 +2,14 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- 1. Raw Products Table
--- content_hash is the stable identifier (Name + URL)
+-- product_key is the stable identifier: platform + native product id packed
+-- into 128 bits (pipeline/src/ingestion.py product_keys), so a title edit
+-- keeps the row. content_hash (Name + URL) is kept for lineage only.
+-- Existing databases: run pipeline/migrate_product_keys.py
 CREATE TABLE IF NOT EXISTS raw_products (
     id              UUID        PRIMARY KEY DEFAULT uuid_generate_v4(),
-    content_hash    TEXT        NOT NULL UNIQUE,
+    product_key     UUID        NOT NULL UNIQUE,
+    content_hash    TEXT,
     title_raw       TEXT        NOT NULL,
     quantity_sold   BIGINT      NOT NULL DEFAULT 0,
     price_original  NUMERIC(12,2) NOT NULL DEFAULT 0,
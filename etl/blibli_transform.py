@@ -3,6 +3,8 @@ import pandas as pd
 import os
 import sys
 
+from output import save_cleaned
+
 # Setup paths
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
@@ -98,8 +100,8 @@ def transform_data():
 
         # Save
         os.makedirs(os.path.dirname(PROCESSED_FILE), exist_ok=True)
-        df.to_csv(PROCESSED_FILE, index=False)
-        print(f"[SUCCESS] Transformed {len(df)} items. Saved to {PROCESSED_FILE}")
+        written = save_cleaned(df, PROCESSED_FILE)
+        print(f"[SUCCESS] Transformed {len(df)} items. Saved to {', '.join(written)}")
 
     except Exception as e:
         print(f"Transform failed: {e}")
@@ -0,0 +1,39 @@
+import os
+import sys
+
+# The typed schema lives with the pipeline that reads it
+PIPELINE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pipeline"))
+sys.path.append(PIPELINE_DIR)
+
+from src import columnar
+
+# Formats every transform writes: csv (manual inspection), parquet, arrow (IPC).
+# e.g. ETL_OUTPUT_FORMATS=csv for the old CSV-only behaviour.
+DEFAULT_FORMATS = "csv,parquet"
+
+def output_formats():
+    formats = [f.strip().lower() for f in os.getenv("ETL_OUTPUT_FORMATS", DEFAULT_FORMATS).split(",")]
+    return [f for f in formats if f in ("csv", "parquet", "arrow")] or ["csv"]
+
+def save_cleaned(df, csv_path):
+    """
+    Save a transform's cleaned frame next to `csv_path` in every configured
+    format (the columnar files share its name with a .parquet / .arrow suffix).
+    Returns the written paths.
+    """
+    base = os.path.splitext(csv_path)[0]
+    written = []
+    # CSV first, so the typed copies are never older than it (see cleaned_input)
+    for fmt in sorted(output_formats(), key=lambda f: f != "csv"):
+        if fmt == "csv":
+            df.to_csv(csv_path, index=False)
+            written.append(csv_path)
+        else:
+            path = f"{base}.{fmt}"
+            columnar.write_products(df, path)
+            written.append(path)
+    return written
+
+def cleaned_input(csv_path):
+    """The file a load step should hand to run_pipeline.py (see src.columnar.preferred_path)."""
+    return columnar.preferred_path(csv_path)
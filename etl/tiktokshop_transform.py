@@ -3,6 +3,8 @@ import json
 import pandas as pd
 import re
 
+from output import save_cleaned
+
 def transform_item(item):
     """
     Transform raw scraped strings into clean data types
@@ -87,10 +89,10 @@ def run_transform():
             transformed_data = [transform_item(item) for item in raw_data]
             df = pd.DataFrame(transformed_data)
             
-            # Save to CSV
+            # Save to CSV (plus the typed columnar copy the pipeline reads)
             out_path = os.path.join(out_dir, f"{category}_data_cleaned.csv")
-            df.to_csv(out_path, index=False)
-            print(f"[{category}] TRANSFORM finished. Saved {len(df)} items to {out_path}")
+            written = save_cleaned(df, out_path)
+            print(f"[{category}] TRANSFORM finished. Saved {len(df)} items to {', '.join(written)}")
 
 if __name__ == "__main__":
     run_transform()
@@ -2,6 +2,8 @@ import os
 import subprocess
 import sys
 
+from output import cleaned_input
+
 def run_tokopedia_load():
     """
     ETL LOAD: Triggers the internal database pipeline for Tokopedia data.
@@ -11,6 +13,8 @@ def run_tokopedia_load():
     project_root = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
     pipeline_path = os.path.join(project_root, "pipeline", "run_pipeline.py")
     data_path = os.path.normpath(os.path.join(project_root, "data", "skincare_tokopedia_data_cleaned.csv"))
+    # Prefer the typed Parquet / Arrow copy written next to the CSV
+    data_path = cleaned_input(data_path)
     
     if not os.path.exists(pipeline_path):
         print(f"Error: Pipeline script not found at {pipeline_path}")
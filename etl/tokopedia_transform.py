@@ -3,6 +3,8 @@ import json
 import pandas as pd
 import re
 
+from output import save_cleaned
+
 def transform_tokopedia_item(item_data):
     """
     Transform raw Tokopedia API item data into clean format.
@@ -119,10 +121,10 @@ def run_tokopedia_transform():
         # Drop duplicates based on URL
         df = df.drop_duplicates(subset=['url'])
         
-        # Save to CSV
+        # Save to CSV (plus the typed columnar copy the pipeline reads)
         out_path = os.path.join(out_dir, "skincare_tokopedia_data_cleaned.csv")
-        df.to_csv(out_path, index=False)
-        print(f"[Tokopedia] TRANSFORM finished. Saved {len(df)} items to {out_path}")
+        written = save_cleaned(df, out_path)
+        print(f"[Tokopedia] TRANSFORM finished. Saved {len(df)} items to {', '.join(written)}")
     else:
         print("No Tokopedia data found to transform.")
 
@@ -1,7 +1,11 @@
 import os
-import psycopg2
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src import db
+
 def apply_schema():
     env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
     load_dotenv(env_path)
@@ -19,15 +23,13 @@ def apply_schema():
         with open(schema_path, 'r') as f:
             schema_sql = f.read()
             
-        conn = psycopg2.connect(db_url)
-        cur = conn.cursor()
-        cur.execute(schema_sql)
-        conn.commit()
+        with db.get_database().transaction() as cur:
+            cur.execute(schema_sql)
         print("Schema applied successfully!")
-        cur.close()
-        conn.close()
     except Exception as e:
         print(f"Failed to apply schema: {e}")
+    finally:
+        db.close_database()
 
 if __name__ == "__main__":
     apply_schema()
@@ -0,0 +1,61 @@
+"""
+Exact brand alias layer: nested substring loop (legacy) vs Aho-Corasick scan,
+on the shipped BRAND_DICTIONARY and on synthetic dictionaries of growing size.
+
+    python -m benchmarks.bench_brand [n_titles]
+"""
+import os
+import random
+import string
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning
+from src.automaton import AhoCorasick, NO_MATCH
+from src.extraction import BRAND_DICTIONARY
+from benchmarks.common import synthetic_titles, timed
+
+def synthetic_dictionary(n_brands, seed=3):
+    rng = random.Random(seed)
+    brands = dict(BRAND_DICTIONARY)
+    while len(brands) < n_brands:
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 11)))
+        brands[name] = [name, name[:3] + " " + name[3:], name + "s"]
+    return brands
+
+def loop_exact(dictionary, titles):
+    out = []
+    for title in titles:
+        found = "unknown"
+        for canonical, aliases in dictionary.items():
+            if any(alias in title for alias in aliases):
+                found = canonical
+                break
+        out.append(found)
+    return out
+
+def automaton_exact(dictionary, titles):
+    names = list(dictionary)
+    matcher = AhoCorasick(
+        (alias, rank) for rank, aliases in enumerate(dictionary.values()) for alias in aliases
+    )
+    out = []
+    for title in titles:
+        rank = matcher.min_rank(title)
+        out.append(names[rank] if rank != NO_MATCH else "unknown")
+    return out
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    titles = [cleaning.clean_title(t).lower() for t in synthetic_titles(n)]
+    for n_brands in [len(BRAND_DICTIONARY), 1000, 5000]:
+        dictionary = synthetic_dictionary(n_brands)
+        loop_s, loop_out = timed(loop_exact, dictionary, titles, repeat=1)
+        ac_s, ac_out = timed(automaton_exact, dictionary, titles, repeat=1)
+        print(f"Brands: {n_brands:>5} | loop {n / loop_s:>10,.0f} titles/sec | "
+              f"automaton {n / ac_s:>10,.0f} titles/sec (incl. build) | "
+              f"speedup {loop_s / ac_s:6.2f}x | identical: {loop_out == ac_out}")
+
+if __name__ == "__main__":
+    main()
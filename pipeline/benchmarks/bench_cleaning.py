@@ -0,0 +1,35 @@
+"""
+Title cleaning throughput: per-pattern loop (legacy) vs compiled normalizer.
+
+    python -m benchmarks.bench_cleaning [n_titles]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning
+from benchmarks import legacy
+from benchmarks.common import synthetic_titles, timed
+
+def legacy_clean(titles):
+    return [legacy.remove_noise(legacy.normalize_unicode(t)) for t in titles]
+
+def compiled_clean(titles):
+    return [cleaning.clean_title(t) for t in titles]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    titles = synthetic_titles(n)
+
+    legacy_s, legacy_out = timed(legacy_clean, titles)
+    compiled_s, compiled_out = timed(compiled_clean, titles)
+
+    mismatches = sum(a != b for a, b in zip(legacy_out, compiled_out))
+    print(f"Titles: {n}")
+    print(f"  legacy   : {n / legacy_s:>12,.0f} titles/sec ({legacy_s:.3f}s)")
+    print(f"  compiled : {n / compiled_s:>12,.0f} titles/sec ({compiled_s:.3f}s)")
+    print(f"  speedup  : {legacy_s / compiled_s:.2f}x, mismatches: {mismatches}")
+
+if __name__ == "__main__":
+    main()
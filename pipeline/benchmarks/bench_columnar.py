@@ -0,0 +1,37 @@
+"""
+Transform -> pipeline hand-off: CSV vs typed Parquet / Arrow IPC
+(write time, read time into the frame ingestion works on, file size).
+
+    python -m benchmarks.bench_columnar [n_rows]
+"""
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import columnar, ingestion
+from benchmarks.common import synthetic_frame, timed
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = synthetic_frame(n)
+    print(f"Rows: {n:,}")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for fmt in ('csv', 'parquet', 'arrow'):
+            path = os.path.join(tmp, f"products.{fmt}")
+            if fmt == 'csv':
+                write_s, _ = timed(lambda: df.to_csv(path, index=False), repeat=1)
+            else:
+                write_s, _ = timed(columnar.write_products, df, path, repeat=1)
+            read_s, frame = timed(ingestion.read_products, path, repeat=3)
+            results[fmt] = (write_s, read_s, os.path.getsize(path), frame.memory_usage(deep=True).sum())
+
+        csv_read = results['csv'][1]
+        for fmt, (write_s, read_s, size, mem) in results.items():
+            print(f"  {fmt:<8}: write {write_s:6.2f}s, read {read_s:6.2f}s ({csv_read / read_s:5.1f}x vs CSV), "
+                  f"{size / 2**20:7.1f} MiB on disk, {mem / 2**20:7.1f} MiB in memory")
+
+if __name__ == "__main__":
+    main()
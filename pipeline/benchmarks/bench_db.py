@@ -0,0 +1,70 @@
+"""
+Per-load database overhead, as a streaming run pays it for every chunk:
+
+    fresh     a new connection per load, statements parsed and planned every time
+              (what loader.get_db_connection() did)
+    pooled    one src.db pool connection, the upsert shapes PREPAREd once
+
+Loads `chunks` chunks of `rows` rows through loader.values_rows (many small
+statements, where parse/plan time shows most) into a scratch schema on
+DATABASE_URL and reports connection setup separately. Local sockets make setup
+look free; over TLS to the pooler it is tens to hundreds of milliseconds.
+
+    DATABASE_URL=... python -m benchmarks.bench_db [chunks] [rows]
+"""
+import os
+import sys
+import time
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import db, loader
+from benchmarks.bench_loader import enriched_frame
+
+SCHEMA = "bench_db"
+
+def run(database, chunks, fresh):
+    start = time.perf_counter()
+    for chunk in chunks:
+        if fresh:
+            database.close()  # the next transaction reconnects
+        with database.transaction() as cur:
+            loader.values_rows(cur, chunk, page_size=100)
+    return time.perf_counter() - start
+
+def main():
+    n_chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    df = enriched_frame(n_chunks * rows)
+    chunks = [df.iloc[i:i + rows] for i in range(0, len(df), rows)]
+
+    admin = db.connect()
+    admin.autocommit = True
+    cur = admin.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.raw_products (LIKE public.raw_products INCLUDING ALL);
+        CREATE TABLE {SCHEMA}.enriched_products (LIKE public.enriched_products INCLUDING ALL);
+        ALTER TABLE {SCHEMA}.enriched_products ADD FOREIGN KEY (raw_product_id)
+            REFERENCES {SCHEMA}.raw_products (id) ON DELETE CASCADE;
+    """)
+    url = db.sanitize_url(os.environ["DATABASE_URL"])
+    url += ("&" if "?" in url else "?") + "options=" + quote(f"-csearch_path={SCHEMA}")
+    print(f"{n_chunks} loads of {rows:,} rows")
+    try:
+        for label, fresh, prepared in (('fresh', True, False), ('pooled', False, True)):
+            cur.execute(f"TRUNCATE {SCHEMA}.raw_products CASCADE")
+            database = db.Database(url, maxconn=1, prepared=prepared)
+            seconds = run(database, chunks, fresh)
+            stats = database.stats()
+            database.close()
+            print(f"  {label:<7}: {seconds:6.2f}s total, {stats['connections']:3d} connection(s) "
+                  f"in {stats['connect_seconds']:.3f}s")
+    finally:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        admin.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Memory per pipeline stage (DataFrame.memory_usage(deep=True)) with the previous
+object-dtype frames vs the src.dtypes policy.
+
+    python -m benchmarks.bench_dtypes [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src import cleaning, dtypes, extraction, ingestion
+from benchmarks.common import synthetic_frame
+
+TEXT_COLUMNS = ['name', 'url', 'image', 'source']
+
+def object_frames(path, report):
+    # What the pipeline held before: object strings everywhere (pandas 2 read_csv),
+    # every column kept to the end
+    df = ingestion._prepare(pd.read_csv(path, dtype={c: object for c in TEXT_COLUMNS}))
+    df = df.drop_duplicates(subset=['product_key'])
+    report.record('ingest', df)
+    df = extraction.enrich_data(cleaning.normalize_data(df))
+    report.record('load', df)
+    return df
+
+def lean_frames(path, report):
+    df = ingestion.ingest_data(path)
+    report.record('ingest', df)
+    df = dtypes.enriched(extraction.enrich_data(cleaning.normalize_data(df)))
+    report.record('load', df)
+    return df
+
+def run(fn, path):
+    report = dtypes.MemoryReport(verbose=False)
+    start = time.perf_counter()
+    df = fn(path, report)
+    return report, time.perf_counter() - start, df
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "products.csv")
+        frame = synthetic_frame(n, unique_ratio=0.6)
+        frame['shop_name'] = "toko kosmetik resmi"  # a transform-only column
+        frame.to_csv(path, index=False)
+        del frame
+
+        before, before_s, old = run(object_frames, path)
+        after, after_s, new = run(lean_frames, path)
+
+    mismatches = sum((old[c].tolist() != new[c].tolist()) for c in ['title_cleaned', 'brand', 'product_type'])
+    print(f"Rows: {n:,} (label column mismatches: {mismatches})")
+    for stage in ('ingest', 'load'):
+        b, a = before.peaks[stage][1], after.peaks[stage][1]
+        print(f"  {stage:<7}: object {b / 2**20:7.1f} MiB -> lean {a / 2**20:7.1f} MiB ({b / a:.2f}x smaller)")
+    print(f"  wall time: {before_s:.2f}s -> {after_s:.2f}s")
+    print("  lean dtypes: " + ", ".join(f"{c}={t}" for c, t in new.dtypes.astype(str).items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Fuzzy brand layer on unknown-heavy titles (no exact alias hit, so every title
+reaches the fuzzy search): brands x aliases x tokens fuzz.ratio loop (legacy)
+vs FuzzyAliasIndex.
+
+    python -m benchmarks.bench_fuzzy [n_titles]
+"""
+import os
+import random
+import string
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thefuzz import fuzz
+
+from src.automaton import AhoCorasick, NO_MATCH
+from src.fuzzy import FuzzyAliasIndex
+from benchmarks.bench_brand import synthetic_dictionary
+from benchmarks.common import timed
+
+def unknown_titles(n, dictionary, seed=11):
+    rng = random.Random(seed)
+    aliases = [a for v in dictionary.values() for a in v]
+    exact = AhoCorasick((a, 0) for a in aliases)
+    titles = []
+    while len(titles) < n:
+        words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+                 for _ in range(rng.randint(5, 12))]
+        if rng.random() < 0.2:
+            # near-miss spelling of a real alias somewhere in the title
+            alias = rng.choice(aliases).replace(" ", "")
+            i = rng.randrange(len(alias))
+            words.insert(rng.randrange(len(words)), alias[:i] + rng.choice(string.ascii_lowercase) + alias[i + 1:])
+        title = " ".join(words)
+        if exact.min_rank(title) == NO_MATCH:
+            titles.append(title)
+    return titles
+
+def loop_fuzzy(dictionary, titles, threshold=85.0):
+    out = []
+    for title in titles:
+        found = None
+        tokens = title.split()
+        for canonical, aliases in dictionary.items():
+            for alias in aliases:
+                for token in tokens:
+                    ratio = fuzz.ratio(alias, token)
+                    if ratio >= threshold:
+                        found = (canonical, ratio)
+                        break
+                if found: break
+            if found: break
+        out.append(found)
+    return out
+
+def indexed_fuzzy(dictionary, titles, threshold=85.0):
+    brands = [b for b, aliases in dictionary.items() for _ in aliases]
+    index = FuzzyAliasIndex([a for aliases in dictionary.values() for a in aliases], threshold)
+    out = []
+    for title in titles:
+        hit = index.match(title.split())
+        out.append((brands[hit[0]], hit[1]) if hit else None)
+    return out
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for n_brands in [56, 1000]:
+        dictionary = synthetic_dictionary(n_brands)
+        titles = unknown_titles(n, dictionary)
+        loop_s, loop_out = timed(loop_fuzzy, dictionary, titles, repeat=1)
+        index_s, index_out = timed(indexed_fuzzy, dictionary, titles, repeat=1)
+        hits = sum(o is not None for o in loop_out)
+        print(f"Brands: {n_brands:>5} | titles {n} ({hits} fuzzy hits) | loop {n / loop_s:>9,.0f}/sec | "
+              f"index {n / index_s:>9,.0f}/sec (incl. build) | speedup {loop_s / index_s:6.1f}x | "
+              f"identical: {loop_out == index_out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Label index build, incremental add and batch query latency at growing sizes.
+
+Stored titles are synthetic titles labeled by the rule layers; queries are
+other synthetic titles, so "agree" is how often an adopted label matches the
+rules' own answer for the query.
+
+    python -m benchmarks.bench_label_index [sizes,comma,separated] [n_queries]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning, extraction
+from src.label_index import LabelIndex
+from benchmarks.common import synthetic_titles
+
+def _labeled(n, seed):
+    titles = cleaning.normalize_titles(pd.Series(synthetic_titles(n, seed=seed), dtype=object))[0]
+    result = extraction.enrich_batch(titles)
+    known = (result.brand != "unknown") & (result.product_type != "unknown")
+    return titles[known].tolist(), result.brand[known], result.product_type[known]
+
+def main():
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 250_000]
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    # About half the synthetic titles get both labels from the rules
+    stored, brands, types = _labeled(int(max(sizes) * 2.5), seed=41)
+    queries = cleaning.normalize_titles(pd.Series(synthetic_titles(n_queries, seed=43), dtype=object))[0]
+    truth = extraction.enrich_batch(queries)
+    queries = queries.tolist()
+
+    print(f"{'stored':>9} {'add':>12} {'+1k add':>9} {'query batch':>12} {'per title':>10} "
+          f"{'adopted':>8} {'agree':>6} {'size':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LabelIndex(tmp)
+        for size in sizes:
+            # Grow the index in place up to `size` titles
+            start = time.perf_counter()
+            before = len(index)
+            pos = before
+            while len(index) < size and pos < len(stored):
+                step = min(size - len(index), len(stored) - pos)
+                index.add(stored[pos:pos + step], brands[pos:pos + step], types[pos:pos + step])
+                pos += step
+            add_s = time.perf_counter() - start
+            added = len(index) - before
+
+            # Incremental add after a load
+            start = time.perf_counter()
+            index.add(stored[pos:pos + 1000], brands[pos:pos + 1000], types[pos:pos + 1000])
+            small_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found, _, _, _ = index.query(queries)
+            query_s = time.perf_counter() - start
+
+            adopted = found != "unknown"
+            agree = (found[adopted] == truth.brand[adopted]).mean() if adopted.any() else 0.0
+            print(f"{len(index):>9,} {added / add_s:>8,.0f}/sec {small_s * 1000:>7.0f}ms "
+                  f"{query_s:>10.2f}s {query_s / len(queries) * 1000:>8.2f}ms "
+                  f"{adopted.mean():>8.1%} {agree:>6.1%} {(index.capacity * 6 + index.count * 8) / 1e6:>6.0f}MB")
+        index.close()
+
+if __name__ == "__main__":
+    main()
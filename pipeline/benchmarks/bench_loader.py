@@ -0,0 +1,124 @@
+"""
+Database load latency per method:
+
+    remap    raw upsert, then a key -> id remap query and a second frame pass
+             (benchmarks.legacy.load_rows_remap)
+    values   column arrays, one chained raw -> enriched statement per page
+    copy     COPY into a staging table, one chained upsert from it
+
+Runs on copies of raw_products / enriched_products in a scratch schema on
+DATABASE_URL: an insert pass into empty tables, an update pass that changes
+every row, and a rerun of the same data (the steady state, where unchanged rows
+are skipped). Reports time and WAL per pass, checks every method leaves
+identical rows and drops the schema afterwards.
+
+    DATABASE_URL=... python -m benchmarks.bench_loader [n_rows ...]
+"""
+import os
+import sys
+import time
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src import db, dtypes, ingestion, loader
+from benchmarks import legacy
+from benchmarks.common import synthetic_frame
+
+SCHEMA = "bench_loader"
+
+# Order-independent checksum of every stored value (row lists would not fit in memory at 1M rows)
+SNAPSHOT = """
+    SELECT count(*), sum(hashtextextended(t::text, 0)::numeric) FROM (
+        SELECT r.product_key, r.content_hash, r.title_raw, r.quantity_sold, r.price_current, r.price_original,
+               r.discount, r.rating, r.url, r.image_url, r.source, e.title_cleaned, e.brand, e.product_type,
+               e.price_effective, e.brand_confidence, e.product_type_confidence, e.enrichment_confidence
+        FROM raw_products r JOIN enriched_products e ON e.raw_product_id = r.id
+    ) t
+"""
+
+def enriched_frame(n):
+    # Labels are drawn at random: the loader only needs the columns, not real enrichment
+    rng = np.random.default_rng(5)
+    df = dtypes.ingested(ingestion._prepare(synthetic_frame(n)))
+    df['title_cleaned'] = df['name'].str.title()
+    df['brand'] = rng.choice(["wardah", "somethinc", "scarlett", "skintific"], len(df))
+    df['product_type'] = rng.choice(["serum", "toner", "sunscreen"], len(df))
+    df['brand_confidence'] = rng.choice([1.0, 0.95, 0.865, 0.9], len(df))
+    df['product_type_confidence'] = rng.choice([1.0, 0.9, 0.8], len(df))
+    df.loc[df.index[::97], 'image'] = None  # both paths must store missing values alike
+    return dtypes.enriched(df)
+
+def timed_load(conn, admin_cur, fn, df):
+    """Seconds and WAL bytes for one load, plus its result."""
+    admin_cur.execute("SELECT pg_current_wal_insert_lsn()")
+    lsn = admin_cur.fetchone()[0]
+    cur = conn.cursor()
+    start = time.perf_counter()
+    result = fn(cur, df)
+    conn.commit()
+    seconds = time.perf_counter() - start
+    cur.close()
+    admin_cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), %s)", (lsn,))
+    return seconds, int(admin_cur.fetchone()[0]), result
+
+METHODS = (('remap', legacy.load_rows_remap), ('values', loader.values_rows), ('copy', loader.copy_rows))
+
+def run_size(n, conn, admin_cur):
+    df = enriched_frame(n)
+    updated = df.assign(sold_quantity=df['sold_quantity'] + 1, rating=np.float32(4.45))
+    # insert into empty tables, change every row, then the steady-state rerun of the same data
+    passes = (('insert', df), ('update', updated), ('rerun', updated))
+    print(f"Rows: {n:,}")
+    snapshots = {}
+    results = {}
+    for method, fn in METHODS:
+        admin_cur.execute(f"TRUNCATE {SCHEMA}.raw_products CASCADE")
+        results[method] = [timed_load(conn, admin_cur, fn, frame) for _, frame in passes]
+        snap = conn.cursor()
+        snap.execute(SNAPSHOT)
+        snapshots[method] = snap.fetchone()
+        snap.close()
+        conn.commit()  # release the snapshot's locks before the next TRUNCATE
+        print(f"  {method:<7}: " + ", ".join(
+            f"{name} {seconds:7.2f}s ({n / seconds:>9,.0f} rows/s, {wal / 2**20:6.1f} MiB WAL)"
+            for (name, _), (seconds, wal, _) in zip(passes, results[method])))
+        rerun = results[method][2][2]
+        if isinstance(rerun, loader.LoadCounts):
+            print(f"           rerun: {rerun.raw_skipped:,} raw / {rerun.enriched_skipped:,} enriched rows unchanged")
+    for method in ('values', 'copy'):
+        print(f"  {method} vs remap: " + ", ".join(
+            f"{name} {base[0] / ours[0]:.1f}x"
+            for (name, _), base, ours in zip(passes, results['remap'], results[method])))
+    print(f"  identical rows: {all(snap == snapshots['remap'] for snap in snapshots.values())}")
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+
+    admin = db.connect()
+    admin.autocommit = True
+    cur = admin.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.raw_products (LIKE public.raw_products INCLUDING ALL);
+        CREATE TABLE {SCHEMA}.enriched_products (LIKE public.enriched_products INCLUDING ALL);
+        ALTER TABLE {SCHEMA}.enriched_products ADD FOREIGN KEY (raw_product_id)
+            REFERENCES {SCHEMA}.raw_products (id) ON DELETE CASCADE;
+    """)
+    url = os.environ["DATABASE_URL"]
+    os.environ["DATABASE_URL"] = url + ("&" if "?" in url else "?") + "options=" + quote(f"-csearch_path={SCHEMA}")
+    conn = db.connect()
+    try:
+        for n in sizes:
+            run_size(n, conn, cur)
+    finally:
+        conn.close()
+        os.environ["DATABASE_URL"] = url
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        admin.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+normalize_data before/after: chained .apply calls (legacy) vs column-at-a-time.
+
+    python -m benchmarks.bench_normalize [n_rows ...]   (default: 100000 1000000)
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning
+from benchmarks import legacy
+from benchmarks.common import synthetic_frame, timed
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        base = synthetic_frame(n)
+        repeat = 3 if n <= 100_000 else 1
+        before_s, before = timed(lambda: legacy.normalize_data(base.copy()), repeat=repeat)
+        after_s, after = timed(lambda: cleaning.normalize_data(base.copy()), repeat=repeat)
+
+        same = (before['title_match'].tolist() == after['title_match'].tolist()
+                and before['title_cleaned'].tolist() == after['title_cleaned'].tolist())
+        print(f"Rows: {n:,}")
+        print(f"  before : {before_s:8.3f}s ({n / before_s:>10,.0f} rows/sec)")
+        print(f"  after  : {after_s:8.3f}s ({n / after_s:>10,.0f} rows/sec)")
+        print(f"  speedup: {before_s / after_s:.2f}x, identical output: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Serial vs process-pool cleaning + enrichment of distinct titles.
+
+    python -m benchmarks.bench_parallel [n_titles] [workers]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.parallel import clean_and_enrich_titles
+from benchmarks.common import synthetic_titles, timed
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 2)
+    titles = synthetic_titles(n, seed=21)
+
+    serial_s, serial = timed(clean_and_enrich_titles, titles, 1, repeat=1)
+    parallel_s, parallel = timed(clean_and_enrich_titles, titles, workers, repeat=1)
+
+    print(f"Titles: {n:,}")
+    print(f"  serial          : {serial_s:7.2f}s ({n / serial_s:>10,.0f} titles/sec)")
+    print(f"  {workers:2d} workers      : {parallel_s:7.2f}s ({n / parallel_s:>10,.0f} titles/sec)")
+    print(f"  measured speedup: {serial_s / parallel_s:.2f}x, identical output: {serial.equals(parallel)}")
+
+if __name__ == "__main__":
+    main()
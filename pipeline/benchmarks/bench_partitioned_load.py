@@ -0,0 +1,104 @@
+"""
+Partitioned loading (loader.upsert_partitions) on 1..N connections, plus two
+overlapping loads of the same rows running at once (a rerun started while the
+first load is still going), which must finish without a deadlock.
+
+Runs on copies of raw_products / enriched_products in a scratch schema on
+DATABASE_URL, each size / connection count into empty tables, then checks every
+run stored the same rows. Scaling needs server cores (and, against the pooler,
+network latency to hide): on a single-core database the connections only
+take turns. Measured on one core, 50k rows: 0.84-0.97x on 2-8 connections over
+the local socket, 1.25-1.40x with 20ms of added round-trip latency; a multi-core
+or remote server is needed to show more.
+
+    DATABASE_URL=... python -m benchmarks.bench_partitioned_load [n_rows] [max_connections]
+"""
+import os
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import db, loader
+from benchmarks.bench_loader import SNAPSHOT, enriched_frame
+
+SCHEMA = "bench_partitioned_load"
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def snapshot(admin_cur):
+    admin_cur.execute(f"SET search_path = {SCHEMA}")
+    admin_cur.execute(SNAPSHOT)
+    result = admin_cur.fetchone()
+    admin_cur.execute("RESET search_path")
+    return result
+
+def overlapping(database, stage):
+    errors = []
+
+    def load(frame):
+        try:
+            loader.upsert_partitions(database, frame, 'copy', database.maxconn // 2)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load, args=(stage,)) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return errors
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    max_connections = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    stage = loader.staged_rows(enriched_frame(n))
+    updated = stage.assign(quantity_sold=stage['quantity_sold'] + 1)
+
+    admin = db.connect()
+    admin.autocommit = True
+    cur = admin.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    cur.execute(f"""
+        CREATE TABLE {SCHEMA}.raw_products (LIKE public.raw_products INCLUDING ALL);
+        CREATE TABLE {SCHEMA}.enriched_products (LIKE public.enriched_products INCLUDING ALL);
+        ALTER TABLE {SCHEMA}.enriched_products ADD FOREIGN KEY (raw_product_id)
+            REFERENCES {SCHEMA}.raw_products (id) ON DELETE CASCADE;
+    """)
+    url = db.sanitize_url(os.environ["DATABASE_URL"])
+    url += ("&" if "?" in url else "?") + "options=" + quote(f"-csearch_path={SCHEMA}")
+    print(f"Rows: {n:,} in {len(loader.partition_batches(stage))} partition batches")
+    try:
+        snapshots = set()
+        connections = 1
+        base = None
+        while connections <= max_connections:
+            cur.execute(f"TRUNCATE {SCHEMA}.raw_products CASCADE")
+            database = db.Database(url, maxconn=connections)
+            insert, _ = timed(lambda: loader.upsert_partitions(database, stage, 'copy', connections))
+            update, _ = timed(lambda: loader.upsert_partitions(database, updated, 'copy', connections))
+            database.close()
+            snapshots.add(snapshot(cur))
+            base = base or (insert, update)
+            print(f"  {connections} connection(s): insert {insert:6.2f}s ({n / insert:>9,.0f} rows/s, "
+                  f"{base[0] / insert:.2f}x), update {update:6.2f}s ({n / update:>9,.0f} rows/s, "
+                  f"{base[1] / update:.2f}x)")
+            connections *= 2
+        print(f"  identical rows: {len(snapshots) == 1}")
+
+        database = db.Database(url, maxconn=max(2, max_connections))
+        seconds, errors = timed(lambda: overlapping(database, updated.assign(rating=4.5)))
+        database.close()
+        print(f"  two overlapping loads: {seconds:.2f}s, errors: {errors or 'none'}")
+    finally:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        admin.close()
+
+if __name__ == "__main__":
+    main()
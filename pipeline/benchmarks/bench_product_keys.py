@@ -0,0 +1,82 @@
+"""
+raw_products key type: 64-char hex content_hash TEXT vs 128-bit product_key UUID.
+Builds both variants in a scratch schema on DATABASE_URL and reports the unique
+index size, upsert latency (insert pass and update pass) and the key lookup
+used by loader.load_data. The scratch schema is dropped afterwards.
+
+    DATABASE_URL=... python -m benchmarks.bench_product_keys [n_rows] [batch]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values
+
+from src import db, ingestion
+from benchmarks.common import synthetic_frame
+
+SCHEMA = "bench_product_keys"
+
+VARIANTS = {
+    'content_hash TEXT': ('text', 'content_hash'),
+    'product_key UUID': ('uuid', 'product_key'),
+}
+
+def upsert(cur, table, sql_type, keys, payload, batch):
+    query = f"""
+        INSERT INTO {SCHEMA}.{table} (key, quantity_sold) VALUES %s
+        ON CONFLICT (key) DO UPDATE SET quantity_sold = EXCLUDED.quantity_sold, updated_at = NOW()
+    """
+    template = f"(%s::{sql_type}, %s)"
+    start = time.perf_counter()
+    for i in range(0, len(keys), batch):
+        execute_values(cur, query, list(zip(keys[i:i + batch], payload[i:i + batch])),
+                       template=template, page_size=batch)
+    return time.perf_counter() - start
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    df = ingestion._prepare(synthetic_frame(n))
+    conn = db.connect()
+    conn.autocommit = True
+    cur = conn.cursor()
+    print(f"Rows: {n:,}, batch {batch:,}")
+    try:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+        for label, (sql_type, column) in VARIANTS.items():
+            table = f"raw_{sql_type}"
+            cur.execute(f"""
+                CREATE TABLE {SCHEMA}.{table} (
+                    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+                    key {sql_type} NOT NULL UNIQUE,
+                    quantity_sold BIGINT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+            """)
+            keys = df[column].tolist()
+            sold = df['sold_quantity'].tolist()
+            insert_s = upsert(cur, table, sql_type, keys, sold, batch)
+            update_s = upsert(cur, table, sql_type, keys, [q + 1 for q in sold], batch)
+
+            lookup = keys[:batch]
+            start = time.perf_counter()
+            cur.execute(f"SELECT key, id FROM {SCHEMA}.{table} WHERE key = ANY(%s::{sql_type}[])", (lookup,))
+            cur.fetchall()
+            lookup_ms = (time.perf_counter() - start) * 1000
+
+            cur.execute(f"VACUUM ANALYZE {SCHEMA}.{table}")
+            cur.execute("SELECT pg_relation_size(%s)", (f"{SCHEMA}.{table}_key_key",))
+            index_mb = cur.fetchone()[0] / 2**20
+            print(f"  {label:<18}: unique index {index_mb:7.1f} MiB, "
+                  f"insert {n / insert_s:>9,.0f} rows/s, update {n / update_s:>9,.0f} rows/s, "
+                  f"lookup of {len(lookup):,} keys {lookup_ms:6.1f} ms")
+    finally:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Enrichment throughput while a new taxonomy version is picked up by the
+watcher: build in a child process (TaxonomyWatcher) vs build on the watcher
+thread inside the enrichment process, plus the case where train_logic.py has
+already compiled the artifact and the watcher only maps it. Throughput is
+reported per window.
+
+The watcher's in-process work (map the artifact, rebuild the derived tables,
+warm the new version's per-token memos before the swap) is paced to
+taxonomy.WATCH_SHARE and the compile child is niced, so on a single core a
+reload arrives later instead of taking a large share of one window; the
+precompiled run shows the in-process part, which is all a multi-core host pays.
+The run without a save shows how much windows vary on their own.
+
+    python -m benchmarks.bench_reload [synthetic_brands] [seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning, extraction, taxonomy
+from benchmarks.bench_brand import synthetic_dictionary
+from benchmarks.common import synthetic_titles
+
+WINDOW = 0.25
+BATCH = 200
+
+class InProcessWatcher(taxonomy.TaxonomyWatcher):
+    """The naive alternative: compile on the watcher thread, competing for the GIL."""
+
+    def _build(self, digest, pause=None):
+        return taxonomy.compile_taxonomy(taxonomy.read_taxonomy(self.path))
+
+def _run(watcher_cls, data, titles, seconds, tmp, precompiled=False, save=True):
+    name = f"{watcher_cls.__name__}{'_precompiled' if precompiled else ''}{'' if save else '_idle'}"
+    path = os.path.join(tmp, f"{name}.json")
+    artifact = os.path.join(tmp, f"{name}.bin")
+    taxonomy.write_taxonomy(data, path)
+    extraction.activate(taxonomy.load(path, artifact))
+
+    updated = dict(data, version=data['version'] + 1,
+                   brands={"glowlab": ["glowlab"], **data['brands']})
+    # Written ahead and moved into place, as train_logic.py (another process) would save it
+    taxonomy.write_taxonomy(updated, path + ".next")
+    if precompiled:
+        taxonomy.save_artifact(taxonomy.compile_taxonomy(updated), artifact + ".next")
+
+    watcher = watcher_cls(extraction.activate, current=extraction.active_taxonomy().digest,
+                          path=path, artifact=artifact, interval=0.05,
+                          active=extraction.active_taxonomy)
+    watcher.start()
+    windows, reload_window = [], None
+    start = window_start = time.perf_counter()
+    done, pos, saved = 0, 0, False
+    while time.perf_counter() - start < seconds:
+        if save and not saved and time.perf_counter() - start > seconds / 3:
+            if precompiled:
+                os.replace(artifact + ".next", artifact)
+            os.replace(path + ".next", path)
+            saved = True
+        if reload_window is None and watcher.reloads:
+            reload_window = len(windows)
+        batch = titles[pos:pos + BATCH]
+        pos = (pos + BATCH) % (len(titles) - BATCH)
+        extraction.enrich_batch(batch)
+        done += len(batch)
+        now = time.perf_counter()
+        if now - window_start >= WINDOW:
+            windows.append(done / (now - window_start))
+            done, window_start = 0, now
+    watcher.stop()
+    return windows, reload_window
+
+def main():
+    n_brands = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    data = dict(taxonomy.read_taxonomy(), brands=synthetic_dictionary(n_brands))
+    data['version'] = 1
+    titles = cleaning.normalize_titles(pd.Series(synthetic_titles(200_000, seed=17), dtype=object))[0].tolist()
+
+    original = extraction.active_taxonomy()
+    print(f"Taxonomy with {n_brands:,} brands, {WINDOW}s windows (titles/sec), {os.cpu_count()} CPU(s)")
+    # The run without a save shows how much the windows vary on their own
+    runs = [("no reload", taxonomy.TaxonomyWatcher, False, False),
+            ("child process", taxonomy.TaxonomyWatcher, False, True),
+            ("precompiled", taxonomy.TaxonomyWatcher, True, True),
+            ("watcher thread", InProcessWatcher, False, True)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, cls, precompiled, save in runs:
+            windows, reload_window = _run(cls, data, titles, seconds, tmp, precompiled, save)
+            steady = sorted(windows[:max(1, len(windows) // 3)])[len(windows) // 6]
+            lowest = min(windows[len(windows) // 3:])
+            # Enrichment time given up to the reload, in steady-state seconds
+            lost = sum(max(0.0, 1 - w / steady) for w in windows[len(windows) // 3:]) * WINDOW
+            print(f"  {label:16s} steady {steady:>9,.0f}  lowest after save {lowest:>9,.0f} "
+                  f"({lowest / steady:.0%})  lost {lost:.2f}s  swapped in window {reload_window}")
+            print("    " + " ".join(f"{w / 1000:.0f}k" for w in windows))
+    extraction.activate(original)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+TF-IDF similarity fallback: cost on top of the common path, and one batched
+sparse matmul vs scoring unknown titles one at a time.
+
+Part of the synthetic titles get brand names split or glued the way sellers
+write them ("skin tific", "msglow"), which the dictionary and fuzzy layers miss.
+
+    python -m benchmarks.bench_similarity [n_titles]
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning, extraction
+from benchmarks.common import synthetic_titles, timed
+
+def _mangle(titles, seed=11, share=0.2):
+    rng = random.Random(seed)
+    out = []
+    for title in titles:
+        tokens = title.split()
+        if tokens and rng.random() < share:
+            i = rng.randrange(len(tokens))
+            tok = tokens[i]
+            if len(tok) > 5:
+                cut = rng.randint(2, len(tok) - 2)
+                tokens[i] = tok[:cut] + " " + tok[cut:]
+            elif i + 1 < len(tokens):
+                tokens[i:i + 2] = [tok + tokens[i + 1]]
+        out.append(" ".join(tokens))
+    return out
+
+def _one_by_one(index, titles):
+    return [index.best([t]) for t in titles]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    raw = _mangle(synthetic_titles(n, seed=31))
+    titles = cleaning.normalize_titles(pd.Series(raw, dtype=object))[0]
+    fallback = extraction.active_taxonomy().similarity()
+
+    plain_s, plain = timed(extraction.enrich_batch, titles, repeat=1)
+    full_s, full = timed(lambda t: extraction.enrich_batch(t, similarity=True), titles, repeat=1)
+
+    unknown = sorted(set(titles[(plain.brand == "unknown") & ~plain.non_skincare]))
+    batch_s, _ = timed(fallback.brands.best, unknown, repeat=1)
+    sample = unknown[:2000]
+    loop_s, _ = timed(_one_by_one, fallback.brands, sample, repeat=1)
+
+    n_brands = int((plain.brand != full.brand).sum())
+    n_types = int((plain.product_type != full.product_type).sum())
+    print(f"Titles: {n:,} ({len(unknown):,} distinct titles with unknown brand)")
+    print(f"  enrich_batch            : {plain_s:7.2f}s")
+    print(f"  enrich_batch + fallback : {full_s:7.2f}s (+{(full_s - plain_s) / plain_s:.0%})")
+    print(f"  rows resolved           : {n_brands:,} brands, {n_types:,} product types")
+    print(f"  brand fallback, batched : {len(unknown) / batch_s:>10,.0f} titles/sec")
+    print(f"  brand fallback, per row : {len(sample) / loop_s:>10,.0f} titles/sec "
+          f"({(len(unknown) / batch_s) / (len(sample) / loop_s):.0f}x slower)")
+    examples = np.flatnonzero(plain.brand != full.brand)[:5]
+    for i in examples:
+        print(f"    {titles[i][:50]:50s} -> {full.brand[i]} ({full.brand_confidence[i]:.2f})")
+
+if __name__ == "__main__":
+    main()
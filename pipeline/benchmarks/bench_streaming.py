@@ -0,0 +1,64 @@
+"""
+Peak memory of whole-file vs chunked ingest + clean + enrich.
+
+Each measurement runs in a fresh interpreter so ru_maxrss reflects that run
+alone. Whole-file peak grows with the input; chunked peak should stay roughly
+flat once the input is larger than a few chunks, apart from the 16 bytes per
+distinct product key the cross-chunk deduplication keeps.
+
+    python -m benchmarks.bench_streaming [sizes,comma,separated] [chunksize]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import ingestion
+from src.cache import normalize_and_enrich
+from benchmarks.common import synthetic_frame
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _child(path, chunksize):
+    start = time.perf_counter()
+    rows = 0
+    if chunksize:
+        for chunk in ingestion.iter_chunks(path, chunksize):
+            rows += len(normalize_and_enrich(chunk, None, workers=1))
+    else:
+        rows = len(normalize_and_enrich(ingestion.ingest_data(path), None, workers=1))
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RESULT {rows} {elapsed:.3f} {peak_mb:.1f}")
+
+def _measure(path, chunksize):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming", "--child", path, str(chunksize)],
+        cwd=PIPELINE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    _, rows, elapsed, peak = next(line for line in out.splitlines() if line.startswith("RESULT")).split()
+    return int(rows), float(elapsed), float(peak)
+
+def main():
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else [20_000, 200_000]
+    chunksize = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>10} {'mode':>16} {'time':>9} {'peak RSS':>10}")
+        for n in sizes:
+            path = os.path.join(tmp, f"products_{n}.csv")
+            synthetic_frame(n, seed=5, unique_ratio=0.6).to_csv(path, index=False)
+            for label, size in (("whole file", 0), (f"chunks of {chunksize}", chunksize)):
+                rows, elapsed, peak = _measure(path, size)
+                print(f"{n:>10,} {label:>16} {elapsed:>8.2f}s {peak:>8.1f}MB  ({rows:,} rows out)")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
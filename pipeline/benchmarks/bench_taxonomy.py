@@ -0,0 +1,63 @@
+"""
+Matcher build time and `src.extraction` import time: compiling the taxonomy from
+JSON (what every import used to do from the Python literals) vs loading the
+compiled artifact.
+
+    python -m benchmarks.bench_taxonomy [synthetic_brands]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import taxonomy
+from benchmarks.bench_brand import synthetic_dictionary
+from benchmarks.common import timed
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORT_PROBE = ("import time; s = time.perf_counter(); import src.extraction; "
+                 "print(time.perf_counter() - s)")
+
+def _import_seconds(env, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=PIPELINE_DIR,
+                             env=env, capture_output=True, text=True, check=True).stdout
+        best = min(best, float(out.split()[-1]))
+    return best
+
+def _compare(label, data, tmp):
+    path = os.path.join(tmp, f"{label}.json")
+    artifact = os.path.join(tmp, f"{label}.bin")
+    taxonomy.write_taxonomy(data, path)
+
+    build_s, compiled = timed(taxonomy.compile_taxonomy, data, repeat=3)
+    taxonomy.save_artifact(compiled, artifact)
+    load_s, _ = timed(taxonomy.load_artifact, artifact, compiled.digest, repeat=3)
+
+    env = dict(os.environ, TAXONOMY_PATH=path, TAXONOMY_ARTIFACT_PATH=artifact)
+    warm_import = _import_seconds(env)
+    # Without an artifact every import compiles in memory
+    env['TAXONOMY_ARTIFACT_PATH'] = os.path.join(tmp, "missing.bin")
+    cold_import = _import_seconds(env)
+
+    print(f"{label}: {len(compiled.brands):,} brands, {len(compiled.fuzzy_aliases):,} aliases, "
+          f"{len(compiled.classifier):,} automaton states, artifact {os.path.getsize(artifact) / 1024:,.0f}KB")
+    print(f"  matcher build      : {build_s * 1000:8.1f}ms")
+    print(f"  artifact load      : {load_s * 1000:8.1f}ms ({build_s / load_s:.1f}x faster)")
+    print(f"  import (build)     : {cold_import * 1000:8.1f}ms")
+    print(f"  import (artifact)  : {warm_import * 1000:8.1f}ms")
+
+def main():
+    n_brands = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    shipped = taxonomy.read_taxonomy()
+    synthetic = dict(shipped, brands=synthetic_dictionary(n_brands))
+    with tempfile.TemporaryDirectory() as tmp:
+        _compare("shipped", shipped, tmp)
+        _compare(f"synthetic_{n_brands}", synthetic, tmp)
+
+if __name__ == "__main__":
+    main()
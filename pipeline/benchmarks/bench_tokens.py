@@ -0,0 +1,60 @@
+"""
+Shared token representation: per-title string classification (the previous
+enrich_batch loop) vs one tokenized batch reused by every layer, plus the
+memory held by split token lists vs the interned id arrays.
+
+    python -m benchmarks.bench_tokens [n_titles]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from src import cleaning, extraction, taxonomy, tokens
+from benchmarks.common import synthetic_titles, timed
+
+def per_title(compiled, titles):
+    return [extraction.classify(t, compiled=compiled) for t in titles]
+
+def token_batch(compiled, titles):
+    return extraction._classify_tokens(compiled, tokens.tokenize(titles), titles, taxonomy.DEFAULT_THRESHOLD)
+
+def traced(fn):
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = pd.Series(synthetic_titles(n, seed=3), dtype=object)
+    titles = list(pd.unique(cleaning.normalize_titles(names)[0]))
+    data = taxonomy.read_taxonomy()
+
+    # Fresh taxonomies so neither path starts with a warm token or fuzzy memo
+    before_s, before = timed(per_title, taxonomy.compile_taxonomy(data), titles, repeat=1)
+    after_s, after = timed(token_batch, taxonomy.compile_taxonomy(data), titles, repeat=1)
+    warm_s, _ = timed(token_batch, extraction.active_taxonomy(), titles, repeat=3)
+
+    brands = [b[0] for b, _, _ in before]
+    mismatches = sum(a != b for a, b in zip(brands, after[0]))
+    mismatches += sum(t[0] != b for (_, t, _), b in zip(before, after[2]))
+
+    lists_bytes, _ = traced(lambda: [t.split() for t in titles])
+    ids_bytes, tokenized = traced(lambda: tokens.tokenize(titles))
+
+    print(f"Distinct titles: {len(titles):,}, tokens: {len(tokenized.ids):,}, vocab: {len(tokenized.vocab):,}")
+    print(f"  per-title scan : {before_s:8.3f}s ({len(titles) / before_s:>10,.0f} titles/sec)")
+    print(f"  token batch    : {after_s:8.3f}s ({len(titles) / after_s:>10,.0f} titles/sec), "
+          f"warm memo {warm_s:.3f}s")
+    print(f"  speedup: {before_s / after_s:.2f}x, label mismatches: {mismatches}")
+    print(f"  token lists    : {lists_bytes / 2**20:8.1f} MiB")
+    print(f"  interned ids   : {ids_bytes / 2**20:8.1f} MiB retained "
+          f"({tokenized.nbytes() / 2**20:.1f} MiB arrays + vocab text)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Product type classification: per-title keyword loop + sort (legacy) vs the
+single-scan ranked automaton.
+
+    python -m benchmarks.bench_types [n_titles]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import cleaning, extraction
+from benchmarks import legacy
+from benchmarks.common import synthetic_titles, timed
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    titles = [cleaning.clean_title(t).lower() for t in synthetic_titles(n)]
+    before_s, before = timed(lambda: [legacy.extract_product_type(t) for t in titles])
+    after_s, after = timed(lambda: [extraction.extract_product_type(t) for t in titles])
+    print(f"Titles: {n:,}")
+    print(f"  legacy   : {n / before_s:>12,.0f} titles/sec")
+    print(f"  automaton: {n / after_s:>12,.0f} titles/sec")
+    print(f"  speedup  : {before_s / after_s:.2f}x, identical output: {before == after}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import time
+
+# Building blocks that look like marketplace titles: brands, product words,
+# promo noise, sizes, separators and a little unicode.
+_BRANDS = ["Wardah", "SOMETHINC", "Scarlett", "MS Glow", "Skintific", "Hada Labo",
+           "Glad2Glow", "Npure", "Azarine", "La Roche-Posay", "Dokhaz", "Kudan",
+           "Viera", "Mamamia", "Larissa", "Pixy", "Emina", "Make Over"]
+_WORDS = ["Serum", "Toner", "Moisturizer", "Sunscreen SPF 50 PA+++", "Lip Cream",
+          "Facial Wash", "Body Lotion", "Clay Mask", "Niacinamide", "Brightening",
+          "Day Cream", "Night Cream", "Cushion", "Powder", "Shampoo", "Hair Tonic",
+          "Popok Bayi", "Parfum", "Kutek", "Bedak Tabur", "Pelembab", "Vitamin C"]
+_NOISE = ["[BPOM]", "[FLASH SALE]", "(COD READY)", "(️BPOM)", "Ready Stock", "ORIGINAL",
+          "Best Seller", "VIRAL", "Beli 1 Gratis 1", "FREE Pouch", "Bonus Sample",
+          "✨", "🔥🔥", "!!!", "---", "New", "Exclusive"]
+_SIZES = ["30ml", "100ML", "7gr/20gr", "50g", "1/2/3 Pcs", "S34 M30 L26"]
+_SEPS = [" ", " ", " ", " | ", " - ", " / ", "\u200b ", " ,"]
+
+def synthetic_titles(n, seed=7, unique_ratio=1.0):
+    """Return n synthetic raw titles; unique_ratio < 1 repeats titles like real feeds do."""
+    rng = random.Random(seed)
+    n_unique = max(1, int(n * unique_ratio))
+    pool = []
+    for _ in range(n_unique):
+        parts = []
+        if rng.random() < 0.4:
+            parts.append(rng.choice(_NOISE))
+        parts.append(rng.choice(_BRANDS))
+        parts.extend(rng.sample(_WORDS, rng.randint(1, 3)))
+        parts.append(rng.choice(_SIZES))
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(_NOISE))
+        title = parts[0]
+        for part in parts[1:]:
+            title += rng.choice(_SEPS) + part
+        pool.append(title)
+    if n_unique == n:
+        return pool
+    return [pool[rng.randrange(n_unique)] for _ in range(n)]
+
+def timed(fn, *args, repeat=3):
+    """Best-of-N wall time in seconds plus the last result."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def synthetic_frame(n, seed=7, unique_ratio=1.0):
+    """DataFrame shaped like a transform output CSV, with synthetic titles."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    titles = synthetic_titles(n, seed=seed, unique_ratio=unique_ratio)
+    price = rng.integers(10_000, 500_000, n)
+    return pd.DataFrame({
+        'name': titles,
+        'url': [f"https://shopee.co.id/product/{1000 + i % 977}/{i}" for i in range(n)],
+        'image': "N/A",
+        'rating': rng.choice([0.0, 4.5, 4.8, 4.9, 5.0], n),
+        'sold_quantity': rng.integers(0, 20_000, n),
+        'price_current': price,
+        'price_original': price + rng.integers(0, 50_000, n),
+        'discount': rng.integers(0, 60, n),
+        'source': rng.choice(["tiktok", "shopee", "tokopedia", "lazada", "blibli"], n),
+    })
@@ -0,0 +1,180 @@
+"""
+Frozen copies of the original pipeline implementations.
+Used as the "before" side of the benchmarks and as the parity reference in tests.
+Do not optimize anything in this file.
+"""
+import re
+import unicodedata
+
+import pandas as pd
+from psycopg2.extras import execute_values
+from thefuzz import fuzz
+
+from src.cleaning import NOISE_PATTERNS
+from src.dtypes import to_decimal
+from src.extraction import BRAND_DICTIONARY, PRODUCT_TYPES
+
+def remove_noise(title: str) -> str:
+    if not isinstance(title, str): return ""
+    cleaned = title
+    for pattern in NOISE_PATTERNS:
+        cleaned = re.sub(pattern, ' ', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return cleaned
+
+def normalize_unicode(text: str) -> str:
+    if not isinstance(text, str): return ""
+    text = unicodedata.normalize('NFC', text)
+    text = re.sub(r'[\u200b\u200c\u200d\ufeff]', '', text)
+    return text
+
+def smart_case_normalize(text: str) -> tuple:
+    match_text = text.lower()
+    display_text = text.title()
+    display_text = re.sub(r'\bMs\s+Glow\b', 'MS Glow', display_text, flags=re.IGNORECASE)
+    display_text = re.sub(r'\bGlad2glow\b', 'glad2glow', display_text, flags=re.IGNORECASE)
+    return match_text, display_text
+
+def normalize_data(df):
+    df['name'] = df['name'].fillna("")
+    df['title_cleaned_temp'] = df['name'].apply(normalize_unicode).apply(remove_noise)
+    match_and_display = df['title_cleaned_temp'].apply(smart_case_normalize)
+    df['title_match'] = match_and_display.apply(lambda x: x[0])
+    df['title_cleaned'] = match_and_display.apply(lambda x: x[1])
+    df['sold_quantity'] = pd.to_numeric(df['sold_quantity'], errors='coerce').fillna(0)
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce').fillna(0.0)
+    return df
+
+def extract_brand(title_lower: str, threshold: float = 85.0) -> tuple:
+    for canonical, aliases in BRAND_DICTIONARY.items():
+        for alias in aliases:
+            if alias in title_lower:
+                return canonical, 0.95, "dictionary_exact"
+    tokens = title_lower.split()
+    for canonical, aliases in BRAND_DICTIONARY.items():
+        for alias in aliases:
+            for token in tokens:
+                ratio = fuzz.ratio(alias, token)
+                if ratio >= threshold:
+                    return canonical, ratio / 100.0, "dictionary_fuzzy"
+    return "unknown", 0.0, "none"
+
+def extract_product_type(title_lower: str) -> tuple:
+    matches = []
+    for category, config in PRODUCT_TYPES.items():
+        for keyword in config["keywords"]:
+            if keyword in title_lower:
+                matches.append({
+                    "category": category,
+                    "priority": config["priority"],
+                    "keyword": keyword
+                })
+    if not matches:
+        return "unknown", 0.0, "none"
+    matches.sort(key=lambda x: (x["priority"], -len(x["keyword"])))
+    best_match = matches[0]
+    confidence = 0.90 if best_match["priority"] == 1 else 0.75
+    return best_match["category"], confidence, "keyword_rule"
+
+def enrich_data(df):
+    brands = []
+    types = []
+    b_confs = []
+    t_confs = []
+    for idx, row in df.iterrows():
+        title = row['title_match']
+        b, b_conf, _ = extract_brand(title)
+        t, t_conf, _ = extract_product_type(title)
+        brands.append(b)
+        types.append(t)
+        b_confs.append(b_conf)
+        t_confs.append(t_conf)
+    df['brand'] = brands
+    df['product_type'] = types
+    df['brand_confidence'] = b_confs
+    df['product_type_confidence'] = t_confs
+    return df
+
+def load_rows_remap(cur, df_final) -> tuple:
+    """
+    loader.values_rows before the raw upsert fed the enriched upsert: RETURNING
+    output discarded, ids remapped with a second query, the frame iterated twice.
+    """
+    # 1. Insert Raw Products (Filtered)
+    raw_rows = []
+    for idx, row in df_final.iterrows():
+        discount_val = to_decimal(row['discount'])
+        if discount_val > 1.0:
+            discount_val = discount_val / 100.0
+        
+        raw_rows.append((
+            row['product_key'],
+            row['content_hash'],
+            row['name'],
+            row['sold_quantity'],
+            row['price_current'],
+            row['price_original'],
+            discount_val,
+            to_decimal(row['rating']),
+            row.get('url', ''),
+            row.get('image', ''),
+            row.get('source', 'tiktok') # Default to tiktok if column missing
+        ))
+        
+    insert_raw_query = """
+        INSERT INTO raw_products (product_key, content_hash, title_raw, quantity_sold, price_current, price_original, discount, rating, url, image_url, source)
+        VALUES %s
+        ON CONFLICT (product_key) DO UPDATE SET
+            content_hash = EXCLUDED.content_hash,
+            title_raw = EXCLUDED.title_raw,
+            quantity_sold = EXCLUDED.quantity_sold,
+            price_current = EXCLUDED.price_current,
+            price_original = EXCLUDED.price_original,
+            discount = EXCLUDED.discount,
+            rating = EXCLUDED.rating,
+            image_url = EXCLUDED.image_url,
+            source = EXCLUDED.source,
+            updated_at = NOW()
+        RETURNING id, product_key;
+    """
+    
+    execute_values(cur, insert_raw_query, raw_rows, template="(%s::uuid, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+    
+    # Mapping for enriched link
+    cur.execute("SELECT product_key::text, id FROM raw_products WHERE product_key = ANY(%s::uuid[])", (list(df_final['product_key']),))
+    mapping = dict(cur.fetchall())
+    
+    # 2. Insert Enriched Products
+    enriched_rows = []
+    for idx, row in df_final.iterrows():
+        raw_id = mapping.get(row['product_key'])
+        if raw_id:
+            effective = float(row['price_current'])
+            brand_conf = to_decimal(row.get('brand_confidence', 0.0))
+            type_conf = to_decimal(row.get('product_type_confidence', 0.0))
+            overall_conf = (brand_conf * 0.6) + (type_conf * 0.4)
+            
+            enriched_rows.append((
+                str(raw_id),
+                row['title_cleaned'],
+                row['brand'],
+                row['product_type'],
+                effective,
+                brand_conf,
+                type_conf,
+                overall_conf
+            ))
+    
+    insert_enriched_query = """
+        INSERT INTO enriched_products (raw_product_id, title_cleaned, brand, product_type, price_effective, brand_confidence, product_type_confidence, enrichment_confidence)
+        VALUES %s
+        ON CONFLICT (raw_product_id) DO UPDATE SET
+            title_cleaned = EXCLUDED.title_cleaned,
+            brand = EXCLUDED.brand,
+            product_type = EXCLUDED.product_type,
+            enriched_at = NOW();
+    """
+    
+    if enriched_rows:
+        execute_values(cur, insert_enriched_query, enriched_rows)
+    return len(raw_rows), len(enriched_rows)
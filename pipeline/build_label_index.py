@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.label_index import LabelIndex
+
+DEFAULT_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'unknown_products_labeling.csv')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build (or extend) the nearest-neighbour label index from labeled titles.")
+    parser.add_argument("--index-path", help="Index directory (default: LABEL_INDEX_PATH or data/cache/label_index/)")
+    parser.add_argument("--labels", default=DEFAULT_LABELS_PATH, help="Labeled export (default: data/unknown_products_labeling.csv)")
+    parser.add_argument("--no-db", action="store_true", help="Skip titles already in enriched_products")
+    return parser.parse_args()
+
+def fetch_enriched_titles():
+    from src import db
+
+    with db.get_database().transaction() as cur:
+        cur.execute("""
+            SELECT title_cleaned, brand, product_type
+            FROM enriched_products
+            WHERE brand != 'unknown' AND product_type != 'unknown'
+        """)
+        return cur.fetchall()
+
+def build(index_path=None, labels_path=DEFAULT_LABELS_PATH, use_db=True):
+    index = LabelIndex(index_path)
+    start = time.perf_counter()
+
+    if use_db:
+        try:
+            rows = fetch_enriched_titles()
+        except Exception as e:
+            print(f"Skipping enriched_products: {e}")
+        else:
+            titles = [title.lower() for title, _, _ in rows]
+            brands = [brand for _, brand, _ in rows]
+            types = [product_type for _, _, product_type in rows]
+            print(f"enriched_products: {index.add(titles, brands, types)} new titles")
+
+    # Human corrections come last so they override the labels of the same title
+    if os.path.exists(labels_path):
+        print(f"{os.path.basename(labels_path)}: {index.add_labeling_csv(labels_path)} new titles")
+
+    print(f"Label index at {index.path}: {len(index)} titles, "
+          # One int32 bucket and one float16 value per stored nonzero slot
+          f"{index.capacity * 6 / 1e6:.1f}MB vectors, built in {time.perf_counter() - start:.1f}s")
+    index.close()
+
+if __name__ == "__main__":
+    load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+    args = parse_args()
+    build(args.index_path, args.labels, use_db=not args.no_db)
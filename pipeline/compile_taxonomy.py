@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import argparse
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src import taxonomy
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile taxonomy/taxonomy.json into the matcher artifact used by extraction.")
+    parser.add_argument("--taxonomy", help="Taxonomy JSON (default: TAXONOMY_PATH or taxonomy/taxonomy.json)")
+    parser.add_argument("--output", help="Artifact path (default: TAXONOMY_ARTIFACT_PATH or data/cache/taxonomy.bin)")
+    return parser.parse_args()
+
+def compile_artifact(taxonomy_file=None, output=None):
+    data = taxonomy.read_taxonomy(taxonomy_file)
+
+    start = time.perf_counter()
+    compiled = taxonomy.compile_taxonomy(data)
+    build_s = time.perf_counter() - start
+
+    output = output or taxonomy.artifact_path()
+    taxonomy.save_artifact(compiled, output)
+
+    start = time.perf_counter()
+    taxonomy.load_artifact(output, compiled.digest)
+    load_s = time.perf_counter() - start
+
+    print(f"Compiled taxonomy v{compiled.version}: {len(compiled.brands)} brands, "
+          f"{len(compiled.fuzzy_aliases)} aliases, {len(compiled.type_categories)} type keywords, "
+          f"{len(compiled.non_skincare_keywords)} blocklist keywords")
+    print(f"  automaton states: {len(compiled.classifier)}")
+    print(f"  build: {build_s * 1000:.1f}ms, artifact load: {load_s * 1000:.1f}ms, "
+          f"size: {os.path.getsize(output) / 1024:.1f}KB -> {output}")
+    return compiled
+
+if __name__ == "__main__":
+    args = parse_args()
+    compile_artifact(args.taxonomy, args.output)
@@ -0,0 +1,109 @@
+"""
+Migrate raw_products from the content_hash TEXT key to the compact product_key UUID.
+
+    python migrate_product_keys.py [--batch-size N]
+
+Steps (safe to re-run; each finished step is a no-op the second time):
+  1. add the nullable product_key column
+  2. backfill keys in batches from the stored url / title_raw / content_hash
+     (the same src.ingestion.product_keys the pipeline uses)
+  3. merge rows that now share a key (a listing whose title was edited was
+     stored twice): the most recently updated row is kept, the older rows and
+     their enriched_products rows are deleted
+  4. make product_key NOT NULL UNIQUE and drop the UNIQUE index on content_hash
+"""
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src import db, ingestion
+
+ADD_COLUMN = "ALTER TABLE raw_products ADD COLUMN IF NOT EXISTS product_key UUID;"
+
+BACKFILL = """
+    UPDATE raw_products r SET product_key = v.product_key::uuid
+    FROM (VALUES %s) AS v (id, product_key)
+    WHERE r.id = v.id::uuid;
+"""
+
+MERGE_DUPLICATES = """
+    DELETE FROM raw_products r
+    USING raw_products newer
+    WHERE r.product_key = newer.product_key
+      AND (r.updated_at, r.id) < (newer.updated_at, newer.id);
+"""
+
+CONSTRAINTS = """
+    ALTER TABLE raw_products ALTER COLUMN product_key SET NOT NULL;
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'raw_products_product_key_key') THEN
+            ALTER TABLE raw_products ADD CONSTRAINT raw_products_product_key_key UNIQUE (product_key);
+        END IF;
+    END $$;
+    ALTER TABLE raw_products DROP CONSTRAINT IF EXISTS raw_products_content_hash_key;
+    ALTER TABLE raw_products ALTER COLUMN content_hash DROP NOT NULL;
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-key raw_products on compact product keys.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows backfilled per statement (default: 10000)")
+    return parser.parse_args()
+
+def backfill(cur, batch_size):
+    total = 0
+    while True:
+        cur.execute("""
+            SELECT id::text, title_raw, url, content_hash
+            FROM raw_products WHERE product_key IS NULL
+            LIMIT %s
+        """, (batch_size,))
+        rows = cur.fetchall()
+        if not rows:
+            return total
+        df = pd.DataFrame(rows, columns=['id', 'name', 'url', 'content_hash'])
+        df['url'] = df['url'].fillna('')
+        # Rows stored without a hash get the one ingestion would compute
+        missing = df['content_hash'].isna()
+        if missing.any():
+            df.loc[missing, 'content_hash'] = ingestion.content_hashes(df[missing])
+        keys = ingestion.product_keys(df, df['content_hash'].tolist())
+        execute_values(cur, BACKFILL, list(zip(df['id'], keys)), page_size=batch_size)
+        total += len(rows)
+        print(f"  backfilled {total} rows")
+
+def migrate(batch_size=10000):
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'))
+    conn = db.connect()
+    cur = conn.cursor()
+    start = time.perf_counter()
+    try:
+        print("Adding product_key column...")
+        cur.execute(ADD_COLUMN)
+        print("Backfilling product keys...")
+        n = backfill(cur, batch_size)
+        cur.execute(MERGE_DUPLICATES)
+        merged = cur.rowcount
+        print(f"Merged {merged} rows that share a product key with a newer row")
+        cur.execute(CONSTRAINTS)
+        conn.commit()
+        print(f"Migration finished in {time.perf_counter() - start:.1f}s ({n} rows re-keyed).")
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration failed, nothing changed: {e}")
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+if __name__ == "__main__":
+    args = parse_args()
+    migrate(args.batch_size)
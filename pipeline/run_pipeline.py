@@ -1,45 +1,172 @@
 import os
 import sys
+import argparse
 from dotenv import load_dotenv
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src import ingestion, cleaning, extraction, loader
+from src import ingestion, extraction, loader, columnar, dtypes, db
+from src.cache import TitleCache, normalize_and_enrich
+from src.parallel import EnrichmentPool
+from src.label_index import LabelIndex, propagate_labels
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest, clean, enrich and load a transformed product file.")
+    parser.add_argument("data_path", nargs="?", help="Cleaned CSV, Parquet or Arrow file produced by an ETL transform")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute cleaning/enrichment for every title instead of using the title cache")
+    parser.add_argument("--cache-path", help="Title cache location (default: TITLE_CACHE_PATH or data/cache/)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Clean and enrich titles on N worker processes (default: 1, serial)")
+    parser.add_argument("--similarity-fallback", action="store_true",
+                        help="Resolve titles the dictionary/fuzzy layers leave unknown with the "
+                             "char n-gram TF-IDF fallback (needs scipy)")
+    parser.add_argument("--label-index", action="store_true",
+                        help="Give still-unknown titles the labels of their nearest already-labeled titles "
+                             "(LABEL_INDEX_PATH or data/cache/label_index/, see build_label_index.py) and "
+                             "add every loaded title to the index")
+    parser.add_argument("--chunksize", type=int,
+                        help="Stream the input through ingest/clean/enrich/load N rows at a time "
+                             "instead of reading it whole (memory bounded by N, plus 16 bytes per distinct product "
+                             "for cross-chunk deduplication)")
+    parser.add_argument("--load-method", choices=loader.LOAD_METHODS,
+                        help="copy: COPY into a staging table and merge set-based (default); "
+                             "values: column arrays, one upsert per page (fallback). Default: LOAD_METHOD or copy")
+    parser.add_argument("--load-connections", type=int,
+                        help="Upsert product_key range partitions on N connections at once, each under its "
+                             "advisory lock (default: LOAD_CONNECTIONS or 1, a single transaction)")
+    parser.add_argument("--watch-taxonomy", action="store_true",
+                        help="With --chunksize: pick up taxonomy updates (train_logic.py) between chunks "
+                             "without restarting")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     # Load .env
     load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
     
     # 1. Ingest
-    if len(sys.argv) > 1:
-        data_path = sys.argv[1]
+    if args.data_path:
+        data_path = args.data_path
         print(f"Using provided data path: {data_path}")
     else:
         # Default path
-        data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'beauty_data_cleaned.csv')
+        data_path = columnar.preferred_path(os.path.join(os.path.dirname(__file__), '..', 'data', 'beauty_data_cleaned.csv'))
         print(f"Using default data path: {data_path}")
-        
+
+    if args.chunksize:
+        run_streaming(data_path, args)
+        return
+
+    memory = dtypes.MemoryReport()
     df = ingestion.ingest_data(data_path)
     
     if df is None:
         print("Pipeline aborted.")
         return
+    memory.record('ingest', df)
 
-    # 2. Clean
-    df = cleaning.normalize_data(df)
-    
-    # 3. Extract/Enrich
-    df = extraction.enrich_data(df)
+    # 2. Clean + 3. Extract/Enrich (titles seen on earlier runs come from the cache)
+    cache = None if args.no_cache else TitleCache(args.cache_path)
+    try:
+        df = normalize_and_enrich(df, cache, workers=args.workers, similarity=args.similarity_fallback)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # 3b. Labels from the nearest already-labeled titles
+    index = LabelIndex() if args.label_index else None
+    adopted = propagate_labels(df, index) if index is not None else None
+    memory.record('enrich', df)
+
+    # Lean dtypes for the rest of the run; title_match is only read again by the label index
+    df = dtypes.enriched(df, keep_match_titles=index is not None)
+    memory.record('load', df)
     
     # 4. Load
     try:
-        loader.load_data(df, df) # We pass df twice because in this flow they are the same object with added columns
+        loader.load_data(df, df, method=args.load_method, connections=args.load_connections) # We pass df twice because in this flow they are the same object with added columns
     except Exception as e:
         print(f"Pipeline Failed at Load Step: {e}")
+        if index is not None:
+            index.close()
         return
 
+    if index is not None:
+        # Propagated labels are not fed back, so the index only grows from rule/human labels
+        print(f"Label index: added {index.add_frame(df[~adopted])} titles")
+        index.close()
+
+    memory.summary()
+    db.report()
     print("Pipeline Finished Successfully.")
 
+def run_streaming(data_path, args):
+    """
+    Same stages as main(), one chunk at a time: at most `chunksize` rows are held
+    in memory, content_hash duplicates are dropped across chunks (the keys seen so
+    far are the one thing that grows with the input, see ingestion.HashDeduper),
+    and the unknown product export accumulates over the whole file.
+    """
+    cache = None if args.no_cache else TitleCache(args.cache_path)
+    watcher = extraction.watch_taxonomy() if args.watch_taxonomy else None
+    index = LabelIndex() if args.label_index else None
+    # One set of workers for every chunk (restarted only by a taxonomy reload)
+    pool = EnrichmentPool(args.workers) if args.workers > 1 else None
+    memory = dtypes.MemoryReport()
+    n_chunks = 0
+    exported = 0
+    chunks = ingestion.iter_chunks(data_path, args.chunksize)
+    try:
+        while True:
+            # Only reading the input is reported as such; later stages raise as in main()
+            try:
+                chunk = next(chunks, None)
+            except Exception as e:
+                print(f"Error reading CSV: {e}")
+                print("Pipeline aborted.")
+                return
+            if chunk is None:
+                break
+            n_chunks += 1
+            print(f"--- Chunk {n_chunks} ({len(chunk)} rows) ---")
+            memory.record('ingest', chunk)
+            chunk = normalize_and_enrich(chunk, cache, similarity=args.similarity_fallback, pool=pool)
+            adopted = propagate_labels(chunk, index) if index is not None else None
+            memory.record('enrich', chunk)
+            chunk = dtypes.enriched(chunk, keep_match_titles=index is not None)
+            memory.record('load', chunk)
+            try:
+                exported += loader.load_data(chunk, chunk, append_unknowns=exported > 0,
+                                              method=args.load_method,
+                                              connections=args.load_connections) or 0
+            except Exception as e:
+                print(f"Pipeline Failed at Load Step (chunk {n_chunks}): {e}")
+                return
+            if index is not None:
+                # Later chunks can already match the titles this one loaded
+                index.add_frame(chunk[~adopted])
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if pool is not None:
+            pool.close()
+        if index is not None:
+            index.close()
+        if cache is not None:
+            cache.close()
+
+    if n_chunks == 0:
+        print("Pipeline aborted.")
+        return
+    memory.summary()
+    db.report()
+    print(f"Pipeline Finished Successfully ({n_chunks} chunks).")
+
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        db.close_database()
@@ -0,0 +1,173 @@
+"""
+Aho-Corasick multi-pattern matcher used by the dictionary layers in extraction.
+
+Every pattern carries an integer rank (and optionally a channel). A scan reports
+the lowest rank per channel among all patterns occurring anywhere in the text,
+which is exactly the "first entry in dictionary order wins" precedence of the
+old nested substring loops, found in a single pass over the text. Channels let
+several dictionaries (brands, product types, blocklist) share one scan.
+
+The trie is kept as flat integer arrays (see ARRAYS), which is also how the
+compiled taxonomy artifact stores it: a loaded automaton scans straight from
+the mapped file and only turns the states a scan reaches into Python objects.
+"""
+from bisect import bisect_left
+
+import numpy as np
+
+NO_MATCH = 1 << 62
+
+# edge_offsets[s]:edge_offsets[s + 1] are state s's edges in edge_chars (code
+# points, ascending) / edge_targets; fail and ranks (n_states x channels) per state
+ARRAYS = ('edge_offsets', 'edge_chars', 'edge_targets', 'fail', 'ranks')
+
+_UNRESOLVED = {}
+
+class AhoCorasick:
+    def __init__(self, patterns, channels: int = 1):
+        """
+        patterns: iterable of (pattern, rank) or (pattern, rank, channel);
+        duplicates keep the lowest rank per channel.
+        """
+        goto = [{}]
+        ranks = [[NO_MATCH] * channels]
+        for pattern, pattern_rank, *channel in patterns:
+            channel = channel[0] if channel else 0
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    ranks.append([NO_MATCH] * channels)
+                state = nxt
+            ranks[state][channel] = min(ranks[state][channel], pattern_rank)
+
+        # Breadth-first failure links; each state's ranks also cover every
+        # pattern that is a suffix of it (the states on its failure chain).
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                ranks[nxt] = [min(a, b) for a, b in zip(ranks[nxt], ranks[fail[nxt]])]
+                queue.append(nxt)
+
+        edges = [sorted((ord(ch), nxt) for ch, nxt in state.items()) for state in goto]
+        self._attach({
+            'edge_offsets': np.cumsum([0] + [len(e) for e in edges], dtype=np.int32),
+            'edge_chars': np.array([c for e in edges for c, _ in e], dtype=np.int32),
+            'edge_targets': np.array([t for e in edges for _, t in e], dtype=np.int32),
+            'fail': np.array(fail, dtype=np.int32),
+            'ranks': np.array(ranks, dtype=np.int64).reshape(len(goto), channels),
+        })
+
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> 'AhoCorasick':
+        """Automaton over the output of arrays(), e.g. views into a mapped artifact."""
+        self = cls.__new__(cls)
+        self._attach(arrays)
+        return self
+
+    def arrays(self) -> dict:
+        return dict(self._arrays)
+
+    def __reduce__(self):
+        return AhoCorasick.from_arrays, (self.arrays(),)
+
+    def _attach(self, arrays):
+        offsets, chars, targets, fail, ranks = (arrays[name] for name in ARRAYS)
+        n = len(fail)
+        # Arrays read from a file are checked once here, so a scan can never index out of range
+        if (n == 0 or ranks.ndim != 2 or ranks.shape[0] != n or offsets.shape != (n + 1,)
+                or offsets[0] != 0 or offsets[-1] != len(chars) or len(targets) != len(chars)
+                or np.any(np.diff(offsets) < 0)
+                or (len(targets) and (targets.min() < 1 or targets.max() >= n))
+                or fail.min() < 0 or fail.max() >= n):
+            raise ValueError("malformed automaton arrays")
+        self.channels = ranks.shape[1]
+        self._arrays = dict(zip(ARRAYS, (offsets, chars, targets, fail, ranks)))
+        self._offsets, self._chars, self._targets = offsets, chars, targets
+        self._fail = fail
+        self._rank_rows = ranks
+        # Channel 0 for the single-dictionary scan and per-state rank tuples (None
+        # for states that end no pattern at all), both filled as states are reached
+        self._rank = [NO_MATCH] * n
+        self._ranks = [None] * n
+        self._reached = [False] * n
+        self._reach(0)
+        self._root = tuple(ranks[0].tolist())
+        # Resolved transitions (goto + failure walk), filled lazily per (state, char);
+        # states start on one shared empty dict that _resolve never writes to
+        self._delta = [_UNRESOLVED] * n
+
+    def __len__(self):
+        return len(self._fail)
+
+    def _reach(self, state):
+        row = self._rank_rows[state].tolist()
+        self._rank[state] = row[0]
+        self._ranks[state] = tuple(row) if min(row) != NO_MATCH else None
+        self._reached[state] = True
+
+    def _edge(self, state, code):
+        lo, hi = int(self._offsets[state]), int(self._offsets[state + 1])
+        i = lo + bisect_left(self._chars[lo:hi], code)
+        if i < hi and self._chars[i] == code:
+            return int(self._targets[i])
+        return -1
+
+    def _resolve(self, state, ch):
+        code = ord(ch)
+        s = state
+        nxt = self._edge(s, code)
+        while nxt < 0 and s:
+            s = int(self._fail[s])
+            nxt = self._edge(s, code)
+        nxt = max(nxt, 0)
+        if not self._reached[nxt]:
+            self._reach(nxt)
+        row = self._delta[state]
+        if row is _UNRESOLVED:
+            row = self._delta[state] = {}
+        row[ch] = nxt
+        return nxt
+
+    def min_rank(self, text: str) -> int:
+        """Lowest channel-0 rank of any pattern found in `text`, or NO_MATCH."""
+        delta, rank = self._delta, self._rank
+        best = rank[0]
+        state = 0
+        for ch in text:
+            nxt = delta[state].get(ch)
+            if nxt is None:
+                nxt = self._resolve(state, ch)
+            state = nxt
+            r = rank[state]
+            if r < best:
+                best = r
+                if best == 0:
+                    break
+        return best
+
+    def min_ranks(self, text: str) -> list:
+        """Lowest rank per channel of the patterns found in `text` (NO_MATCH if none)."""
+        delta, ranks = self._delta, self._ranks
+        best = list(self._root)
+        channels = range(self.channels)
+        state = 0
+        for ch in text:
+            nxt = delta[state].get(ch)
+            if nxt is None:
+                nxt = self._resolve(state, ch)
+            state = nxt
+            r = ranks[state]
+            if r is not None:
+                for i in channels:
+                    if r[i] < best[i]:
+                        best[i] = r[i]
+        return best
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from . import cleaning, extraction
+from .parallel import TITLE_COLUMNS, clean_and_enrich_titles
+
+DEFAULT_CACHE_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'cache', 'title_cache.sqlite'
+))
+
+# Bump when cleaning/enrichment logic changes in a way the rule tables don't capture
+LOGIC_VERSION = 2
+
+CACHED_COLUMNS = TITLE_COLUMNS
+
+def taxonomy_version(compiled=None, similarity: bool = False) -> str:
+    """Fingerprint of every rule table that feeds a cached result (active taxonomy by default)."""
+    compiled = compiled or extraction.active_taxonomy()
+    payload = json.dumps({
+        'logic': LOGIC_VERSION,
+        'noise': cleaning.NOISE_PATTERNS,
+        'casing': cleaning.BRAND_CASING_FIXES,
+        'taxonomy': compiled.digest.hex(),
+        # The fallback layer changes results, so its entries live under their own version
+        'similarity': similarity,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def title_key(title: str) -> bytes:
+    # Non-string names clean to "" (see cleaning.clean_title), so they share its entry
+    if not isinstance(title, str):
+        title = ""
+    return hashlib.blake2b(title.encode('utf-8'), digest_size=16).digest()
+
+class TitleCache:
+    """
+    Persistent raw title -> (cleaned title, brand, type, confidences) cache in SQLite.
+    Rows are keyed by (title hash, taxonomy version); rows written under any other
+    taxonomy version are purged when the cache is opened. Without an explicit
+    `version` the cache follows taxonomy reloads (see follow()).
+    """
+
+    def __init__(self, path=None, version=None):
+        self.path = path or os.getenv("TITLE_CACHE_PATH") or DEFAULT_CACHE_PATH
+        self.follows_taxonomy = version is None
+        self.version = version or taxonomy_version()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS title_cache (
+                title_hash              BLOB NOT NULL,
+                taxonomy_version        TEXT NOT NULL,
+                title_match             TEXT NOT NULL,
+                title_cleaned           TEXT NOT NULL,
+                brand                   TEXT NOT NULL,
+                product_type            TEXT NOT NULL,
+                brand_confidence        REAL NOT NULL,
+                product_type_confidence REAL NOT NULL,
+                PRIMARY KEY (title_hash, taxonomy_version)
+            ) WITHOUT ROWID
+        """)
+        purged = self.conn.execute(
+            "DELETE FROM title_cache WHERE taxonomy_version != ?", (self.version,)
+        ).rowcount
+        self.conn.commit()
+        if purged:
+            print(f"Title cache: dropped {purged} entries from an older taxonomy")
+
+    def get_many(self, keys) -> dict:
+        """Return {key: row tuple in CACHED_COLUMNS order} for the keys that are cached."""
+        cur = self.conn.cursor()
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_keys (title_hash BLOB PRIMARY KEY)")
+        cur.execute("DELETE FROM lookup_keys")
+        cur.executemany("INSERT OR IGNORE INTO lookup_keys VALUES (?)", ((k,) for k in keys))
+        cur.execute("""
+            SELECT c.title_hash, c.title_match, c.title_cleaned, c.brand, c.product_type,
+                   c.brand_confidence, c.product_type_confidence
+            FROM lookup_keys k
+            JOIN title_cache c ON c.title_hash = k.title_hash AND c.taxonomy_version = ?
+        """, (self.version,))
+        found = {row[0]: row[1:] for row in cur.fetchall()}
+        cur.close()
+        return found
+
+    def put_many(self, rows):
+        """Store (key, *CACHED_COLUMNS) tuples under the current taxonomy version."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO title_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((key, self.version, *values) for key, *values in rows),
+        )
+        self.conn.commit()
+
+    def follow(self, version: str):
+        """
+        Switch to a new taxonomy version after a reload. Only the entries of the
+        version being replaced are dropped; they can never be served again.
+        """
+        if version == self.version:
+            return
+        purged = self.conn.execute(
+            "DELETE FROM title_cache WHERE taxonomy_version = ?", (self.version,)
+        ).rowcount
+        self.conn.commit()
+        self.version = version
+        print(f"Title cache: taxonomy changed, dropped {purged} entries of the previous version")
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self):
+        self.conn.close()
+
+def normalize_and_enrich(df, cache=None, workers: int = 1, similarity: bool = False, pool=None):
+    """
+    cleaning.normalize_data + extraction.enrich_data over the distinct raw titles,
+    skipping every title already in the cache (if given) and spreading the rest
+    over `workers` processes (or the run's parallel.EnrichmentPool `pool`).
+    Without a cache or workers this is the plain pipeline.
+    `similarity` enables the TF-IDF fallback for titles left unknown.
+    """
+    workers = pool.workers if pool is not None else workers
+    if cache is None and workers <= 1:
+        return extraction.enrich_data(cleaning.normalize_data(df), similarity=similarity)
+
+    print("Normalizing & enriching data" + (" (title cache)..." if cache is not None else "..."))
+    # One taxonomy for the whole call, so cached and fresh rows agree even if a
+    # reload lands while it runs
+    compiled = extraction.active_taxonomy()
+    if cache is not None and cache.follows_taxonomy:
+        cache.follow(taxonomy_version(compiled, similarity))
+    df['name'] = df['name'].fillna("")
+    names = df['name'].tolist()
+    unique_names = list(dict.fromkeys(names))
+
+    if cache is not None:
+        keys = {name: title_key(name) for name in unique_names}
+        results = cache.get_many(keys.values())
+        missing = [name for name in unique_names if keys[name] not in results]
+        cache.hits += len(unique_names) - len(missing)
+        cache.misses += len(missing)
+    else:
+        keys = {name: name for name in unique_names}
+        results = {}
+        missing = unique_names
+
+    if missing:
+        fresh = clean_and_enrich_titles(missing, workers, compiled, similarity, pool=pool)
+        new_rows = [
+            (keys[name], *row)
+            for name, row in zip(missing, fresh[CACHED_COLUMNS].itertuples(index=False, name=None))
+        ]
+        if cache is not None:
+            cache.put_many(new_rows)
+        results.update((row[0], row[1:]) for row in new_rows)
+
+    values = [results[keys[name]] for name in names]
+    for i, col in enumerate(CACHED_COLUMNS):
+        df[col] = [v[i] for v in values]
+
+    if cache is not None:
+        print(f"Title cache: {len(unique_names) - len(missing)}/{len(unique_names)} distinct titles "
+              f"served from cache ({cache.hit_rate():.1%} hit rate this run), {len(missing)} enriched")
+    return cleaning.clean_numeric(df)
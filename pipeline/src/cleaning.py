@@ -25,24 +25,76 @@ NOISE_PATTERNS = [
     r'[\-]{2,}',  # Multiple dashes
 ]
 
+# Compiled normalizer engine.
+# The bracket tag patterns must run before anything else (removing a tag can
+# expose new matches, e.g. "ready[x]stock"), so they stay as separate passes
+# that only run when the title actually contains '[' or '('. Everything else is
+# folded into a single alternation so a typical title is cleaned in one scan.
+_BRACKET_RE = re.compile(NOISE_PATTERNS[0])
+_PAREN_RE = re.compile('|'.join(f'(?:{p})' for p in NOISE_PATTERNS[1:3]))
+
+def _scoped(pattern: str) -> str:
+    # Inline global flags are only legal at the start of a pattern, so turn
+    # "(?i)..." into a scoped "(?i:...)" group before joining.
+    if pattern.startswith('(?i)'):
+        return f'(?i:{pattern[4:]})'
+    return f'(?:{pattern})'
+
+# Characters an inline noise match can start with (first letters of the promo
+# words, the emoji set, '!' and '-'). Checking this before trying every branch
+# lets the scan skip most positions cheaply. Keep in sync with NOISE_PATTERNS.
+_INLINE_NOISE_START = '(?=(?i:[abcefgilnoprstv])|[️⭐✨🔥💯❤!\\-])'
+_INLINE_NOISE_RE = re.compile(
+    _INLINE_NOISE_START + '(?:' + '|'.join(_scoped(p) for p in NOISE_PATTERNS[3:]) + ')'
+)
+_SEQUENTIAL_NOISE_RES = [re.compile(p) for p in NOISE_PATTERNS]
+_ZERO_WIDTH = dict.fromkeys(map(ord, '\u200b\u200c\u200d\ufeff'))
+
+def _remove_noise_sequential(title: str) -> str:
+    """Reference path: one pass per pattern, exactly as the patterns are listed."""
+    cleaned = title
+    for pattern in _SEQUENTIAL_NOISE_RES:
+        cleaned = pattern.sub(' ', cleaned)
+    return ' '.join(cleaned.split())
+
+def _remove_noise_compiled(title: str) -> str:
+    # '.' does not cross newlines, which lets the per-pattern order leak into
+    # the result; those (rare) titles take the reference path.
+    if '\n' in title:
+        return _remove_noise_sequential(title)
+    if '[' in title:
+        title = _BRACKET_RE.sub(' ', title)
+    if '(' in title:
+        title = _PAREN_RE.sub(' ', title)
+    return ' '.join(_INLINE_NOISE_RE.sub(' ', title).split())
+
 def remove_noise(title: str) -> str:
     """Remove promotional tags and noise while preserving semantic content."""
     if not isinstance(title, str): return ""
-    cleaned = title
-    for pattern in NOISE_PATTERNS:
-        cleaned = re.sub(pattern, ' ', cleaned)
-    # Normalize whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-    return cleaned
+    return _remove_noise_compiled(title)
 
 def normalize_unicode(text: str) -> str:
     """Convert to NFC form, strip accents, handle special cases."""
     if not isinstance(text, str): return ""
-    # Normalize to NFC (canonical composition)
-    text = unicodedata.normalize('NFC', text)
-    # Remove zero-width characters
-    text = re.sub(r'[\u200b\u200c\u200d\ufeff]', '', text)
-    return text
+    # Pure ASCII is already NFC and cannot contain zero-width characters
+    if text.isascii():
+        return text
+    # Normalize to NFC (canonical composition), then drop zero-width characters
+    return unicodedata.normalize('NFC', text).translate(_ZERO_WIDTH)
+
+def clean_title(title) -> str:
+    """Unicode normalization + noise removal for one raw title."""
+    if not isinstance(title, str): return ""
+    if not title.isascii():
+        title = unicodedata.normalize('NFC', title).translate(_ZERO_WIDTH)
+    return _remove_noise_compiled(title)
+
+# Brand-aware casing fixes applied to the title-cased display text
+BRAND_CASING_FIXES = [
+    (r'\bMs\s+Glow\b', 'MS Glow'),
+    (r'\bGlad2glow\b', 'glad2glow'),
+]
+_BRAND_CASING_ANY = '|'.join(f'(?:{pattern})' for pattern, _ in BRAND_CASING_FIXES)
 
 def smart_case_normalize(text: str) -> tuple:
     """Return both lowercase (for matching) and display-friendly (for storage)."""
@@ -51,24 +103,42 @@ def smart_case_normalize(text: str) -> tuple:
     # For display: title case with brand-aware exceptions
     display_text = text.title()
     # Fix known brand casing issues
-    display_text = re.sub(r'\bMs\s+Glow\b', 'MS Glow', display_text, flags=re.IGNORECASE)
-    display_text = re.sub(r'\bGlad2glow\b', 'glad2glow', display_text, flags=re.IGNORECASE)
+    for pattern, replacement in BRAND_CASING_FIXES:
+        display_text = re.sub(pattern, replacement, display_text, flags=re.IGNORECASE)
     return match_text, display_text
 
+def normalize_titles(names: pd.Series) -> tuple:
+    """
+    Column-at-a-time title normalization.
+    Returns (title_match, title_cleaned) Series aligned with `names`.
+    """
+    # One Python pass for the regex cleaning, then whole-column case ops.
+    # Kept on object dtype on purpose: pyarrow's utf8_lower/utf8_title kernels
+    # disagree with str.lower/str.title on some Unicode (e.g. 'ß', ligatures).
+    cleaned = pd.Series([clean_title(t) for t in names.tolist()], index=names.index, dtype=object)
+    title_match = cleaned.str.lower()
+    title_cleaned = cleaned.str.title()
+
+    # Only rows that hit one of the fixes need the per-fix replace passes
+    needs_fix = title_cleaned.str.contains(_BRAND_CASING_ANY, case=False, regex=True)
+    if needs_fix.any():
+        fixed = title_cleaned[needs_fix]
+        for pattern, replacement in BRAND_CASING_FIXES:
+            fixed = fixed.str.replace(pattern, replacement, case=False, regex=True)
+        title_cleaned[needs_fix] = fixed
+
+    return title_match, title_cleaned
+
 def normalize_data(df):
     print("Normalizing data...")
     # Apply enhanced cleaning
     df['name'] = df['name'].fillna("")
-    df['title_cleaned_temp'] = df['name'].apply(normalize_unicode).apply(remove_noise)
-    
-    # We will split into match and display versions in extraction or just here
-    # For now, let's keep title_cleaned as the display version
-    match_and_display = df['title_cleaned_temp'].apply(smart_case_normalize)
-    df['title_match'] = match_and_display.apply(lambda x: x[0])
-    df['title_cleaned'] = match_and_display.apply(lambda x: x[1])
-    
-    # Clean numeric fields
+    # title_match is the lowercase matching version, title_cleaned the display version
+    df['title_match'], df['title_cleaned'] = normalize_titles(df['name'])
+    return clean_numeric(df)
+
+def clean_numeric(df):
+    """Coerce the numeric fields, filling unparseable values with zero."""
     df['sold_quantity'] = pd.to_numeric(df['sold_quantity'], errors='coerce').fillna(0)
     df['rating'] = pd.to_numeric(df['rating'], errors='coerce').fillna(0.0)
-    
     return df
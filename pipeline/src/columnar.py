@@ -0,0 +1,122 @@
+"""
+Typed columnar hand-off between the ETL transforms and the pipeline.
+
+The transforms' cleaned output is written with one fixed Arrow schema, so the
+pipeline reads prices, ratings and URLs back without text parsing or type
+inference. Two containers are supported, picked by file suffix:
+
+    .parquet   compressed (zstd), smallest on disk
+    .arrow     Arrow IPC file, memory-mapped on read (fastest to load)
+
+CSV stays the format for manual inspection; ingestion reads all three.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+PRODUCT_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('url', pa.string()),
+    ('image', pa.string()),
+    ('rating', pa.float32()),
+    ('sold_quantity', pa.int64()),
+    ('price_current', pa.int64()),
+    ('price_original', pa.int64()),
+    ('discount', pa.float32()),
+    ('source', pa.dictionary(pa.int8(), pa.string())),
+])
+
+SUFFIXES = ('.parquet', '.arrow')
+
+_INTEGER_COLUMNS = ('sold_quantity', 'price_current', 'price_original')
+
+def is_columnar(path) -> bool:
+    return os.path.splitext(str(path))[1].lower() in SUFFIXES
+
+def preferred_path(csv_path) -> str:
+    """
+    A typed sibling of `csv_path` (same name, .arrow or .parquet) if one is at
+    least as new as the CSV, otherwise the CSV itself.
+    """
+    base = os.path.splitext(str(csv_path))[0]
+    csv_mtime = os.path.getmtime(csv_path) if os.path.exists(csv_path) else None
+    for suffix in ('.arrow', '.parquet'):
+        path = base + suffix
+        if os.path.exists(path) and (csv_mtime is None or os.path.getmtime(path) >= csv_mtime):
+            return path
+    return str(csv_path)
+
+def _column(df, name):
+    return df[name] if name in df else pd.Series(None, index=df.index, dtype=object)
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Conform a transform's frame to PRODUCT_SCHEMA: numeric columns coerced
+    (counts and prices rounded to integers), columns outside the schema
+    dropped. Missing or unparseable values stay null, so the pipeline sees
+    them exactly as it would in the CSV (hashes, keys, NaN ratings).
+    """
+    arrays = []
+    for field in PRODUCT_SCHEMA:
+        values = _column(df, field.name)
+        if pa.types.is_dictionary(field.type) or pa.types.is_string(field.type):
+            present = values.notna()
+            text = values.astype(object).where(present, None)
+            text[present] = text[present].astype(str)
+            array = pa.array(text.to_numpy(dtype=object), pa.string())
+            arrays.append(array.dictionary_encode().cast(field.type)
+                          if pa.types.is_dictionary(field.type) else array)
+        else:
+            values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+            missing = np.isnan(values)
+            if field.name in _INTEGER_COLUMNS:
+                values = np.round(values)
+            values = np.where(missing, 0, values).astype(field.type.to_pandas_dtype())
+            arrays.append(pa.array(values, field.type, mask=missing))
+    return pa.Table.from_arrays(arrays, schema=PRODUCT_SCHEMA)
+
+def write_products(df: pd.DataFrame, path):
+    """Write cleaned products to `path` (.parquet or .arrow) with PRODUCT_SCHEMA."""
+    table = to_table(df)
+    tmp = f"{path}.tmp"
+    if str(path).endswith('.parquet'):
+        pq.write_table(table, tmp, compression='zstd')
+    else:
+        with pa.OSFile(tmp, 'wb') as sink, ipc.new_file(sink, PRODUCT_SCHEMA) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+def _check_schema(schema: pa.Schema, path):
+    missing = [f.name for f in PRODUCT_SCHEMA if f.name not in schema.names]
+    if missing:
+        raise ValueError(f"{path} is missing columns {missing}")
+
+def read_products(path) -> pd.DataFrame:
+    if str(path).endswith('.parquet'):
+        table = pq.read_table(path)
+        _check_schema(table.schema, path)
+        return table.to_pandas()
+    with pa.memory_map(str(path), 'r') as source:
+        table = ipc.open_file(source).read_all()
+        _check_schema(table.schema, path)
+        return table.to_pandas()
+
+def iter_products(path, chunksize: int):
+    """Yield DataFrames of at most `chunksize` rows without loading the whole file."""
+    if str(path).endswith('.parquet'):
+        parquet = pq.ParquetFile(path)
+        _check_schema(parquet.schema_arrow, path)
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+    with pa.memory_map(str(path), 'r') as source:
+        reader = ipc.open_file(source)
+        _check_schema(reader.schema, path)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
@@ -0,0 +1,222 @@
+"""
+Shared database access for the pipeline, the loader and the maintenance scripts.
+
+    DATABASE_URL            connection URL; pooler-only parameters are stripped once
+    DB_POOL_MAX             connections the process-wide pool may open (default 4)
+    DB_STATEMENT_TIMEOUT    per-transaction statement_timeout, e.g. "90s" or "15min"
+                            (default: the server's)
+    DB_PREPARED             on / off / auto (default): PREPARE the repeated upsert
+                            shapes once per connection. auto turns them off on the
+                            transaction pooler port (6543), where consecutive
+                            transactions can land on different server sessions.
+
+Connection setup (TCP, TLS, auth) is timed; stats() feeds the run metrics.
+"""
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs, urlencode
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+# Driver options some tools put in the URL that libpq rejects
+UNSUPPORTED_PARAMS = ('statement_cache_mode', 'default_query_exec_mode')
+
+# Supabase's transaction-mode pooler
+POOLER_PORT = 6543
+
+DEFAULT_POOL_MAX = 4
+
+def sanitize_url(db_url: str) -> str:
+    """DATABASE_URL without the query parameters libpq does not understand."""
+    if db_url and '?' in db_url:
+        parsed = urlparse(db_url)
+        query_params = parse_qs(parsed.query)
+        for param in UNSUPPORTED_PARAMS:
+            query_params.pop(param, None)
+        new_query = urlencode(query_params, doseq=True)
+        db_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+        if new_query:
+            db_url += f"?{new_query}"
+    return db_url
+
+def prepared_allowed(db_url: str) -> bool:
+    setting = os.getenv("DB_PREPARED", "auto").lower()
+    if setting in ("on", "off"):
+        return setting == "on"
+    return urlparse(db_url).port != POOLER_PORT
+
+class Connection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which Statements it has PREPAREd."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_prepared = False
+        self.prepared = set()
+
+CAST = re.compile(r"(::[A-Za-z0-9_]+(\[\])?)?")
+
+class Statement:
+    """
+    A query shape executed many times (written with %s placeholders, each
+    cast to its type). On connections that allow it, it is PREPAREd once and
+    then run with EXECUTE, so the server parses and plans it once per connection.
+    """
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        parts = sql.split('%s')
+        self.n_params = len(parts) - 1
+        self.prepare_sql = f"PREPARE {name} AS " + "".join(
+            part + (f"${i + 1}" if i < self.n_params else "") for i, part in enumerate(parts))
+        # EXECUTE arguments keep the casts (an ARRAY['...'] literal is text[], not uuid[])
+        casts = [CAST.match(part).group(0) for part in parts[1:]]
+        self.execute_sql = f"EXECUTE {name}" + (
+            f" ({', '.join('%s' + cast for cast in casts)})" if self.n_params else "")
+
+    def execute(self, cur, params=()):
+        conn = cur.connection
+        if not getattr(conn, 'use_prepared', False):
+            cur.execute(self.sql, params or None)
+            return
+        if self.name not in conn.prepared:
+            # PREPARE outlives a rollback, so it is only done once per session
+            cur.execute(self.prepare_sql)
+            conn.prepared.add(self.name)
+        cur.execute(self.execute_sql, params or None)
+
+class _TimedPool(ThreadedConnectionPool):
+    def __init__(self, database, maxconn, *args, **kwargs):
+        self.database = database
+        # Nothing is opened up front; up to maxconn idle connections are kept
+        super().__init__(0, maxconn, *args, **kwargs)
+        self.minconn = maxconn
+
+    def _connect(self, key=None):
+        start = time.perf_counter()
+        conn = super()._connect(key)
+        self.database._opened(conn, time.perf_counter() - start)
+        return conn
+
+class Database:
+    """
+    Lazily opened connection pool for one DATABASE_URL. transaction() hands out
+    a cursor inside a transaction that is committed (or rolled back) and whose
+    connection goes back to the pool.
+    """
+
+    def __init__(self, db_url=None, maxconn=None, statement_timeout=None, prepared=None):
+        self.url = sanitize_url(db_url or os.getenv("DATABASE_URL"))
+        self.maxconn = maxconn or int(os.getenv("DB_POOL_MAX", DEFAULT_POOL_MAX))
+        self.statement_timeout = statement_timeout or os.getenv("DB_STATEMENT_TIMEOUT") or None
+        self.prepared = prepared_allowed(self.url) if prepared is None else prepared
+        self.connections = 0
+        self.connect_seconds = 0.0
+        self.transactions = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _opened(self, conn, seconds):
+        conn.use_prepared = self.prepared
+        with self._lock:
+            self.connections += 1
+            self.connect_seconds += seconds
+
+    def connect(self) -> Connection:
+        """A connection outside the pool (the caller closes it); setup time is still counted."""
+        start = time.perf_counter()
+        conn = psycopg2.connect(self.url, connection_factory=Connection)
+        self._opened(conn, time.perf_counter() - start)
+        return conn
+
+    @property
+    def pool(self) -> ThreadedConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                self._pool = _TimedPool(self, self.maxconn, self.url, connection_factory=Connection)
+            return self._pool
+
+    @contextmanager
+    def transaction(self, statement_timeout=None):
+        """
+        Cursor in a pooled connection's transaction, committed on success and
+        rolled back on error. `statement_timeout` (or DB_STATEMENT_TIMEOUT)
+        applies to this transaction only.
+        """
+        pool = self.pool
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                timeout = statement_timeout or self.statement_timeout
+                if timeout:
+                    cur.execute("SET LOCAL statement_timeout = %s", (str(timeout),))
+                yield cur
+            conn.commit()
+        except BaseException:
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self._release(pool, conn, broken)
+            raise
+        self._release(pool, conn, False)
+
+    def _release(self, pool, conn, broken):
+        with self._lock:
+            self.transactions += 1
+        # A lost connection is dropped; the next getconn() opens a new one
+        pool.putconn(conn, close=broken)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'connections': self.connections, 'connect_seconds': self.connect_seconds,
+                    'transactions': self.transactions}
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+
+_DATABASE = None
+_DATABASE_LOCK = threading.Lock()
+
+def get_database() -> Database:
+    """The process-wide Database for DATABASE_URL (rebuilt if the URL changes)."""
+    global _DATABASE
+    url = sanitize_url(os.getenv("DATABASE_URL"))
+    with _DATABASE_LOCK:
+        if _DATABASE is None or _DATABASE.url != url:
+            if _DATABASE is not None:
+                _DATABASE.close()
+            _DATABASE = Database(url)
+        return _DATABASE
+
+def connect() -> Connection:
+    """A standalone connection to DATABASE_URL for scripts and migrations."""
+    return get_database().connect()
+
+def close_database():
+    global _DATABASE
+    with _DATABASE_LOCK:
+        if _DATABASE is not None:
+            _DATABASE.close()
+        _DATABASE = None
+
+def report():
+    """Print the connection metrics of the process-wide Database, if one was used."""
+    if _DATABASE is None:
+        return
+    stats = _DATABASE.stats()
+    if not stats['connections']:
+        return
+    print(f"Database: {stats['connections']} connection(s) opened in {stats['connect_seconds']:.2f}s "
+          f"for {stats['transactions']} transaction(s)"
+          + (" (prepared statements)" if _DATABASE.prepared else ""))
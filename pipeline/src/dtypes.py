@@ -0,0 +1,99 @@
+"""
+Dtype policy for the pipeline's DataFrames, applied after ingestion and again
+after enrichment, plus per-stage memory reporting.
+
+    text (titles, URLs, image links, keys)   pyarrow-backed strings
+    source, brand, product_type              categoricals (low cardinality)
+    sold_quantity, prices                    smallest integer dtype that holds them
+    rating, discount, confidences            float32
+
+Float32 values carry representation noise (4.45 -> 4.4499998); anything that
+writes them out goes through to_decimal() first.
+"""
+import numpy as np
+import pandas as pd
+
+STRING_COLUMNS = ('name', 'url', 'image', 'content_hash', 'product_key', 'title_match', 'title_cleaned')
+CATEGORY_COLUMNS = ('source', 'brand', 'product_type')
+INTEGER_COLUMNS = ('sold_quantity', 'price_current', 'price_original')
+FLOAT32_COLUMNS = ('rating', 'discount', 'brand_confidence', 'product_type_confidence')
+
+# Columns the stages after ingestion read; anything else a transform wrote is dropped
+PIPELINE_COLUMNS = ('name', 'url', 'image', 'rating', 'sold_quantity', 'price_current', 'price_original',
+                    'discount', 'source', 'content_hash', 'product_key')
+
+# float32 has ~7 significant digits; every stored column has at most 4 decimals
+FLOAT32_DECIMALS = 6
+
+def string_dtype():
+    """Arrow-backed strings with NaN for missing values (what read_csv gives on pandas 3)."""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        # pandas 2.1 / 2.2 spell the NaN-semantics variant as a storage name
+        return pd.StringDtype("pyarrow_numpy")
+
+def apply_policy(df: pd.DataFrame, drop=()) -> pd.DataFrame:
+    """
+    Convert the policy columns present in `df` (others are left alone) and drop
+    the `drop` columns. Numeric columns are only downcast when they are already
+    numeric, so unparseable values still fail where they did before.
+    """
+    df = df.drop(columns=[c for c in drop if c in df])
+    strings = string_dtype()
+    for col in STRING_COLUMNS:
+        if col in df and df[col].dtype != strings:
+            df[col] = df[col].astype(strings)
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in INTEGER_COLUMNS:
+        if col in df and pd.api.types.is_numeric_dtype(df[col]):
+            # Stays float64 if any value is missing or fractional
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in FLOAT32_COLUMNS:
+        if col in df and pd.api.types.is_numeric_dtype(df[col]) and df[col].dtype != np.float32:
+            df[col] = df[col].astype(np.float32)
+    return df
+
+def ingested(df: pd.DataFrame) -> pd.DataFrame:
+    """Policy for freshly ingested rows: only PIPELINE_COLUMNS are kept."""
+    return apply_policy(df, drop=[c for c in df.columns if c not in PIPELINE_COLUMNS])
+
+def enriched(df: pd.DataFrame, keep_match_titles: bool = False) -> pd.DataFrame:
+    """
+    Policy after cleaning / enrichment / label propagation. title_match has been
+    consumed by then unless something still reads it (e.g. the label index).
+    """
+    return apply_policy(df, drop=() if keep_match_titles else ('title_match',))
+
+def to_decimal(value) -> float:
+    """A float32 (or any) number as the float its decimal source meant."""
+    return round(float(value), FLOAT32_DECIMALS)
+
+class MemoryReport:
+    """
+    Prints DataFrame.memory_usage(deep=True) per pipeline stage and keeps the
+    peak seen for each stage (streaming runs record every chunk).
+    """
+
+    def __init__(self, verbose: bool = True):
+        self.verbose = verbose
+        self.peaks = {}
+
+    def record(self, stage: str, df: pd.DataFrame) -> int:
+        nbytes = int(df.memory_usage(deep=True).sum())
+        rows = len(df)
+        if nbytes > self.peaks.get(stage, (0, 0))[1]:
+            self.peaks[stage] = (rows, nbytes)
+        if self.verbose:
+            print(f"Memory [{stage}]: {nbytes / 2**20:.1f} MiB for {rows} rows "
+                  f"({nbytes / max(rows, 1):.0f} B/row)")
+        return nbytes
+
+    def summary(self):
+        if not self.peaks:
+            return
+        print("Peak DataFrame memory per stage:")
+        for stage, (rows, nbytes) in self.peaks.items():
+            print(f"  {stage:<10} {nbytes / 2**20:8.1f} MiB ({rows} rows)")
@@ -1,217 +1,196 @@
+from typing import NamedTuple
 
-import re
-from thefuzz import fuzz
-
-# Expanded dictionary with common variants from Phase 2.1
-BRAND_DICTIONARY = {
-    "wardah": ["wardah", "warda", "wardha"],
-    "somethinc": ["somethinc", "something", "somethin"],
-    "scarlett": ["scarlett", "scarlet", "scarlette"],
-    "ms glow": ["ms glow", "msg low", "msglow", "ms-glow"],
-    "avoskin": ["avoskin", "avo skin"],
-    "emina": ["emina", "eminna"],
-    "skintific": ["skintific", "skintifik", "skintifick"],
-    "whitelab": ["whitelab", "white lab", "whitelabs"],
-    "azarine": ["azarine", "azarin"],
-    "npure": ["npure", "n pure", "n-pure"],
-    "ponds": ["ponds", "pond's", "pond"],
-    "garnier": ["garnier", "garner"],
-    "nivea": ["nivea", "niveia"],
-    "vaseline": ["vaseline", "vaselin"],
-    "biore": ["biore", "bioré"],
-    "hadalabo": ["hadalabo", "hada labo", "hada-labo"],
-    "implora": ["implora", "impora"],
-    "viva": ["viva"],
-    "glad2glow": ["glad2glow", "glow&be", "glowbe", "glad to glow"],
-    "purbasari": ["purbasari", "purba sari"],
-    "hanasui": ["hanasui", "hana sui"],
-    "omg": ["omg", "o.m.g"],
-    "skin1004": ["skin1004", "skin 1004"],
-    "pixy": ["pixy", "pixie"],
-    "brasov": ["brasov"],
-    "misonells": ["misonells"],
-    "posh": ["posh"],
-    "pinkflash": ["pinkflash", "pink flash"],
-    "glowsophy": ["glowsophy"],
-    "madame gie": ["madame gie", "madamegie", "mme gie"],
-    "fyc": ["fyc", "f.y.c"],
-    "sweety": ["sweety"],
-    "facetology": ["facetology", "face tology"],
-    "scora": ["scora", "scoora"],
-    "nuface": ["nuface", "nu face"],
-    "make over": ["make over", "makeover"],
-    "dear me beauty": ["dear me beauty", "dear me"],
-    "kahf": ["kahf"],
-    "the originote": ["the originote", "originote"],
-    "you": ["you"],
-    "polynia": ["polynia"],
-    "lumiwhite": ["lumiwhite", "lumi white"],
-    "aftermyskin": ["aftermyskin"],
-    "drkkot": ["drkkot"],
-    "endzibeauty": ["endzibeauty"],
-    "milanstory": ["milanstory"],
-    "morris": ["morris"],
-    "perfectwhite": ["perfectwhite"],
-    "premiumplus": ["premiumplus"],
-    "signaturebykamila": ["signaturebykamila"],
-    "timephoria": ["timephoria"],
-    "verile": ["verile"],
-    "closeup": ["closeup"],
-    "glamersbeauty": ["glamersbeauty"],
-    "maryame": ["maryame"],
-    "nutrishe": ["nutrishe"],
-}
-
-# Enhanced taxonomy with priority weighting
-PRODUCT_TYPES = {
-    "body_care": {
-        "keywords": ["beli", "body", "body lotion", "body serum", "body wash", "deodoran", "hand body", "lulur", "sabun", "scrub", "soap"],
-        "priority": 3
-    },
-    "pampers": {
-        "keywords": ["jumbo"],
-        "priority": 2
-    },
-    "pasta gigi": {
-        "keywords": ["pasta gigi", "pascagigi", "pepsodent", "closeup"],
-        "priority": 0
-    },
-    "serum": {
-        "keywords": ["ampoule", "blood", "brightening", "essence", "hadiah", "halal", "maryame", "niacinamide", "peeling", "peeling solution", "sabun", "serum", "signature", "spesial", "whitening"],
-        "priority": 1
-    },
-    "toner": {
-        "keywords": ["toner", "fresh", "face mist", "air mawar", "micellar water"],
-        "priority": 1
-    },
-    "moisturizer": {
-        "keywords": ["moisturizer", "day cream", "night cream", "gel", "cream", "pelembab", "moisturizing", "medikon", "tasya"],
-        "priority": 2
-    },
-    "sunscreen": {
-        "keywords": ["sunscreen", "uv", "sunblock", "spf", "pa+++", "sun protect"],
-        "priority": 1
-    },
-    "cleanser": {
-        "keywords": ["cleanser", "facial wash", "face wash", "sabun muka", "micellar", "facial foam", "cleansing", "facial"],
-        "priority": 1
-    },
-    "mask": {
-        "keywords": ["mask", "sheet mask", "clay mask", "peel off", "masker"],
-        "priority": 1
-    },
-    "lip_products": {
-        "keywords": ["lip", "matte", "tint", "lipstick", "lip cream", "lip gloss", "lip stain", "lip balm", "stick", "timephoria"],
-        "priority": 1
-    },
-    "perfume": {
-        "keywords": ["parfum", "body mist", "fragrance", "eau de parfum", "cologne", "perfume", "morris"],
-        "priority": 1
-    },
-    "hair_care": {
-        "keywords": ["rambut", "hair", "shampoo", "conditioner", "hair serum", "hair mask"],
-        "priority": 2
-    },
-    "makeup": {
-        "keywords": ["blush", "bulu mata palsu", "compact", "cushion", "eyeliner", "eyeshadow", "foundation", "implora", "langsung", "mascara", "powder"],
-        "priority": 1
-    },
-    "tools": {
-        "keywords": ["alat", "applicator", "brush", "kuas", "sarung tangan", "sisir", "tools"],
-        "priority": 3
-    },
-    "nails": {
-        "keywords": ["nail", "kuku", "nail polish", "kutek"],
-        "priority": 1
-    },
-}
-
-# Blocklist for non-skincare product indicators
-NON_SKINCARE_KEYWORDS = [
-    "popok", "diaper", "pampers",
-    "softlens", "contact lens",
-    "sikat gigi", "toothbrush", "pasta gigi",
-    "hair dryer", "pengering rambut", "catok",
-    "tato", "tattoo",
-]
+import numpy as np
+import pandas as pd
+
+from . import taxonomy, tokens
+from .automaton import NO_MATCH
+
+# Brand aliases, product type keywords and the non-skincare blocklist are data:
+# see taxonomy/taxonomy.json (updated by train_logic.py) and src/taxonomy.py.
+# The matchers come prebuilt from the compiled taxonomy artifact.
+_TAXONOMY = taxonomy.load()
+
+BRAND_DICTIONARY = _TAXONOMY.brands
+PRODUCT_TYPES = _TAXONOMY.product_types
+NON_SKINCARE_KEYWORDS = _TAXONOMY.non_skincare_keywords
+
+_BRAND, _TYPE, _BLOCK = taxonomy.BRAND, taxonomy.TYPE, taxonomy.BLOCK
+
+# Highest confidence for a label taken from similar text (the similarity
+# fallback, the label index), so it never outranks a dictionary or fuzzy hit
+MAX_SIMILAR_CONFIDENCE = 0.85
+
+def active_taxonomy() -> taxonomy.CompiledTaxonomy:
+    return _TAXONOMY
+
+def activate(compiled: taxonomy.CompiledTaxonomy):
+    """
+    Make `compiled` the taxonomy for every later call. The swap is a single
+    reference assignment: a call already in progress (or a batch that took its
+    snapshot) finishes on the taxonomy it started with.
+    """
+    global _TAXONOMY, BRAND_DICTIONARY, PRODUCT_TYPES, NON_SKINCARE_KEYWORDS
+    BRAND_DICTIONARY = compiled.brands
+    PRODUCT_TYPES = compiled.product_types
+    NON_SKINCARE_KEYWORDS = compiled.non_skincare_keywords
+    _TAXONOMY = compiled
+
+def watch_taxonomy(interval: float = taxonomy.WATCH_INTERVAL, **kwargs) -> taxonomy.TaxonomyWatcher:
+    """Start a background watcher that activates each new taxonomy version as it is saved."""
+    watcher = taxonomy.TaxonomyWatcher(activate, current=_TAXONOMY.digest, interval=interval,
+                                       active=active_taxonomy, **kwargs)
+    watcher.start()
+    return watcher
+
+def _resolve_brand(compiled, brand_rank: int, title_lower: str, threshold: float) -> tuple:
+    # 1. Exact alias match (rank from the automaton scan)
+    if brand_rank != NO_MATCH:
+        return compiled.brand_names[brand_rank], 0.95, "dictionary_exact"
+
+    # 2. Fuzzy match on tokens
+    hit = compiled.fuzzy_index(threshold).match(title_lower.split())
+    if hit is not None:
+        alias_id, ratio = hit
+        return compiled.fuzzy_alias_brands[alias_id], ratio / 100.0, "dictionary_fuzzy"
+
+    return "unknown", 0.0, "none"
+
+def _resolve_type(compiled, type_rank: int) -> tuple:
+    if type_rank == NO_MATCH:
+        return "unknown", 0.0, "none"
+    return compiled.type_categories[type_rank], compiled.type_confidences[type_rank], "keyword_rule"
 
 def is_non_skincare(title_lower: str) -> bool:
     """Return True if title likely describes a non-skincare product."""
-    for keyword in NON_SKINCARE_KEYWORDS:
-        if keyword in title_lower:
-            return True
-    return False
+    return _TAXONOMY.classifier.min_ranks(title_lower)[_BLOCK] != NO_MATCH
 
 def extract_brand(title_lower: str, threshold: float = 85.0) -> tuple:
     """Hybrid Layer 1: Dictionary + Fuzzy match."""
-    # 1. Exact alias match
-    for canonical, aliases in BRAND_DICTIONARY.items():
-        for alias in aliases:
-            if alias in title_lower:
-                return canonical, 0.95, "dictionary_exact"
-    
-    # 2. Fuzzy match on tokens
-    tokens = title_lower.split()
-    for canonical, aliases in BRAND_DICTIONARY.items():
-        for alias in aliases:
-            for token in tokens:
-                ratio = fuzz.ratio(alias, token)
-                if ratio >= threshold:
-                    return canonical, ratio / 100.0, "dictionary_fuzzy"
-                    
-    return "unknown", 0.0, "none"
+    compiled = _TAXONOMY
+    return _resolve_brand(compiled, compiled.classifier.min_ranks(title_lower)[_BRAND], title_lower, threshold)
 
 def extract_product_type(title_lower: str) -> tuple:
     """Rule-based keyword matching with priority weighting."""
-    matches = []
-    for category, config in PRODUCT_TYPES.items():
-        for keyword in config["keywords"]:
-            if keyword in title_lower:
-                matches.append({
-                    "category": category,
-                    "priority": config["priority"],
-                    "keyword": keyword
-                })
-    
-    if not matches:
-        return "unknown", 0.0, "none"
-        
-    # Sort by priority then keyword length
-    matches.sort(key=lambda x: (x["priority"], -len(x["keyword"])))
-    best_match = matches[0]
-    confidence = 0.90 if best_match["priority"] == 1 else 0.75
-    
-    return best_match["category"], confidence, "keyword_rule"
-
-def enrich_data(df):
+    compiled = _TAXONOMY
+    return _resolve_type(compiled, compiled.classifier.min_ranks(title_lower)[_TYPE])
+
+def classify(title_lower: str, threshold: float = 85.0, compiled=None) -> tuple:
+    """
+    Brand, product type and blocklist flag from one scan of the title.
+    Returns ((brand, conf, method), (type, conf, method), non_skincare).
+    Blocklisted titles skip the fuzzy brand layer: they are dropped downstream
+    unless an exact alias already identifies the brand.
+    `compiled` pins a taxonomy; by default the active one is used.
+    """
+    compiled = compiled or _TAXONOMY
+    brand_rank, type_rank, block_rank = compiled.classifier.min_ranks(title_lower)
+    non_skincare = block_rank != NO_MATCH
+    if non_skincare and brand_rank == NO_MATCH:
+        brand = ("unknown", 0.0, "blocklist")
+    else:
+        brand = _resolve_brand(compiled, brand_rank, title_lower, threshold)
+    return brand, _resolve_type(compiled, type_rank), non_skincare
+
+class EnrichmentResult(NamedTuple):
+    """Columnar enrichment output, one entry per input title."""
+    brand: np.ndarray                    # object (str)
+    product_type: np.ndarray             # object (str)
+    brand_confidence: np.ndarray         # float64
+    product_type_confidence: np.ndarray  # float64
+    non_skincare: np.ndarray             # bool
+
+def _apply_similarity(compiled, tokenized, brands, b_confs, types, t_confs, blocked) -> tuple:
+    """
+    Layer 3: TF-IDF similarity for the titles the dictionary and fuzzy layers
+    left unknown (blocklisted titles excluded), windowed over the batch tokens.
+    Fills the arrays in place and returns how many brands and types it resolved.
+    """
+    fallback = compiled.similarity()
+    resolved = []
+    for index, labels, confs in ((fallback.brands, brands, b_confs), (fallback.types, types, t_confs)):
+        rows = np.flatnonzero((labels == "unknown") & ~blocked)
+        found, scores = index.best([tokenized.tokens(i) for i in rows]) if len(rows) else (labels[rows], confs[rows])
+        hit = found != "unknown"
+        labels[rows[hit]] = found[hit]
+        confs[rows[hit]] = np.minimum(scores[hit], fallback.max_confidence)
+        resolved.append(int(hit.sum()))
+    return tuple(resolved)
+
+def _classify_tokens(compiled, tokenized, titles, threshold: float) -> tuple:
+    """
+    classify() for a whole tokenized batch: the dictionary channels come from
+    one pass over the distinct tokens, the fuzzy layer looks up each distinct
+    token once, and labels are resolved with array lookups.
+    Returns (brands, brand confs, types, type confs, blocked).
+    """
+    n = len(tokenized)
+    ranks = compiled.token_matcher.min_ranks(tokenized)
+    # Titles that are not single-space joined tokens keep the exact string scan
+    for i in np.flatnonzero(~tokenized.canonical):
+        ranks[i] = compiled.classifier.min_ranks(titles[i])
+    brand_rank, type_rank, block_rank = ranks[:, _BRAND], ranks[:, _TYPE], ranks[:, _BLOCK]
+    blocked = block_rank != NO_MATCH
+
+    brands = np.full(n, "unknown", dtype=object)
+    b_confs = np.zeros(n, dtype=np.float64)
+    exact = brand_rank != NO_MATCH
+    brands[exact] = np.asarray(compiled.brand_names, dtype=object)[brand_rank[exact]]
+    b_confs[exact] = 0.95
+
+    # Blocklisted titles skip the fuzzy layer (see classify)
+    rows = np.flatnonzero(~exact & ~blocked)
+    alias_ids, ratios = compiled.fuzzy_index(threshold).match_batch(tokenized, rows)
+    hit = alias_ids >= 0
+    brands[rows[hit]] = np.asarray(compiled.fuzzy_alias_brands, dtype=object)[alias_ids[hit]]
+    b_confs[rows[hit]] = ratios[hit] / 100.0
+
+    types = np.full(n, "unknown", dtype=object)
+    t_confs = np.zeros(n, dtype=np.float64)
+    known = type_rank != NO_MATCH
+    types[known] = np.asarray(compiled.type_categories, dtype=object)[type_rank[known]]
+    t_confs[known] = np.asarray(compiled.type_confidences, dtype=np.float64)[type_rank[known]]
+    return brands, b_confs, types, t_confs, blocked
+
+def enrich_batch(titles, threshold: float = 85.0, verbose: bool = False, compiled=None,
+                 similarity: bool = False) -> EnrichmentResult:
+    """
+    Classify a batch of lowercase match titles (list, NumPy/Arrow array or Series).
+    Identical titles (same listing across sessions, resellers, URL variants) are
+    classified once and the results broadcast back by index. The distinct titles
+    are tokenized once (src.tokens) and every layer works on those tokens. The whole batch is
+    classified under one taxonomy, even if a reload lands halfway through.
+    With `similarity`, titles still unknown after the dictionary and fuzzy layers
+    go through the TF-IDF fallback (src.similarity) in one batch.
+    """
+    compiled = compiled or _TAXONOMY
+    if not isinstance(titles, pd.Series):
+        titles = np.asarray(titles, dtype=object)
+    codes, unique_titles = pd.factorize(titles, use_na_sentinel=False)
+    n_rows, n_unique = len(codes), len(unique_titles)
+
+    tokenized = tokens.tokenize(unique_titles)
+    brands, b_confs, types, t_confs, blocked = _classify_tokens(compiled, tokenized, unique_titles, threshold)
+
+    if similarity and n_unique:
+        n_brands, n_types = _apply_similarity(compiled, tokenized, brands, b_confs, types, t_confs, blocked)
+        if verbose:
+            print(f"Similarity fallback resolved {n_brands} brands and {n_types} product types")
+
+    if verbose and n_rows:
+        print(f"Classified {n_unique} distinct titles for {n_rows} rows "
+              f"(duplication ratio {1 - n_unique / n_rows:.1%})")
+        if blocked.any():
+            print(f"{int(blocked.sum())} distinct titles matched the non-skincare blocklist "
+                  f"(fuzzy brand search skipped)")
+
+    return EnrichmentResult(brands[codes], types[codes], b_confs[codes], t_confs[codes], blocked[codes])
+
+def enrich_data(df, similarity: bool = False):
     print("Enriching data (Brand & Product Type)...")
-    
-    brands = []
-    types = []
-    b_confs = []
-    t_confs = []
-    
-    for idx, row in df.iterrows():
-        title = row['title_match']
-        
-        # Override for specific non-skincare items if needed, 
-        # or just let extract_product_type handle high priority categories
-        
-        b, b_conf, _ = extract_brand(title)
-        t, t_conf, _ = extract_product_type(title)
-        
-        # If it's a known non-skincare type, we keep the classification 
-        # but the loader will still decide whether to skip it or not 
-        # (currently it skips 'unknown' based on the logic we just wrote)
-        
-        brands.append(b)
-        types.append(t)
-        b_confs.append(b_conf)
-        t_confs.append(t_conf)
-        
-    df['brand'] = brands
-    df['product_type'] = types
-    df['brand_confidence'] = b_confs
-    df['product_type_confidence'] = t_confs
-    
+    result = enrich_batch(df['title_match'], verbose=True, similarity=similarity)
+    df['brand'] = result.brand
+    df['product_type'] = result.product_type
+    df['brand_confidence'] = result.brand_confidence
+    df['product_type_confidence'] = result.product_type_confidence
     return df
@@ -0,0 +1,219 @@
+"""
+Candidate-indexed fuzzy alias matching.
+
+Reproduces the old fuzzy layer of extract_brand exactly: the first
+(brand, alias, token) triple in dictionary/title order whose thefuzz
+`fuzz.ratio` reaches the threshold. Instead of scoring every alias against
+every token, each distinct token is checked once against the few aliases that
+can possibly reach the threshold:
+
+  * length filter   - Indel distance is at least |len(a) - len(t)|
+  * bigram filter   - an Indel distance of d destroys at most 2*d bigrams, so a
+                      passing pair shares at least max(len) - 1 - 2*d bigrams
+  * bounded scoring - rapidfuzz's ratio with a score_cutoff, in alias order,
+                      stopping at the first alias that passes
+
+The bigram postings are flat integer arrays (see ARRAYS), so a compiled
+taxonomy artifact can store them and a loaded index reads them from the mapping.
+"""
+from collections import Counter, defaultdict
+
+import numpy as np
+from rapidfuzz.fuzz import ratio as bounded_ratio
+
+# Distinct tokens remembered per index before the memo is reset
+MEMO_LIMIT = 500_000
+# Token positions per title that match_batch can order (alias id * POSITIONS + position)
+POSITIONS = 1 << 20
+
+# gram_keys (sorted, see _gram_key); gram_offsets[g]:gram_offsets[g + 1] are that
+# bigram's (alias id, count) postings in posting_aliases / posting_counts
+ARRAYS = ('gram_keys', 'gram_offsets', 'posting_aliases', 'posting_counts')
+
+def _bigrams(text: str) -> Counter:
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+def _gram_key(gram: str) -> int:
+    # Code points are below 2**21
+    return ord(gram[0]) << 21 | ord(gram[1])
+
+class FuzzyAliasIndex:
+    def __init__(self, aliases, threshold: float = 85.0, arrays: dict = None):
+        """
+        aliases: alias strings in precedence order (brand order, then alias order).
+        arrays: this alias list's postings from arrays() (any threshold), instead of rebuilding them.
+        """
+        self.aliases = list(aliases)
+        self.threshold = threshold
+        # thefuzz rounds the score; anything below threshold - 1 can never round up to it
+        self._cutoff = max(threshold - 1, 0)
+
+        self._by_length = defaultdict(list)
+        for alias_id, alias in enumerate(self.aliases):
+            self._by_length[len(alias)].append(alias_id)
+        if arrays is None:
+            arrays = self._build_postings()
+        self._attach(arrays)
+
+        self._plans = {}
+        self._first_hit = {}
+
+    def _build_postings(self) -> dict:
+        gram_index = defaultdict(list)
+        for alias_id, alias in enumerate(self.aliases):
+            for gram, count in _bigrams(alias).items():
+                gram_index[_gram_key(gram)].append((alias_id, count))
+        keys = sorted(gram_index)
+        postings = [p for key in keys for p in gram_index[key]]
+        return {
+            'gram_keys': np.array(keys, dtype=np.int64),
+            'gram_offsets': np.cumsum([0] + [len(gram_index[key]) for key in keys], dtype=np.int32),
+            'posting_aliases': np.array([a for a, _ in postings], dtype=np.int32),
+            'posting_counts': np.array([c for _, c in postings], dtype=np.int32),
+        }
+
+    def _attach(self, arrays):
+        keys, offsets, posting_aliases, posting_counts = (arrays[name] for name in ARRAYS)
+        # Arrays read from a file are checked once here, so lookups stay in range
+        if (offsets.shape != (len(keys) + 1,) or offsets[0] != 0
+                or offsets[-1] != len(posting_aliases) or len(posting_counts) != len(posting_aliases)
+                or np.any(np.diff(offsets) < 0) or np.any(np.diff(keys) <= 0)
+                or (len(posting_aliases) and (posting_aliases.min() < 0
+                                              or posting_aliases.max() >= len(self.aliases)))):
+            raise ValueError("malformed fuzzy index arrays")
+        self._arrays = dict(zip(ARRAYS, (keys, offsets, posting_aliases, posting_counts)))
+        # Postings of the bigrams looked up so far, as [(alias id, count)]
+        self._gram_index = {}
+
+    def arrays(self) -> dict:
+        return dict(self._arrays)
+
+    def __getstate__(self):
+        # Length plans are worth shipping to worker processes; the token memo is not
+        state = self.__dict__.copy()
+        state['_first_hit'] = {}
+        return state
+
+    def _postings(self, gram: str):
+        postings = self._gram_index.get(gram)
+        if postings is None:
+            arrays = self._arrays
+            keys = arrays['gram_keys']
+            i = int(np.searchsorted(keys, _gram_key(gram)))
+            if i == len(keys) or keys[i] != _gram_key(gram):
+                return ()  # not an alias bigram; not remembered, tokens bring any number of these
+            lo, hi = int(arrays['gram_offsets'][i]), int(arrays['gram_offsets'][i + 1])
+            postings = self._gram_index[gram] = list(zip(arrays['posting_aliases'][lo:hi].tolist(),
+                                                         arrays['posting_counts'][lo:hi].tolist()))
+        return postings
+
+    def _max_distance(self, la: int, lt: int) -> int:
+        # ratio = 100 * (la + lt - d) / (la + lt) must stay >= the cutoff
+        return int((la + lt) * (100 - self._cutoff) / 100 + 1e-9)
+
+    def _plan(self, lt: int):
+        """For a token length: aliases that need no bigram check, and bigram minimums for the rest."""
+        plan = self._plans.get(lt)
+        if plan is None:
+            always, need = [], {}
+            for la, alias_ids in self._by_length.items():
+                d = self._max_distance(la, lt)
+                if abs(la - lt) > d:
+                    continue
+                min_common = max(la, lt) - 1 - 2 * d
+                if min_common <= 0:
+                    always.extend(alias_ids)
+                else:
+                    for alias_id in alias_ids:
+                        need[alias_id] = min_common
+            plan = self._plans[lt] = (always, need)
+        return plan
+
+    def candidates(self, token: str) -> list:
+        """Alias ids (in precedence order) that survive the length and bigram filters."""
+        always, need = self._plan(len(token))
+        found = set(always)
+        if need:
+            common = defaultdict(int)
+            for gram, count in _bigrams(token).items():
+                for alias_id, alias_count in self._postings(gram):
+                    if alias_id in need:
+                        common[alias_id] += min(count, alias_count)
+            found.update(alias_id for alias_id, shared in common.items() if shared >= need[alias_id])
+        return sorted(found)
+
+    def first_hit(self, token: str):
+        """(alias id, thefuzz ratio) of the first alias reaching the threshold, or None. Memoized per token."""
+        if token in self._first_hit:
+            return self._first_hit[token]
+        hit = None
+        for alias_id in self.candidates(token):
+            score = bounded_ratio(self.aliases[alias_id], token, score_cutoff=self._cutoff)
+            # Below the cutoff rapidfuzz returns 0, which never reaches the threshold
+            if int(round(score)) >= self.threshold:
+                hit = (alias_id, int(round(score)))
+                break
+        if len(self._first_hit) >= MEMO_LIMIT:
+            self._first_hit.clear()
+        self._first_hit[token] = hit
+        return hit
+
+    def seen_tokens(self) -> list:
+        """Tokens currently in the memo (a snapshot; safe while another thread matches)."""
+        return list(self._first_hit)
+
+    def warm(self, tokens):
+        """Memoize first_hit for `tokens` ahead of the batches that will bring them."""
+        for token in tokens:
+            self.first_hit(token)
+
+    def match(self, tokens):
+        """Best (alias id, ratio) over the tokens: lowest alias id, earliest token on ties."""
+        best = None
+        for token in tokens:
+            hit = self.first_hit(token)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+                if best[0] == 0:
+                    break
+        return best
+
+    def match_batch(self, tokenized, rows):
+        """
+        match() for titles `rows` of a tokens.TokenizedTitles batch. Each
+        distinct token is looked up once. Returns (alias ids, ratios) aligned
+        with `rows`; alias id -1 where no token reaches the threshold.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        alias_ids = np.full(len(rows), -1, dtype=np.int64)
+        ratios = np.zeros(len(rows), dtype=np.int64)
+        starts = tokenized.offsets[rows]
+        counts = tokenized.offsets[rows + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            return alias_ids, ratios
+
+        # Token positions of the selected titles, grouped by title
+        first = np.cumsum(counts) - counts
+        local = np.arange(total) - np.repeat(first, counts)
+        positions = np.repeat(starts, counts) + local
+        token_ids = tokenized.ids[positions]
+
+        distinct = np.unique(token_ids)
+        hit_alias = np.full(len(tokenized.vocab), len(self.aliases), dtype=np.int64)
+        hit_ratio = np.zeros(len(tokenized.vocab), dtype=np.int64)
+        for token_id in distinct.tolist():
+            hit = self.first_hit(tokenized.vocab[token_id])
+            if hit is not None:
+                hit_alias[token_id], hit_ratio[token_id] = hit
+
+        # Lowest alias id per title, earliest token on ties
+        keys = hit_alias[token_ids] * POSITIONS + local
+        nonempty = counts > 0
+        best = np.minimum.reduceat(keys, first[nonempty])
+        alias, pos = np.divmod(best, POSITIONS)
+        found = alias < len(self.aliases)
+        rows_found = np.flatnonzero(nonempty)[found]
+        alias_ids[rows_found] = alias[found]
+        ratios[rows_found] = hit_ratio[tokenized.ids[starts[rows_found] + pos[found]]]
+        return alias_ids, ratios
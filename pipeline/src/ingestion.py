@@ -1,11 +1,51 @@
 import pandas as pd
+import numpy as np
 import hashlib
+import re
 import uuid
 
 REQUIRED_COLUMNS = ['name', 'url', 'image', 'rating', 'sold_quantity', 'price_current', 'price_original', 'discount']
 
 from urllib.parse import urlparse, urlunparse, parse_qsl
 
+from . import columnar, dtypes
+
+# URLs that urlparse/urlunparse round-trip unchanged apart from dropping the
+# query: lowercase http(s) scheme, plain ASCII host, no whitespace or control
+# characters (urlparse strips those), no ';' (a bare trailing ';' is dropped
+# as empty params). Everything else goes through generate_content_hash.
+_PLAIN_URL = re.compile(
+    r"https?://[A-Za-z0-9._~%!$&'()*+,=:@-]+"
+    r"[^\x00-\x20\x7f?#;]*"
+    r"(?:\?[^\x00-\x20\x7f#]*)?"
+    r"(?:#[^\x00-\x20\x7f]*)?"
+)
+# Product identity per marketplace URL shape, applied to query-stripped URLs:
+# (platform, pattern, canonical URL template). Numeric native ids are captured
+# as `shop` / `item`, other listing ids as `sku`.
+PLATFORM_PATTERNS = [
+    ('shopee', re.compile(r"https?://(?:www\.)?shopee\.co\.id/product/(?P<shop>\d+)/(?P<item>\d+)"),
+     "https://shopee.co.id/product/{shop}/{item}"),
+    ('shopee', re.compile(r"https?://(?:www\.)?shopee\.co\.id/[^/]*-i\.(?P<shop>\d+)\.(?P<item>\d+)"),
+     "https://shopee.co.id/product/{shop}/{item}"),
+    ('tokopedia', re.compile(r"https?://shop-id\.tokopedia\.com/pdp/[^/]*/(?P<item>\d+)"),
+     "https://shop-id.tokopedia.com/pdp/-/{item}"),
+    ('tokopedia', re.compile(r"https?://(?:www\.|m\.)?tokopedia\.com/(?P<sku>[^/]+/[^/]+)"),
+     "https://www.tokopedia.com/{sku}"),
+    ('lazada', re.compile(r"https?://(?:www\.)?lazada\.co\.id/products/[^/]*?-?i(?P<item>\d+)(?:-s\d+)?\.html"),
+     "https://www.lazada.co.id/products/i{item}.html"),
+    ('blibli', re.compile(r"https?://(?:www\.)?blibli\.com/p/[^/]+/(?P<sku>[^/]+)"),
+     "https://www.blibli.com/p/-/{sku}"),
+    ('tiktok', re.compile(r"https?://(?:www\.|shop\.)?tiktok\.com/(?:view/)?product/(?P<item>\d+)"),
+     "https://shop.tiktok.com/view/product/{item}"),
+]
+
+# First byte of a product key; 0 marks a listing without a recognizable native id
+PLATFORM_CODES = {'shopee': 1, 'tokopedia': 2, 'lazada': 3, 'blibli': 4, 'tiktok': 5}
+# Native ids packed as integers: shop in key bytes 1-7, item in bytes 8-15
+_MAX_SHOP_DIGITS = 16   # < 2**56
+_MAX_ITEM_DIGITS = 19   # < 2**64
+
 def generate_content_hash(row):
     """
     Create a stable unique string based on Identity (Name + Cleaned URL).
@@ -35,26 +75,229 @@ def generate_content_hash(row):
     content = f"{row['name']}{cleaned_url}"
     return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
-def ingest_data(file_path):
-    print(f"Loading data from {file_path}...")
-    try:
-        df = pd.read_csv(file_path)
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return None
+def _strip_query(url: str) -> str:
+    """urlunparse(urlparse(url)._replace(query='')) for a _PLAIN_URL match."""
+    hash_at = url.find('#')
+    base = url if hash_at < 0 else url[:hash_at]
+    query_at = base.find('?')
+    if query_at >= 0:
+        base = base[:query_at]
+    # urlunparse drops an empty fragment along with its '#'
+    if 0 <= hash_at < len(url) - 1:
+        base += url[hash_at:]
+    return base
+
+def _clean_urls(urls: pd.Series) -> tuple:
+    """
+    (URL values, mask of _PLAIN_URL rows). Irregular rows are already cleaned
+    through urlparse; plain rows are left for _strip_query.
+    """
+    if not pd.api.types.is_string_dtype(urls):
+        urls = urls.astype(object).map(str)  # str(row['url']) in generate_content_hash
+    values = urls.to_numpy(dtype=object, copy=True)  # object input would otherwise be a view of the frame
+    plain = urls.str.fullmatch(_PLAIN_URL.pattern).to_numpy(dtype=bool, na_value=False)
+    for i in np.flatnonzero(~plain):
+        parsed = urlparse(str(values[i]))
+        values[i] = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, '', parsed.fragment))
+    return values, plain
+
+def strip_queries(urls: pd.Series) -> pd.Series:
+    """URLs without their query, cleaned exactly as generate_content_hash does."""
+    values, plain = _clean_urls(urls)
+    values[plain] = [_strip_query(url) for url in values[plain]]
+    return pd.Series(values, index=urls.index, dtype=object)
+
+def content_hashes(df: pd.DataFrame) -> list:
+    """
+    generate_content_hash for a whole frame (same hex digests): one vectorized
+    regex pass sorts out the URLs urlparse would treat specially, and the
+    hashing loop cuts the query off the rest with plain string operations.
+    """
+    names = df['name'].to_numpy(dtype=object)
+    urls, plain = _clean_urls(df['url'])
+    sha256, strip = hashlib.sha256, _strip_query
+    return [sha256(f"{name}{strip(url) if cut and ('?' in url or '#' in url) else url}".encode('utf-8')).hexdigest()
+            for name, url, cut in zip(names, urls, plain.tolist())]
+
+def native_ids(urls: pd.Series) -> pd.DataFrame:
+    """
+    Marketplace identity per row: platform ('other' when no pattern matches),
+    numeric `shop` / `item` ids (0 when absent), string `sku` ids and the
+    canonical product URL (slugs, tracking paths and queries dropped; other
+    URLs only lose their query).
+    """
+    canonical = strip_queries(urls)
+    n = len(canonical)
+    platform = np.full(n, 'other', dtype=object)
+    shop = np.full(n, '', dtype=object)
+    item = np.full(n, '', dtype=object)
+    sku = np.full(n, None, dtype=object)
+    pending = np.ones(n, dtype=bool)
+    for name, pattern, template in PLATFORM_PATTERNS:
+        rows = np.flatnonzero(pending)
+        if not len(rows):
+            break
+        found = canonical.iloc[rows].str.extract(pattern.pattern)
+        hit = found.notna().all(axis=1).to_numpy()
+        if not hit.any():
+            continue
+        rows, found = rows[hit], found[hit]
+        fields = list(found.columns)
+        canonical.iloc[rows] = [template.format(**dict(zip(fields, values)))
+                                for values in found.itertuples(index=False)]
+        platform[rows] = name
+        for column, target in (('shop', shop), ('item', item), ('sku', sku)):
+            if column in found:
+                target[rows] = found[column].to_numpy(dtype=object)
+        pending[rows] = False
+    return pd.DataFrame({'platform': platform, 'shop': shop, 'item': item, 'sku': sku,
+                         'canonical_url': canonical.to_numpy()}, index=urls.index)
+
+def canonical_urls(urls: pd.Series) -> pd.DataFrame:
+    """Platform and canonical product URL per row (see native_ids)."""
+    return native_ids(urls)[['platform', 'canonical_url']]
+
+def product_keys(df: pd.DataFrame, content_hash=None) -> list:
+    """
+    Compact 128-bit product key per row, as a UUID string.
+
+    Byte 0 is the platform code. Numeric native ids are packed big-endian:
+    shop id in bytes 1-7, item id in bytes 8-15 (Shopee shopid/itemid,
+    Tokopedia / Lazada / TikTok product ids). String ids (Blibli SKUs, old
+    Tokopedia shop/slug paths) and oversized numbers are hashed into bytes
+    1-15. The key ignores the title, so a seller renaming a listing keeps it.
+
+    URLs without a native id fall back to platform code 0 and the first 15
+    bytes of the name + URL content hash (`content_hash`, computed if not given).
+    """
+    ids = native_ids(df['url'])
+    n = len(ids)
+    keys = np.zeros((n, 16), dtype=np.uint8)
+    keys[:, 0] = ids['platform'].map(PLATFORM_CODES).fillna(0).to_numpy(dtype=np.uint8)
+
+    shop, item = ids['shop'].str.len().to_numpy(), ids['item'].str.len().to_numpy()
+    packed = ((ids['sku'].isna().to_numpy()) & (item > 0) & (item <= _MAX_ITEM_DIGITS)
+              & (shop <= _MAX_SHOP_DIGITS) & (keys[:, 0] > 0))
+    if packed.any():
+        shop_ids = np.array([int(s or 0) for s in ids['shop'].to_numpy()[packed]], dtype=np.uint64)
+        item_ids = np.array([int(i) for i in ids['item'].to_numpy()[packed]], dtype=np.uint64)
+        keys[packed, 1:8] = shop_ids[:, None].astype('>u8').view(np.uint8).reshape(-1, 8)[:, 1:]
+        keys[packed, 8:16] = item_ids.astype('>u8').view(np.uint8).reshape(-1, 8)
+
+    hashed = (keys[:, 0] > 0) & ~packed
+    for i in np.flatnonzero(hashed):
+        native = ids['sku'].iat[i] or f"{ids['shop'].iat[i]}/{ids['item'].iat[i]}"
+        digest = hashlib.blake2b(f"{ids['platform'].iat[i]}:{native}".encode('utf-8'), digest_size=15).digest()
+        keys[i, 1:] = np.frombuffer(digest, dtype=np.uint8)
 
-    # Validate columns
+    fallback = np.flatnonzero(keys[:, 0] == 0)
+    if len(fallback):
+        hashes = content_hash if content_hash is not None else content_hashes(df)
+        keys[fallback, 1:] = np.frombuffer(b''.join(bytes.fromhex(hashes[i][:30]) for i in fallback),
+                                           dtype=np.uint8).reshape(-1, 15)
+
+    hex_keys = keys.tobytes().hex()
+    return [f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+            for h in (hex_keys[i:i + 32] for i in range(0, 32 * n, 32))]
+
+def _prepare(df):
+    """Validate columns and attach content hashes. Returns None if columns are missing."""
     missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing:
         print(f"Missing columns: {missing}")
         return None
 
     # Add system IDs and Hashes
-    df['content_hash'] = df.apply(generate_content_hash, axis=1)
+    df['content_hash'] = content_hashes(df)
+    df['product_key'] = product_keys(df, df['content_hash'].tolist())
+    return df
+
+def read_products(file_path):
+    """Cleaned products from a transform: typed Parquet / Arrow IPC (src.columnar) or CSV."""
+    if columnar.is_columnar(file_path):
+        return columnar.read_products(file_path)
+    return pd.read_csv(file_path)
+
+def ingest_data(file_path):
+    print(f"Loading data from {file_path}...")
+    try:
+        df = read_products(file_path)
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
+
+    df = _prepare(df)
+    if df is None:
+        return None
     
-    # Simple deduplication based on hash
+    # Simple deduplication based on the product key
     original_count = len(df)
-    df = df.drop_duplicates(subset=['content_hash'])
+    df = df.drop_duplicates(subset=['product_key'])
     print(f"Ingested {len(df)} records (dropped {original_count - len(df)} duplicates)")
     
-    return df
+    return dtypes.ingested(df)
+
+class HashDeduper:
+    """
+    Remembers product keys (or content hashes) across chunks, so "keep the first
+    occurrence" holds over the whole input.
+
+    Keys are kept as 16-byte values in a few sorted arrays ("runs"). A chunk's
+    keys are probed with searchsorted in every run and its new keys become a
+    run of their own; a run is merged into the previous one once it is as large,
+    so there are O(log n) runs and no chunk pays for a pass over everything seen.
+
+    Memory is not bounded by the chunk size: it grows by 16 bytes per distinct
+    key (about 80 MB for 5M products), against ~80 bytes for a set of bytes.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def _seen(self, keys: np.ndarray) -> np.ndarray:
+        seen = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            seen |= run[pos] == keys
+        return seen
+
+    def first_seen(self, hashes: pd.Series) -> np.ndarray:
+        """Mask of rows whose key appears for the first time (in this chunk and overall)."""
+        keys = np.array([bytes.fromhex(h.replace('-', '')[:32]) for h in hashes], dtype='S16')
+        mask = ~pd.Series(keys).duplicated().to_numpy()
+        mask &= ~self._seen(keys)
+        run = np.sort(keys[mask])
+        while self.runs and len(self.runs[-1]) <= len(run):
+            # Both halves are sorted; the stable sort merges the two runs in linear time
+            run = np.sort(np.concatenate([self.runs.pop(), run]), kind='stable')
+        if len(run):
+            self.runs.append(run)
+        return mask
+
+def iter_chunks(file_path, chunksize):
+    """
+    Streaming counterpart of ingest_data: yields validated, hashed and
+    deduplicated DataFrames of at most `chunksize` rows (src.dtypes policy applied).
+    """
+    print(f"Streaming data from {file_path} in chunks of {chunksize} rows...")
+    deduper = HashDeduper()
+    total = dropped = 0
+    if columnar.is_columnar(file_path):
+        chunks = columnar.iter_products(file_path, chunksize)
+    else:
+        chunks = pd.read_csv(file_path, chunksize=chunksize)
+    for chunk in chunks:
+        chunk = _prepare(chunk)
+        if chunk is None:
+            return
+        keep = deduper.first_seen(chunk['product_key'])
+        total += len(chunk)
+        dropped += int((~keep).sum())
+        if not keep.all():
+            chunk = chunk[keep].copy()
+        if len(chunk):
+            yield dtypes.ingested(chunk)
+    print(f"Streamed {total - dropped} records (dropped {dropped} duplicates)")
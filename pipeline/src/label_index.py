@@ -0,0 +1,343 @@
+"""
+Nearest-neighbour label propagation over titles that already carry labels.
+
+Every labeled title (loaded rows from enriched_products, human corrections from
+unknown_products_labeling.csv) is stored as a hashed char-trigram vector:
+DIM buckets, signed feature hashing, L2-normalized, kept sparse (one int32
+bucket and one float16 value per distinct trigram, about 6 bytes per title
+character) in NumPy memmaps that grow in place. A batch of unknown titles is
+scored against all stored vectors block by block with one sparse matrix
+product per block, and each title adopts the brand / product type of its most
+similar labeled neighbour when the cosine similarity reaches the threshold.
+A neighbour's brand is only adopted if the title shares a word with that brand:
+near-duplicate titles of different brands ("emina lightening face serum 30ml"
+vs "wardah lightening face serum 30ml") score as high as two sizes of one product.
+
+Layout of an index directory:
+    indices.i4    bucket of each stored nonzero, `capacity` slots (past `nnz` unused)
+    values.f2     float16 value of each stored nonzero
+    labels.npz    title keys (S16), row offsets into the nonzeros (int64),
+                  brand codes, type codes (int32)
+    meta.json     format, dim, count, nnz, capacity, label vocabularies
+"""
+import json
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .cache import title_key
+from .cleaning import clean_title
+from .extraction import MAX_SIMILAR_CONFIDENCE
+
+DEFAULT_INDEX_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'cache', 'label_index'
+))
+
+# Bump when the on-disk layout or the vectorizer changes; older indexes are rebuilt
+INDEX_FORMAT = 2
+# Wide enough that unrelated trigrams of one title practically never share a bucket
+DIM = 1 << 14
+NGRAM = 3
+# Cosine similarity needed to adopt a neighbour's label
+THRESHOLD = 0.80
+# Stored rows scored per matrix product, and query rows per product (the queries
+# are densified to DIM x QUERY_ROWS, the similarities are QUERY_ROWS x BLOCK_ROWS float32)
+BLOCK_ROWS = 16_384
+QUERY_ROWS = 1_024
+
+UNKNOWN = "unknown"
+
+class HashedNgramVectorizer:
+    """Signed feature hashing of padded char trigrams into DIM buckets (stable across processes)."""
+
+    def __init__(self, dim: int = DIM, n: int = NGRAM):
+        self.dim = dim
+        self.n = n
+        self._buckets = {}
+
+    def _bucket(self, gram: str):
+        hit = self._buckets.get(gram)
+        if hit is None:
+            h = zlib.crc32(gram.encode('utf-8'))
+            hit = self._buckets[gram] = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+        return hit
+
+    def transform(self, titles) -> sparse.csr_matrix:
+        """(len(titles), dim) float32 CSR, rows L2-normalized (empty for empty titles)."""
+        bucket, n = self._bucket, self.n
+        indptr, indices, data = [0], [], []
+        for title in titles:
+            padded = f" {title} "
+            row = {}
+            for j in range(len(padded) - n + 1):
+                col, sign = bucket(padded[j:j + n])
+                row[col] = row.get(col, 0.0) + sign
+            # Trigrams whose signs cancelled out leave no entry
+            for col, value in row.items():
+                if value:
+                    indices.append(col)
+                    data.append(value)
+            indptr.append(len(indices))
+        data = np.asarray(data, dtype=np.float32)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        lengths = np.diff(indptr)
+        nonempty = lengths > 0
+        norms = np.ones(len(titles), dtype=np.float32)
+        if nonempty.any():
+            norms[nonempty] = np.sqrt(np.add.reduceat(data * data, indptr[:-1][nonempty]))
+        data /= np.repeat(norms, lengths)
+        return sparse.csr_matrix((data, np.asarray(indices, dtype=np.int32), indptr),
+                                 shape=(len(titles), self.dim))
+
+class LabelIndex:
+    def __init__(self, path=None, dim: int = DIM):
+        self.path = path or os.getenv("LABEL_INDEX_PATH") or DEFAULT_INDEX_PATH
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, 'meta.json')
+        meta = None
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('format') != INDEX_FORMAT:
+                print(f"Label index at {self.path} has an older layout; starting a new one "
+                      f"(re-run build_label_index.py to refill it)")
+                for name in ('vectors.f16', 'indices.i4', 'values.f2', 'labels.npz', 'meta.json'):
+                    if os.path.exists(os.path.join(self.path, name)):
+                        os.remove(os.path.join(self.path, name))
+                meta = None
+        if meta is not None:
+            labels = np.load(os.path.join(self.path, 'labels.npz'))
+            self.dim, self.count, self.nnz, self.capacity = meta['dim'], meta['count'], meta['nnz'], meta['capacity']
+            self.brand_names, self.type_names = meta['brands'], meta['types']
+            self.keys = labels['keys'][:self.count]
+            self.indptr = labels['indptr'][:self.count + 1]
+            self.brand_codes = labels['brands'][:self.count]
+            self.type_codes = labels['types'][:self.count]
+        else:
+            self.dim, self.count, self.nnz, self.capacity = dim, 0, 0, 0
+            self.brand_names, self.type_names = [UNKNOWN], [UNKNOWN]
+            self.keys = np.empty(0, dtype='S16')
+            self.indptr = np.zeros(1, dtype=np.int64)
+            self.brand_codes = np.empty(0, dtype=np.int32)
+            self.type_codes = np.empty(0, dtype=np.int32)
+        self.vectorizer = HashedNgramVectorizer(self.dim)
+        # S16 items come back without trailing NUL bytes; pad them to the digest width
+        self._row_of = {key.ljust(16, b'\0'): i for i, key in enumerate(self.keys.tolist())}
+        self._indices, self._values = self._map(self.capacity)
+
+    def __len__(self):
+        return self.count
+
+    def _map(self, capacity):
+        if capacity == 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float16)
+        return (np.memmap(os.path.join(self.path, 'indices.i4'), dtype=np.int32, mode='r+', shape=(capacity,)),
+                np.memmap(os.path.join(self.path, 'values.f2'), dtype=np.float16, mode='r+', shape=(capacity,)))
+
+    def _flush(self):
+        for array in (self._indices, self._values):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def _grow(self, needed: int):
+        """Room for `needed` stored nonzeros."""
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity, 1 << 16)
+        self._flush()
+        self._indices = self._values = None
+        for name, itemsize in (('indices.i4', 4), ('values.f2', 2)):
+            with open(os.path.join(self.path, name), 'ab') as f:
+                f.truncate(capacity * itemsize)
+        self.capacity = capacity
+        self._indices, self._values = self._map(capacity)
+
+    def _codes(self, names, labels) -> np.ndarray:
+        lookup = {name: i for i, name in enumerate(names)}
+        codes = np.empty(len(labels), dtype=np.int32)
+        for i, label in enumerate(labels):
+            code = lookup.get(label)
+            if code is None:
+                code = lookup[label] = len(names)
+                names.append(label)
+            codes[i] = code
+        return codes
+
+    def add(self, titles, brands, product_types) -> int:
+        """
+        Add (or relabel) match titles with their labels; "unknown" marks a label
+        the row does not provide. Returns the number of new rows.
+        """
+        titles = list(titles)
+        keys = [title_key(t) for t in titles]
+        b_codes = self._codes(self.brand_names, brands)
+        t_codes = self._codes(self.type_names, product_types)
+
+        # Later labels for a title already in the index (e.g. a correction) win
+        new_rows = {}
+        for i, key in enumerate(keys):
+            row = self._row_of.get(key)
+            if row is None:
+                new_rows[key] = i
+            else:
+                if b_codes[i]:
+                    self.brand_codes[row] = b_codes[i]
+                if t_codes[i]:
+                    self.type_codes[row] = t_codes[i]
+        fresh = list(new_rows.values())
+
+        if fresh:
+            start = self.count
+            vectors = self.vectorizer.transform([titles[i] for i in fresh])
+            self._grow(self.nnz + vectors.nnz)
+            self._indices[self.nnz:self.nnz + vectors.nnz] = vectors.indices
+            self._values[self.nnz:self.nnz + vectors.nnz] = vectors.data
+            self._flush()
+            self.indptr = np.concatenate([self.indptr, self.nnz + vectors.indptr[1:]])
+            self.nnz += vectors.nnz
+            self.keys = np.concatenate([self.keys, np.array([keys[i] for i in fresh], dtype='S16')])
+            self.brand_codes = np.concatenate([self.brand_codes, b_codes[fresh]])
+            self.type_codes = np.concatenate([self.type_codes, t_codes[fresh]])
+            self._row_of.update((keys[i], start + j) for j, i in enumerate(fresh))
+            self.count += len(fresh)
+        self._save()
+        return len(fresh)
+
+    def _save(self):
+        np.savez(os.path.join(self.path, 'labels.tmp.npz'),
+                 keys=self.keys, indptr=self.indptr, brands=self.brand_codes, types=self.type_codes)
+        os.replace(os.path.join(self.path, 'labels.tmp.npz'), os.path.join(self.path, 'labels.npz'))
+        meta = {'format': INDEX_FORMAT, 'dim': self.dim, 'count': self.count, 'nnz': self.nnz,
+                'capacity': self.capacity,
+                'brands': self.brand_names, 'types': self.type_names}
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        # The row count is published last, after the nonzeros it covers are on disk
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    def _brands_named_in(self, titles) -> list:
+        """Per title, the brand codes it has a word of (or names as one word, "ms glow" -> "msglow")."""
+        codes_of = {}
+        for code, name in enumerate(self.brand_names[1:], 1):
+            for word in {*name.split(), name.replace(' ', '')}:
+                codes_of.setdefault(word, []).append(code)
+        return [sorted({code for word in set(title.split()) for code in codes_of.get(word, ())})
+                for title in titles]
+
+    def query(self, titles, threshold: float = THRESHOLD):
+        """
+        Nearest labeled neighbour per title, separately for brand and type
+        (neighbours without that label are skipped, and for brands so are
+        neighbours whose brand shares no word with the title). Returns (brands,
+        brand scores, types, type scores); "unknown" / 0.0 below the threshold.
+        """
+        n = len(titles)
+        brands = np.full(n, UNKNOWN, dtype=object)
+        types = np.full(n, UNKNOWN, dtype=object)
+        b_scores = np.zeros(n, dtype=np.float32)
+        t_scores = np.zeros(n, dtype=np.float32)
+        if not n or not self.count:
+            return brands, b_scores, types, t_scores
+
+        queries = self.vectorizer.transform(titles)
+        named = self._brands_named_in(titles)
+        b_best = np.full(n, -1.0, dtype=np.float32)
+        t_best = np.full(n, -1.0, dtype=np.float32)
+        b_hit = np.zeros(n, dtype=np.int32)
+        t_hit = np.zeros(n, dtype=np.int32)
+
+        for q in range(0, n, QUERY_ROWS):
+            # Dense (DIM x rows) query columns: each sparse block product comes out dense anyway
+            dense = np.ascontiguousarray(queries[q:q + QUERY_ROWS].toarray().T)
+            m = dense.shape[1]
+            rows = np.arange(m)
+            # Brands: only neighbours whose brand the title names (code 0, no brand label, never is)
+            allowed = np.zeros((m, len(self.brand_names)), dtype=bool)
+            for row, codes in enumerate(named[q:q + m]):
+                allowed[row, codes] = True
+
+            for start in range(0, self.count, BLOCK_ROWS):
+                stop = min(start + BLOCK_ROWS, self.count)
+                lo, hi = int(self.indptr[start]), int(self.indptr[stop])
+                block = sparse.csr_matrix(
+                    (np.asarray(self._values[lo:hi], dtype=np.float32), np.asarray(self._indices[lo:hi]),
+                     self.indptr[start:stop + 1] - lo),
+                    shape=(stop - start, self.dim),
+                )
+                sims = np.ascontiguousarray((block @ dense).T)
+                has_type = self.type_codes[start:stop] != 0
+                for mask, best, hit, codes in (
+                        (allowed[:, self.brand_codes[start:stop]], b_best, b_hit, self.brand_codes),
+                        (None if has_type.all() else has_type, t_best, t_hit, self.type_codes)):
+                    if mask is None:
+                        arg = sims.argmax(axis=1)
+                        score = sims[rows, arg]
+                    elif not mask.any():
+                        continue
+                    else:
+                        masked = np.where(mask, sims, -1.0)
+                        arg = masked.argmax(axis=1)
+                        score = masked[rows, arg]
+                    better = score > best[q:q + m]
+                    best[q:q + m][better] = score[better]
+                    hit[q:q + m][better] = codes[start + arg[better]]
+
+        names_b = np.asarray(self.brand_names, dtype=object)
+        names_t = np.asarray(self.type_names, dtype=object)
+        ok = b_best >= threshold
+        brands[ok], b_scores[ok] = names_b[b_hit[ok]], b_best[ok]
+        ok = t_best >= threshold
+        types[ok], t_scores[ok] = names_t[t_hit[ok]], t_best[ok]
+        return brands, b_scores, types, t_scores
+
+    def add_frame(self, df) -> int:
+        """Add enriched rows whose brand and product type are both known."""
+        known = (df['brand'] != UNKNOWN) & (df['product_type'] != UNKNOWN)
+        rows = df[known]
+        return self.add(rows['title_match'], rows['brand'], rows['product_type'])
+
+    def add_labeling_csv(self, csv_path) -> int:
+        """Add the human corrections from an unknown_products_labeling.csv export."""
+        df = pd.read_csv(csv_path).fillna('')
+        df = df[(df['corrected_brand'] != '') | (df['corrected_product_type'] != '')]
+        titles = [clean_title(t).lower() for t in df['title_raw']]
+        brands = [b.lower().strip() or UNKNOWN for b in df['corrected_brand']]
+        types = [t.lower().strip() or UNKNOWN for t in df['corrected_product_type']]
+        return self.add(titles, brands, types)
+
+    def close(self):
+        self._flush()
+        self._indices = self._values = None
+
+def propagate_labels(df, index: LabelIndex, threshold: float = THRESHOLD) -> np.ndarray:
+    """
+    Fill unknown brand / product_type of enriched rows from their nearest labeled
+    neighbours, in place. Returns the mask of rows that adopted any label.
+    """
+    unknown_brand = (df['brand'] == UNKNOWN).to_numpy()
+    unknown_type = (df['product_type'] == UNKNOWN).to_numpy()
+    rows = np.flatnonzero(unknown_brand | unknown_type)
+    adopted = np.zeros(len(df), dtype=bool)
+    if not len(rows) or not len(index):
+        return adopted
+
+    # One query per distinct title
+    codes, titles = pd.factorize(df['title_match'].to_numpy()[rows])
+    brands, b_scores, types, t_scores = (a[codes] for a in index.query(list(titles), threshold))
+
+    for mask, column, conf_column, labels, scores in (
+            (unknown_brand[rows], 'brand', 'brand_confidence', brands, b_scores),
+            (unknown_type[rows], 'product_type', 'product_type_confidence', types, t_scores)):
+        take = mask & (labels != UNKNOWN)
+        target = df.index[rows[take]]
+        df.loc[target, column] = labels[take]
+        df.loc[target, conf_column] = np.minimum(scores[take].astype(np.float64), MAX_SIMILAR_CONFIDENCE)
+        adopted[rows[take]] = True
+
+    print(f"Label propagation: {int(adopted.sum())} of {len(rows)} unknown rows adopted a neighbour's label "
+          f"({len(index)} labeled titles indexed)")
+    return adopted
@@ -1,27 +1,22 @@
 import os
+import io
 import csv
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from urllib.parse import urlparse, parse_qs, urlencode
-import psycopg2
-from psycopg2.extras import execute_values
+from typing import NamedTuple
 
-def get_db_connection():
-    db_url = os.getenv("DATABASE_URL")
-    
-    if db_url and '?' in db_url:
-        parsed = urlparse(db_url)
-        query_params = parse_qs(parsed.query)
-        unsupported = ['statement_cache_mode', 'default_query_exec_mode']
-        for param in unsupported:
-            query_params.pop(param, None)
-        new_query = urlencode(query_params, doseq=True)
-        db_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        if new_query:
-            db_url += f"?{new_query}"
-    
-    return psycopg2.connect(db_url)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import psycopg2.errors
+
+from . import db
+from .dtypes import FLOAT32_DECIMALS
 
-def export_unknown_products(df_raw, df_enriched, output_dir="../../data"):
+def export_unknown_products(df_raw, df_enriched, output_dir="../../data", append=False):
     unknown_rows = []
     
     # Since df_enriched has all data, we filter for unknown
@@ -51,24 +46,354 @@ def export_unknown_products(df_raw, df_enriched, output_dir="../../data"):
             'key_words_for_brands', 'key_words_for_product'
         ]
         
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        # Streaming runs append to the file once an earlier chunk has created it
+        write_header = not (append and os.path.exists(output_path))
+        with open(output_path, 'a' if append else 'w', newline='', encoding='utf-8') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+            if write_header:
+                writer.writeheader()
             writer.writerows(unknown_rows)
         
         print(f"Exported {len(unknown_rows)} unknown products to {output_path}")
         return len(unknown_rows)
     return 0
 
-def load_data(df_raw, df_enriched):
+# Both load paths send the STAGE_COLUMNS rows of stage_frame() and upsert them
+# with one statement: the raw upsert's RETURNING feeds the enriched upsert in a
+# data-modifying CTE, so no id remap query or second pass is needed. Numeric
+# columns are float8 so values are cast into the NUMERIC / BIGINT columns
+# exactly as the old execute_values literals were.
+STAGE_TABLE = "stage_products"
+
+STAGE_COLUMNS = [
+    ('product_key', 'UUID'), ('content_hash', 'TEXT'), ('title_raw', 'TEXT'),
+    ('quantity_sold', 'FLOAT8'), ('price_current', 'FLOAT8'), ('price_original', 'FLOAT8'),
+    ('discount', 'FLOAT8'), ('rating', 'FLOAT8'), ('url', 'TEXT'), ('image_url', 'TEXT'), ('source', 'TEXT'),
+    ('title_cleaned', 'TEXT'), ('brand', 'TEXT'), ('product_type', 'TEXT'),
+    ('brand_confidence', 'FLOAT8'), ('product_type_confidence', 'FLOAT8'), ('enrichment_confidence', 'FLOAT8'),
+]
+
+RAW_COLUMNS = "product_key, content_hash, title_raw, quantity_sold, price_current, price_original, discount, rating, url, image_url, source"
+
+# Columns a conflicting row is updated with. A row whose stored values already
+# equal the incoming ones (compared after the cast to the column types) is left
+# alone: no new tuple, no WAL, no index churn, and updated_at / enriched_at keep
+# the time of the last real change.
+RAW_MUTABLE = ('content_hash', 'title_raw', 'quantity_sold', 'price_current', 'price_original',
+               'discount', 'rating', 'image_url', 'source')
+ENRICHED_MUTABLE = ('title_cleaned', 'brand', 'product_type')
+
+class LoadCounts(NamedTuple):
+    """Per-load row counts; rows neither inserted nor updated were unchanged."""
+    staged: int
+    raw_inserted: int
+    raw_updated: int
+    enriched_inserted: int
+    enriched_updated: int
+
+    @property
+    def raw_skipped(self) -> int:
+        return self.staged - self.raw_inserted - self.raw_updated
+
+    @property
+    def enriched_skipped(self) -> int:
+        return self.staged - self.enriched_inserted - self.enriched_updated
+
+    def __add__(self, other):
+        return LoadCounts(*(a + b for a, b in zip(self, other)))
+
+def _update_set(columns, stamp) -> str:
+    return ",\n            ".join([f"{c} = EXCLUDED.{c}" for c in columns] + [f"{stamp} = NOW()"])
+
+def _changed(table, columns) -> str:
+    return (f"({', '.join(f'{table}.{c}' for c in columns)}) IS DISTINCT FROM "
+            f"({', '.join(f'EXCLUDED.{c}' for c in columns)})")
+
+def upsert_query(source: str) -> str:
+    """
+    The chained raw -> enriched upsert, reading STAGE_COLUMNS rows from
+    `source`. Returns one LoadCounts row ((xmax = 0) marks a RETURNING row
+    that was inserted rather than updated).
+    """
+    return f"""
+    raw AS (
+        INSERT INTO raw_products ({RAW_COLUMNS})
+        SELECT {RAW_COLUMNS} FROM {source}
+        ON CONFLICT (product_key) DO UPDATE SET
+            {_update_set(RAW_MUTABLE, 'updated_at')}
+        WHERE {_changed('raw_products', RAW_MUTABLE)}
+        RETURNING id, product_key, (xmax = 0) AS inserted
+    ),
+    -- Unchanged raw rows are not returned, but their labels may still have changed
+    ids AS (
+        SELECT id, product_key FROM raw
+        UNION ALL
+        SELECT r.id, r.product_key
+        FROM {source} s
+        JOIN raw_products r ON r.product_key = s.product_key
+        WHERE NOT EXISTS (SELECT 1 FROM raw WHERE raw.product_key = s.product_key)
+    ),
+    enriched AS (
+        INSERT INTO enriched_products (raw_product_id, title_cleaned, brand, product_type, price_effective, brand_confidence, product_type_confidence, enrichment_confidence)
+        SELECT ids.id, s.title_cleaned, s.brand, s.product_type, s.price_current, s.brand_confidence, s.product_type_confidence, s.enrichment_confidence
+        FROM ids
+        JOIN {source} s ON s.product_key = ids.product_key
+        ON CONFLICT (raw_product_id) DO UPDATE SET
+            {_update_set(ENRICHED_MUTABLE, 'enriched_at')}
+        WHERE {_changed('enriched_products', ENRICHED_MUTABLE)}
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT (SELECT count(*) FROM {source}),
+           (SELECT count(*) FILTER (WHERE inserted) FROM raw),
+           (SELECT count(*) FILTER (WHERE NOT inserted) FROM raw),
+           (SELECT count(*) FILTER (WHERE inserted) FROM enriched),
+           (SELECT count(*) FILTER (WHERE NOT inserted) FROM enriched);
+    """
+
+# Bulk path: COPY into a temp staging table, then one upsert from it
+CREATE_STAGE = f"""
+    CREATE TEMP TABLE {STAGE_TABLE} (
+        {", ".join(f"{name} {sql_type}" for name, sql_type in STAGE_COLUMNS)}
+    ) ON COMMIT DROP;
+"""
+
+# Unquoted empty fields are empty strings, not NULL (title_raw is NOT NULL)
+COPY_STAGE = f"""
+    COPY {STAGE_TABLE} FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL ({", ".join(
+        name for name, sql_type in STAGE_COLUMNS if sql_type == 'TEXT')}));
+"""
+
+# Prepared once per connection (see db.Statement): the temp table is recreated
+# by every load, and the server re-resolves it when the cached plan goes stale
+UPSERT_STAGE = db.Statement("upsert_stage", "WITH" + upsert_query(STAGE_TABLE))
+
+# Fallback path: one statement (one round trip) per page, each column sent as an
+# array so every page has the same shape and reuses the same prepared plan
+UPSERT_VALUES = db.Statement("upsert_values", (
+    f"WITH v AS (SELECT * FROM unnest("
+    f"{', '.join(f'%s::{sql_type}[]' for _, sql_type in STAGE_COLUMNS)}"
+    f") AS v ({', '.join(name for name, _ in STAGE_COLUMNS)})),"
+    + upsert_query("v")))
+
+# Rows per statement on the values path
+VALUES_PAGE = 1_000
+
+# Rows per COPY buffer, bounds the CSV text held in memory
+COPY_BATCH = 100_000
+
+LOAD_METHODS = ('copy', 'values')
+
+# Loads that may run at the same time (other platforms' runs, or one load's own
+# connections) coordinate per partition: a product_key hash range. Rows conflict
+# on product_key alone, and the key already carries the platform in byte 0, so
+# the source plays no part. Each upsert transaction first takes
+# pg_advisory_xact_lock(LOAD_LOCK_CLASS, range) for every range it writes, in
+# ascending order, so two loads touching the same rows queue on the lock instead
+# of deadlocking on row locks. Every loader must use the same LOAD_PARTITIONS
+# for the locks to mean the same rows.
+LOAD_PARTITIONS = 16
+LOAD_LOCK_CLASS = zlib.crc32(b"loader.key_ranges") & 0x7FFFFFFF
+
+# Neighbouring partitions are upserted together until a transaction has at least
+# this many rows, so small loads do not pay a round trip per partition
+PARTITION_MIN_ROWS = 5_000
+
+def _column(df, name, default):
+    return df[name] if name in df else pd.Series(default, index=df.index)
+
+def _decimals(values) -> np.ndarray:
+    """Vectorized dtypes.to_decimal."""
+    return np.round(pd.to_numeric(values).to_numpy(dtype=np.float64), FLOAT32_DECIMALS)
+
+def stage_frame(df_final) -> pd.DataFrame:
+    """
+    The STAGE_COLUMNS rows both load paths send for `df_final`: discount
+    percentages scaled to fractions, float32 noise rounded away, price_current
+    doubling as price_effective.
+    """
+    discount = _decimals(df_final['discount'])
+    discount = np.where(discount > 1.0, discount / 100.0, discount)
+    brand_conf = _decimals(_column(df_final, 'brand_confidence', 0.0))
+    type_conf = _decimals(_column(df_final, 'product_type_confidence', 0.0))
+    return pd.DataFrame({
+        'product_key': df_final['product_key'].to_numpy(),
+        'content_hash': df_final['content_hash'].to_numpy(),
+        'title_raw': df_final['name'].to_numpy(),
+        'quantity_sold': pd.to_numeric(df_final['sold_quantity']).to_numpy(),
+        'price_current': pd.to_numeric(df_final['price_current']).to_numpy(dtype=np.float64),
+        'price_original': pd.to_numeric(df_final['price_original']).to_numpy(),
+        'discount': discount,
+        'rating': _decimals(df_final['rating']),
+        'url': _column(df_final, 'url', '').to_numpy(),
+        'image_url': _column(df_final, 'image', '').to_numpy(),
+        'source': _column(df_final, 'source', 'tiktok').to_numpy(),
+        'title_cleaned': df_final['title_cleaned'].to_numpy(),
+        'brand': df_final['brand'].to_numpy(),
+        'product_type': df_final['product_type'].to_numpy(),
+        'brand_confidence': brand_conf,
+        'product_type_confidence': type_conf,
+        'enrichment_confidence': (brand_conf * 0.6) + (type_conf * 0.4),
+    })
+
+def csv_buffer(stage) -> io.BytesIO:
+    """
+    COPY-ready CSV of stage_frame rows (pyarrow's writer, several times faster
+    than DataFrame.to_csv). Missing values are written as NaN, the float literal
+    the values path sends for them, never as NULL.
+    """
+    columns = {}
+    for name, sql_type in STAGE_COLUMNS:
+        values = stage[name]
+        if sql_type == 'FLOAT8':
+            columns[name] = pa.array(values.to_numpy(dtype=np.float64), from_pandas=False)
+        else:
+            columns[name] = pa.array(values.astype(object).fillna('NaN').to_numpy(), pa.string())
+    buf = io.BytesIO()
+    pacsv.write_csv(pa.table(columns), buf, pacsv.WriteOptions(include_header=False))
+    buf.seek(0)
+    return buf
+
+def staged_rows(df_final) -> pd.DataFrame:
+    # One statement may not upsert a key twice; the later row wins, as it does row
+    # by row. Key order makes every load lock the rows it upserts in the same order.
+    return (stage_frame(df_final).drop_duplicates(subset=['product_key'], keep='last')
+            .sort_values('product_key', ignore_index=True))
+
+def key_ranges(product_keys, n=LOAD_PARTITIONS) -> np.ndarray:
+    """
+    Hash range (0 .. n-1) of each product key: the key's two 64-bit halves are
+    folded and multiplied by a 64-bit odd constant, and the top 32 bits are cut
+    into n equal ranges. Stable across processes, unlike hash().
+    """
+    halves = np.frombuffer(bytes.fromhex("".join(product_keys).replace("-", "")), dtype='>u8').reshape(-1, 2)
+    mixed = (halves[:, 0] ^ halves[:, 1]).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return (((mixed >> np.uint64(32)) * np.uint64(n)) >> np.uint64(32)).astype(np.int32)
+
+def lock_partitions(cur, stage):
+    """
+    Take the transaction-scoped advisory lock of every key range `stage`
+    writes, in ascending order (one round trip). Held until commit / rollback.
+    """
+    ranges = np.unique(key_ranges(stage['product_key'].tolist()))
+    if len(ranges):
+        cur.execute("; ".join(["SELECT pg_advisory_xact_lock(%s, %s)"] * len(ranges)),
+                    [v for r in ranges.tolist() for v in (LOAD_LOCK_CLASS, r)])
+
+def copy_rows(cur, df_final, batch=COPY_BATCH) -> LoadCounts:
+    """
+    Bulk upsert: COPY into a temp staging table, then one INSERT ... SELECT ...
+    ON CONFLICT chain into raw_products and enriched_products.
+    """
+    return copy_stage(cur, staged_rows(df_final), batch)
+
+def copy_stage(cur, stage, batch=COPY_BATCH) -> LoadCounts:
+    cur.execute(CREATE_STAGE)
+    for i in range(0, len(stage), batch):
+        cur.copy_expert(COPY_STAGE, csv_buffer(stage.iloc[i:i + batch]))
+    # The planner knows nothing about a fresh temp table
+    cur.execute(f"ANALYZE {STAGE_TABLE}")
+    UPSERT_STAGE.execute(cur)
+    return LoadCounts(*cur.fetchone())
+
+def value_arrays(stage) -> list:
+    """
+    One list per STAGE_COLUMNS column of `stage`, the UPSERT_VALUES parameters.
+    A missing text value is sent as 'NaN', as the float literal it used to be.
+    """
+    arrays = []
+    for name, sql_type in STAGE_COLUMNS:
+        values = stage[name]
+        if sql_type == 'FLOAT8':
+            arrays.append(values.to_numpy(dtype=np.float64).tolist())
+        else:
+            arrays.append(values.astype(object).fillna('NaN').tolist())
+    return arrays
+
+def values_rows(cur, df_final, page_size=VALUES_PAGE) -> LoadCounts:
+    """
+    Upsert without COPY (the fallback path): one chained raw -> enriched
+    statement per page of `page_size` rows.
+    """
+    return values_stage(cur, staged_rows(df_final), page_size)
+
+def values_stage(cur, stage, page_size=VALUES_PAGE) -> LoadCounts:
+    counts = LoadCounts(0, 0, 0, 0, 0)
+    for i in range(0, len(stage), page_size):
+        UPSERT_VALUES.execute(cur, value_arrays(stage.iloc[i:i + page_size]))
+        counts += LoadCounts(*cur.fetchone())
+    return counts
+
+def upsert_stage(database, stage, method) -> tuple:
+    """
+    Upsert `stage` in one transaction holding its partitions' locks. A server
+    that refuses COPY gets the rows again through 'values' in a fresh transaction.
+    Returns (LoadCounts, method used).
+    """
+    if method == 'copy':
+        try:
+            with database.transaction() as cur:
+                lock_partitions(cur, stage)
+                return copy_stage(cur, stage), method
+        except (psycopg2.errors.FeatureNotSupported, psycopg2.errors.InsufficientPrivilege) as e:
+            print(f"COPY load unavailable ({e.pgerror or e}); falling back to array upserts")
+            method = 'values'
+    with database.transaction() as cur:
+        lock_partitions(cur, stage)
+        return values_stage(cur, stage), method
+
+def partition_batches(stage, min_rows=PARTITION_MIN_ROWS) -> list:
+    """
+    `stage` split into transactions of whole key ranges: consecutive ranges
+    in lock order are merged until a batch reaches `min_rows` rows. Rows stay
+    in key order within each batch.
+    """
+    ranges = key_ranges(stage['product_key'].tolist())
+    batches, pending, rows = [], [], 0
+    for _, positions in stage.groupby(ranges, sort=True).indices.items():
+        pending.append(positions)
+        rows += len(positions)
+        if rows >= min_rows:
+            batches.append(stage.iloc[np.sort(np.concatenate(pending))])
+            pending, rows = [], 0
+    if pending:
+        batches.append(stage.iloc[np.sort(np.concatenate(pending))])
+    return batches
+
+def upsert_partitions(database, stage, method, connections) -> tuple:
+    """
+    Upsert `stage` in partition_batches(), one transaction each, on up to
+    `connections` pooled connections at once. Each batch commits on its own:
+    after a failure the others stay loaded, and a rerun (upserts are idempotent)
+    finishes the job. Returns (LoadCounts, methods used, connections used);
+    the methods are joined with '+' when some batches fell back ('copy+values').
+    """
+    batches = partition_batches(stage)
+    workers = min(connections, database.maxconn, len(batches))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda batch: upsert_stage(database, batch, method), batches))
+    counts = sum((c for c, _ in results), LoadCounts(0, 0, 0, 0, 0))
+    used = {m for _, m in results}
+    return counts, "+".join(m for m in LOAD_METHODS if m in used), workers
+
+def load_data(df_raw, df_enriched, append_unknowns=False, method=None, connections=None):
     """
     Load extracted data into Supabase.
     Ensures that NO 'unknown' brands or types are added to the database.
+    `method` is 'copy' (COPY into a staging table, the default; LOAD_METHOD
+    overrides it) or 'values' (array-parameter statements). A server that refuses the COPY
+    path falls back to 'values' in a fresh transaction.
+    `connections` > 1 (LOAD_CONNECTIONS) splits the load into product_key range
+    partitions upserted concurrently (see upsert_partitions), capped by DB_POOL_MAX.
+    Returns the number of unknown products exported for labeling.
     """
+    method = method or os.getenv("LOAD_METHOD", "copy")
+    if method not in LOAD_METHODS:
+        raise ValueError(f"Unknown load method {method!r} (expected one of {LOAD_METHODS})")
+    connections = connections or int(os.getenv("LOAD_CONNECTIONS", 1))
     print("Loading data into Database...")
     
     # Export unknown products for manual labeling
-    export_unknown_products(df_raw, df_enriched)
+    n_unknown = export_unknown_products(df_raw, df_enriched, append=append_unknowns)
     
     # FILTER: Only keep high-confidence/known items
     # Since in run_pipeline both are the same DF, we just filter it
@@ -81,94 +406,26 @@ def load_data(df_raw, df_enriched):
 
     if len(df_final) == 0:
         print("No valid records (known brand/type) to load. Database remains untouched.")
-        return
+        return n_unknown
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
+    database = db.get_database()
     try:
-        # 1. Insert Raw Products (Filtered)
-        raw_rows = []
-        for idx, row in df_final.iterrows():
-            discount_val = float(row['discount'])
-            if discount_val > 1.0:
-                discount_val = discount_val / 100.0
-            
-            raw_rows.append((
-                row['content_hash'],
-                row['name'],
-                row['sold_quantity'],
-                row['price_current'],
-                row['price_original'],
-                discount_val,
-                row['rating'],
-                row.get('url', ''),
-                row.get('image', ''),
-                row.get('source', 'tiktok') # Default to tiktok if column missing
-            ))
-            
-        insert_raw_query = """
-            INSERT INTO raw_products (content_hash, title_raw, quantity_sold, price_current, price_original, discount, rating, url, image_url, source)
-            VALUES %s
-            ON CONFLICT (content_hash) DO UPDATE SET
-                quantity_sold = EXCLUDED.quantity_sold,
-                price_current = EXCLUDED.price_current,
-                price_original = EXCLUDED.price_original,
-                discount = EXCLUDED.discount,
-                rating = EXCLUDED.rating,
-                image_url = EXCLUDED.image_url,
-                source = EXCLUDED.source,
-                updated_at = NOW()
-            RETURNING id, content_hash;
-        """
-        
-        execute_values(cur, insert_raw_query, raw_rows)
-        
-        # Mapping for enriched link
-        cur.execute("SELECT content_hash, id FROM raw_products WHERE content_hash IN %s", (tuple(df_final['content_hash']),))
-        mapping = dict(cur.fetchall())
-        
-        # 2. Insert Enriched Products
-        enriched_rows = []
-        for idx, row in df_final.iterrows():
-            raw_id = mapping.get(row['content_hash'])
-            if raw_id:
-                effective = float(row['price_current'])
-                brand_conf = row.get('brand_confidence', 0.0)
-                type_conf = row.get('product_type_confidence', 0.0)
-                overall_conf = (brand_conf * 0.6) + (type_conf * 0.4)
-                
-                enriched_rows.append((
-                    str(raw_id),
-                    row['title_cleaned'],
-                    row['brand'],
-                    row['product_type'],
-                    effective,
-                    brand_conf,
-                    type_conf,
-                    overall_conf
-                ))
-        
-        insert_enriched_query = """
-            INSERT INTO enriched_products (raw_product_id, title_cleaned, brand, product_type, price_effective, brand_confidence, product_type_confidence, enrichment_confidence)
-            VALUES %s
-            ON CONFLICT (raw_product_id) DO UPDATE SET
-                title_cleaned = EXCLUDED.title_cleaned,
-                brand = EXCLUDED.brand,
-                product_type = EXCLUDED.product_type,
-                enriched_at = NOW();
-        """
-        
-        if enriched_rows:
-            execute_values(cur, insert_enriched_query, enriched_rows)
-            
-        conn.commit()
-        print("Database update successful.")
+        start = time.perf_counter()
+        stage = staged_rows(df_final)
+        if connections > 1:
+            counts, method, connections = upsert_partitions(database, stage, method, connections)
+        else:
+            counts, method = upsert_stage(database, stage, method)
+        elapsed = time.perf_counter() - start
+        print(f"Database update successful: {counts.staged} rows via {method}"
+              f"{f' on {connections} connections' if connections > 1 else ''} "
+              f"in {elapsed:.2f}s ({counts.staged / elapsed if elapsed else 0:,.0f} rows/sec)")
+        print(f"  raw_products: {counts.raw_inserted} inserted, {counts.raw_updated} updated, "
+              f"{counts.raw_skipped} unchanged")
+        print(f"  enriched_products: {counts.enriched_inserted} inserted, {counts.enriched_updated} updated, "
+              f"{counts.enriched_skipped} unchanged")
+        return n_unknown
         
     except Exception as e:
-        conn.rollback()
         print(f"Error loading data: {e}")
         raise
-    finally:
-        cur.close()
-        conn.close()
@@ -0,0 +1,171 @@
+"""
+Layer 3 similarity fallback: character n-gram TF-IDF over the taxonomy.
+
+Titles that the dictionary and fuzzy layers leave unknown are compared against
+every brand alias and every product type keyword by cosine similarity of
+char-trigram TF-IDF vectors. Everything is CPU-only and built from the taxonomy
+itself, so it works offline with no model downloads.
+
+A title is scored through its word windows (1..max_words consecutive tokens,
+where max_words is the longest entry in words, plus each multi-word window with
+its spaces removed), because an alias is a short
+string inside a long title and a whole-title vector would dilute it. Distinct
+windows of the whole batch are vectorized once and scored against all entries
+in one sparse matrix product; each window keeps only its top-k entries, and a
+title takes the best entry over its windows.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .extraction import MAX_SIMILAR_CONFIDENCE
+
+NGRAM = 3
+TOP_K = 3
+# Cosine similarity needed to accept a label (PRD FR-ENR-07 / FR-ENR-11)
+MIN_SCORE = 0.70
+
+def char_ngrams(text: str, n: int = NGRAM) -> list:
+    padded = f" {text} "
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+class NgramTfidfIndex:
+    """TF-IDF vectors of labeled entries (aliases or keywords), precomputed as a sparse matrix."""
+
+    def __init__(self, entries, labels, n: int = NGRAM):
+        """entries: strings in precedence order; labels: the label of each entry."""
+        self.entries = list(entries)
+        self.labels = np.asarray(labels, dtype=object)
+        self.n = n
+        self.max_words = max((len(e.split()) for e in self.entries), default=1)
+
+        docs = [char_ngrams(e, n) for e in self.entries]
+        self.vocab = {}
+        df = []
+        for grams in docs:
+            for gram in set(grams):
+                col = self.vocab.setdefault(gram, len(self.vocab))
+                if col == len(df):
+                    df.append(0)
+                df[col] += 1
+        # Smoothed idf; grams no entry contains get the idf of df = 0
+        n_docs = len(docs)
+        self.idf = np.log((1 + n_docs) / (1 + np.asarray(df, dtype=np.float64))) + 1
+        self.unseen_idf = math.log(1 + n_docs) + 1
+
+        self.matrix = self._vectorize(docs).T.tocsr()  # vocab x entries
+
+    def _vectorize(self, docs) -> sparse.csr_matrix:
+        """L2-normalized TF-IDF rows over the index vocabulary (unseen grams still count in the norm)."""
+        indptr, indices, data = [0], [], []
+        vocab, idf, unseen = self.vocab, self.idf, self.unseen_idf
+        for grams in docs:
+            counts = {}
+            for gram in grams:
+                counts[gram] = counts.get(gram, 0) + 1
+            norm_sq = 0.0
+            row_cols, row_vals = [], []
+            for gram, tf in counts.items():
+                col = vocab.get(gram)
+                weight = tf * (idf[col] if col is not None else unseen)
+                norm_sq += weight * weight
+                if col is not None:
+                    row_cols.append(col)
+                    row_vals.append(weight)
+            norm = math.sqrt(norm_sq) or 1.0
+            indices.extend(row_cols)
+            data.extend(v / norm for v in row_vals)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(docs), len(self.vocab)),
+        )
+
+    def _windows(self, title) -> list:
+        # Callers holding a tokenized batch pass the token list instead of the string
+        tokens = title.split() if isinstance(title, str) else title
+        windows = []
+        for w in range(1, self.max_words + 1):
+            for i in range(len(tokens) - w + 1):
+                windows.append(" ".join(tokens[i:i + w]))
+                if w > 1:
+                    # Sellers split and glue words freely ("skin tific", "msglow")
+                    windows.append("".join(tokens[i:i + w]))
+        return windows
+
+    def top_k(self, titles, k: int = TOP_K, min_score: float = MIN_SCORE):
+        """
+        Best entries per title: (title_idx, entry_idx, score) arrays sorted by
+        title, then score descending, then entry precedence; at most k rows per
+        title, all with score >= min_score.
+        """
+        title_idx, windows = [], []
+        for i, title in enumerate(titles):
+            ws = self._windows(title)
+            windows.extend(ws)
+            title_idx.extend([i] * len(ws))
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+        if not windows:
+            return empty
+
+        codes, unique = pd.factorize(np.asarray(windows, dtype=object))
+        scores = (self._vectorize([char_ngrams(w, self.n) for w in unique]) @ self.matrix).tocoo()
+        keep = scores.data >= min_score
+        w_row, w_entry, w_score = scores.row[keep], scores.col[keep], scores.data[keep]
+        if not len(w_row):
+            return empty
+
+        # Top-k entries per distinct window
+        order = np.lexsort((w_entry, -w_score, w_row))
+        w_row, w_entry, w_score = w_row[order], w_entry[order], w_score[order]
+        w_row, w_entry, w_score = (a[_first_k(w_row, k)] for a in (w_row, w_entry, w_score))
+
+        # Fan window candidates out to the titles containing the window
+        starts = np.searchsorted(w_row, np.arange(len(unique)))
+        counts = np.searchsorted(w_row, np.arange(len(unique)), side='right') - starts
+        title_idx = np.asarray(title_idx, dtype=np.int64)
+        n_cand = counts[codes]
+        rows = np.repeat(np.arange(len(codes)), n_cand)
+        offsets = np.arange(n_cand.sum()) - np.repeat(np.cumsum(n_cand) - n_cand, n_cand)
+        cand = starts[codes][rows] + offsets
+        t_idx, t_entry, t_score = title_idx[rows], w_entry[cand], w_score[cand]
+
+        # Top-k distinct entries per title
+        order = np.lexsort((t_entry, -t_score, t_idx))
+        t_idx, t_entry, t_score = t_idx[order], t_entry[order], t_score[order]
+        # (keeping the highest-scoring window of each entry)
+        dedup = ~pd.DataFrame({'t': t_idx, 'e': t_entry}).duplicated().to_numpy()
+        t_idx, t_entry, t_score = t_idx[dedup], t_entry[dedup], t_score[dedup]
+        first = _first_k(t_idx, k)
+        return t_idx[first], t_entry[first].astype(np.int64), t_score[first]
+
+    def best(self, titles, min_score: float = MIN_SCORE):
+        """(labels, scores) per title; "unknown" / 0.0 where nothing reaches min_score."""
+        labels = np.full(len(titles), "unknown", dtype=object)
+        scores = np.zeros(len(titles))
+        t_idx, entry, score = self.top_k(titles, k=1, min_score=min_score)
+        labels[t_idx] = self.labels[entry]
+        scores[t_idx] = score
+        return labels, scores
+
+def _first_k(groups: np.ndarray, k: int) -> np.ndarray:
+    """Mask of the first k rows of each run of equal values in a sorted array."""
+    if not len(groups):
+        return np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    run_start = np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+    return np.arange(len(groups)) - run_start < k
+
+class SimilarityFallback:
+    """Brand and product type indexes for one compiled taxonomy."""
+
+    max_confidence = MAX_SIMILAR_CONFIDENCE
+
+    def __init__(self, compiled):
+        self.brands = NgramTfidfIndex(compiled.fuzzy_aliases, compiled.fuzzy_alias_brands)
+        keywords = [(kw, category)
+                    for category, config in compiled.product_types.items()
+                    for kw in config["keywords"]]
+        self.types = NgramTfidfIndex([kw for kw, _ in keywords], [cat for _, cat in keywords])
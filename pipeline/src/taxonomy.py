@@ -0,0 +1,409 @@
+"""
+Brand / product type / blocklist taxonomy: versioned data plus a compiled artifact.
+
+The taxonomy lives in taxonomy/taxonomy.json (edited by train_logic.py, reviewed
+like any other data change). compile_taxonomy.py - and only it - turns it into a
+binary artifact: the taxonomy itself plus the fused Aho-Corasick automaton and
+the fuzzy alias bigram postings as raw integer arrays. Loading maps the file and
+matches straight from those arrays; nothing in it is unpickled or executed,
+because the artifact directory is shared through the CI cache and its contents
+are not trusted. The cheap derived tables (type resolution, token phrases,
+fuzzy length groups) are rebuilt on load.
+
+The artifact header records a digest of the taxonomy it was built from and a
+SHA-256 checksum of the rest of the file; a stale, corrupt or missing artifact
+is ignored and the taxonomy compiled in memory (importing never writes it).
+
+A long-running process can follow taxonomy updates with TaxonomyWatcher, which
+compiles each new version in a separate process, loads and warms it in the
+background and hands the result to a swap callback (extraction.activate).
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from . import automaton, fuzzy
+from .automaton import AhoCorasick
+from .fuzzy import FuzzyAliasIndex
+from .tokens import TokenMatcher
+
+PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TAXONOMY_PATH = os.path.join(PIPELINE_DIR, 'taxonomy', 'taxonomy.json')
+DEFAULT_ARTIFACT_PATH = os.path.normpath(os.path.join(
+    PIPELINE_DIR, '..', 'data', 'cache', 'taxonomy.bin'
+))
+COMPILE_SCRIPT = os.path.join(PIPELINE_DIR, 'compile_taxonomy.py')
+
+# Bump when the artifact layout or the automaton arrays change
+ARTIFACT_FORMAT = 4
+_MAGIC = b'MDTAX%03d' % ARTIFACT_FORMAT
+# magic, taxonomy digest, SHA-256 of everything after the header
+_HEADER_SIZE = len(_MAGIC) + 32 + 32
+_ALIGN = 8
+# Only plain integer arrays are read back from an artifact
+_ARTIFACT_DTYPES = ('|u1', '<i4', '<i8')
+
+DEFAULT_THRESHOLD = 85.0
+
+# Seconds between checks of the taxonomy file by TaxonomyWatcher
+WATCH_INTERVAL = 2.0
+# Share of the time TaxonomyWatcher's own work in this process may take (it
+# competes with enrichment for the GIL), pausing after every PACE_STEP seconds
+# of CPU; the compile child runs at CHILD_NICE, about the same share of a busy core
+WATCH_SHARE = 0.1
+PACE_STEP = 0.005
+CHILD_NICE = 10
+# CPU seconds spent replaying the active version's memoized tokens before a swap
+WARM_SECONDS = 0.25
+
+# Automaton channels
+BRAND, TYPE, BLOCK = 0, 1, 2
+
+def taxonomy_path() -> str:
+    return os.getenv("TAXONOMY_PATH") or DEFAULT_TAXONOMY_PATH
+
+def artifact_path() -> str:
+    return os.getenv("TAXONOMY_ARTIFACT_PATH") or DEFAULT_ARTIFACT_PATH
+
+def read_taxonomy(path=None) -> dict:
+    with open(path or taxonomy_path(), encoding='utf-8') as f:
+        return json.load(f)
+
+def write_taxonomy(data: dict, path=None):
+    path = path or taxonomy_path()
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(tmp, path)
+
+def _no_pause():
+    pass
+
+class _Pacer:
+    """
+    Called between small steps of background work; once the calling thread has
+    used PACE_STEP of CPU time it sleeps long enough to keep that work at
+    `share` of the time (waiting on a child process or the GIL is not work).
+    """
+
+    def __init__(self, share: float = WATCH_SHARE, stop: threading.Event = None):
+        self.share = share
+        self._stop = stop or threading.Event()
+        self._since = time.thread_time()
+
+    def __call__(self):
+        worked = time.thread_time() - self._since
+        if worked >= PACE_STEP:
+            self._stop.wait(worked * (1 - self.share) / self.share)
+            self._since = time.thread_time()
+
+def taxonomy_digest(data: dict) -> bytes:
+    # Key order is significant (dictionary order is match precedence), so no sort_keys
+    payload = json.dumps([ARTIFACT_FORMAT, data], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).digest()
+
+class CompiledTaxonomy:
+    """Everything extraction needs to classify titles under one taxonomy version."""
+
+    def __init__(self, data: dict, classifier: AhoCorasick = None, fuzzy_arrays: dict = None,
+                 pause=None):
+        """`pause` is called between the build steps (see TaxonomyWatcher)."""
+        pause = pause or _no_pause
+        self.data = data
+        self.version = data.get('version', 0)
+        self.digest = taxonomy_digest(data)
+        self.brands = data['brands']
+        self.product_types = data['product_types']
+        self.non_skincare_keywords = data['non_skincare_keywords']
+
+        # Brand aliases are ranked by their brand's position in the dictionary, so
+        # the lowest rank found is the first brand in dictionary order.
+        self.brand_names = list(self.brands)
+
+        # Type keywords are ranked by the resolution order (priority, then longest
+        # keyword, then table order), so the lowest rank found is the winning category.
+        type_entries = sorted(
+            (config["priority"], -len(keyword), cat_order, kw_order, category)
+            for cat_order, (category, config) in enumerate(self.product_types.items())
+            for kw_order, keyword in enumerate(config["keywords"])
+        )
+        self.type_categories = [entry[4] for entry in type_entries]
+        self.type_confidences = [0.90 if entry[0] == 1 else 0.75 for entry in type_entries]
+        pause()
+
+        # Fused dictionary matcher: brand aliases, product type keywords and the
+        # non-skincare blocklist in one automaton with a channel each, so a
+        # title is scanned once for all three.
+        patterns = (
+            [(alias, rank, BRAND)
+             for rank, aliases in enumerate(self.brands.values())
+             for alias in aliases]
+            + [(self.product_types[category]["keywords"][kw_order], rank, TYPE)
+               for rank, (_, _, _, kw_order, category) in enumerate(type_entries)]
+            + [(keyword, 0, BLOCK) for keyword in self.non_skincare_keywords]
+        )
+        self.classifier = classifier or AhoCorasick(patterns, channels=3)
+        pause()
+        # The same matcher over tokenized batches (scans each distinct token once)
+        self.token_matcher = TokenMatcher(self.classifier, patterns)
+        pause()
+
+        # Fuzzy layer: aliases in (brand, alias) precedence order, one index per threshold
+        self.fuzzy_aliases = [alias for aliases in self.brands.values() for alias in aliases]
+        self.fuzzy_alias_brands = [brand for brand, aliases in self.brands.items() for _ in aliases]
+        self._fuzzy_indexes = {}
+        self._fuzzy_arrays = fuzzy_arrays
+        self.fuzzy_index(DEFAULT_THRESHOLD)
+        self._similarity = None
+        pause()
+
+    def fuzzy_index(self, threshold: float) -> FuzzyAliasIndex:
+        index = self._fuzzy_indexes.get(threshold)
+        if index is None:
+            # Every threshold shares the bigram postings of the first index
+            index = self._fuzzy_indexes[threshold] = FuzzyAliasIndex(
+                self.fuzzy_aliases, threshold, arrays=self._fuzzy_arrays)
+            self._fuzzy_arrays = index.arrays()
+        return index
+
+    def similarity(self):
+        """TF-IDF fallback indexes (src.similarity), built on first use."""
+        if self._similarity is None:
+            from .similarity import SimilarityFallback
+            self._similarity = SimilarityFallback(self)
+        return self._similarity
+
+    def warm(self, previous: "CompiledTaxonomy", pause=None, seconds: float = WARM_SECONDS):
+        """
+        Build the indexes `previous` has built and run the tokens it memoized
+        (latest first, for up to `seconds` of this thread's CPU time) through
+        this version's matchers, so the first batches after a swap find warm
+        memos. `pause` is called between tokens.
+        """
+        pause = pause or _no_pause
+        deadline = time.thread_time() + seconds
+
+        def paced(tokens):
+            for token in reversed(tokens):
+                if time.thread_time() >= deadline:
+                    return
+                pause()
+                yield token
+
+        indexes = list(previous._fuzzy_indexes.items())
+        for threshold, _ in indexes:
+            self.fuzzy_index(threshold)
+            pause()
+        if previous._similarity is not None:
+            self.similarity()
+            pause()
+        self.token_matcher.warm(paced(previous.token_matcher.seen_tokens()))
+        for threshold, index in indexes:
+            self.fuzzy_index(threshold).warm(paced(index.seen_tokens()))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Only the prebuilt default-threshold index goes to worker processes;
+        # the similarity fallback is optional and needs scipy, so it is rebuilt on use
+        state['_fuzzy_indexes'] = {DEFAULT_THRESHOLD: self._fuzzy_indexes[DEFAULT_THRESHOLD]}
+        state['_similarity'] = None
+        return state
+
+def compile_taxonomy(data: dict) -> CompiledTaxonomy:
+    return CompiledTaxonomy(data)
+
+def save_artifact(compiled: CompiledTaxonomy, path=None):
+    """Write `compiled` as an artifact (compile_taxonomy.py / TaxonomyWatcher only)."""
+    path = path or artifact_path()
+    arrays = {'taxonomy': np.frombuffer(json.dumps(compiled.data, ensure_ascii=False).encode('utf-8'),
+                                        dtype=np.uint8)}
+    arrays.update((f'automaton.{name}', array) for name, array in compiled.classifier.arrays().items())
+    arrays.update((f'fuzzy.{name}', array)
+                  for name, array in compiled.fuzzy_index(DEFAULT_THRESHOLD).arrays().items())
+
+    toc, blobs, offset = [], [], 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        toc.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        blob = array.tobytes()
+        blobs.append(blob + b'\0' * (-len(blob) % _ALIGN))
+        offset += len(blobs[-1])
+    toc = json.dumps(toc).encode('utf-8')
+    toc += b' ' * (-(len(toc) + 4) % _ALIGN)
+    payload = len(toc).to_bytes(4, 'little') + toc + b''.join(blobs)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(compiled.digest)
+        f.write(hashlib.sha256(payload).digest())
+        f.write(payload)
+    # Readers either see the old artifact or the complete new one
+    os.replace(tmp, path)
+
+def _map_arrays(path) -> dict:
+    """The artifact's arrays as read-only views of the mapped file (checksum verified)."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(_MAGIC)] != _MAGIC:
+        raise ValueError("not a taxonomy artifact of this format")
+    with memoryview(mm) as view, view[_HEADER_SIZE:] as payload:
+        if hashlib.sha256(payload).digest() != mm[len(_MAGIC) + 32:_HEADER_SIZE]:
+            raise ValueError("artifact checksum mismatch")
+    toc_len = int.from_bytes(mm[_HEADER_SIZE:_HEADER_SIZE + 4], 'little')
+    start = _HEADER_SIZE + 4 + toc_len
+    arrays = {}
+    for entry in json.loads(mm[_HEADER_SIZE + 4:start]):
+        if entry['dtype'] not in _ARTIFACT_DTYPES:
+            raise ValueError(f"unexpected dtype {entry['dtype']!r} in artifact")
+        shape = tuple(int(n) for n in entry['shape'])
+        # The views keep the mapping open for as long as the automaton uses them
+        arrays[entry['name']] = np.frombuffer(mm, dtype=entry['dtype'], count=int(np.prod(shape)),
+                                              offset=start + int(entry['offset'])).reshape(shape)
+    return arrays
+
+def load_artifact(path=None, digest=None, pause=None):
+    """
+    Map a compiled artifact: the automaton scans from the mapped arrays and the
+    rest is rebuilt from the embedded taxonomy. Returns None if the file is
+    missing, from another format, corrupt, or (when `digest` is given) built
+    from a different taxonomy. `pause` is called between the load steps.
+    """
+    path = path or artifact_path()
+    pause = pause or _no_pause
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                return None
+            built_from = f.read(32)
+        if digest is not None and built_from != digest:
+            return None
+        arrays = _map_arrays(path)
+        pause()
+        data = json.loads(arrays.pop('taxonomy').tobytes().decode('utf-8'))
+        pause()
+        classifier = AhoCorasick.from_arrays(
+            {name: arrays[f'automaton.{name}'] for name in automaton.ARRAYS})
+        fuzzy_arrays = {name: arrays[f'fuzzy.{name}'] for name in fuzzy.ARRAYS}
+        compiled = CompiledTaxonomy(data, classifier=classifier, fuzzy_arrays=fuzzy_arrays, pause=pause)
+    except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError, ImportError):
+        # Artifacts from older layouts or damaged caches are ignored, never fatal
+        return None
+    # The automaton must belong to the taxonomy stored next to it
+    return compiled if compiled.digest == built_from else None
+
+def load(path=None, artifact=None) -> CompiledTaxonomy:
+    """
+    Compiled taxonomy for the JSON at `path`: from the artifact when it is up to
+    date, otherwise compiled in memory. Never writes the artifact; run
+    compile_taxonomy.py (or train_logic.py) for that.
+    """
+    data = read_taxonomy(path)
+    digest = taxonomy_digest(data)
+    compiled = load_artifact(artifact, digest)
+    if compiled is None:
+        compiled = compile_taxonomy(data)
+    return compiled
+
+class TaxonomyWatcher:
+    """
+    Polls the taxonomy JSON and, when a version with a new digest is saved,
+    builds its matchers off the hot path and passes them to `on_swap`.
+
+    The build runs in a child process (compile_taxonomy.py, at CHILD_NICE), so
+    it never holds this process's GIL; the watcher thread only maps the
+    finished artifact and rebuilds its small derived tables (tens of
+    milliseconds at 5,000 brands). If train_logic.py already compiled an
+    up-to-date artifact, that is reused. With `active` (returns the taxonomy in
+    use), the new version's per-token memos are filled from the active one's
+    before the swap (CompiledTaxonomy.warm), so the swap itself costs the hot
+    path nothing. All of this in-process work is paced to WATCH_SHARE of the
+    time, so enrichment keeps running while a reload is prepared.
+    """
+
+    def __init__(self, on_swap, current: bytes = None, path=None, artifact=None,
+                 interval: float = WATCH_INTERVAL, active=None):
+        self.on_swap = on_swap
+        self.current = current
+        self.active = active
+        self.path = path or taxonomy_path()
+        self.artifact = artifact or artifact_path()
+        self.interval = interval
+        self.reloads = 0
+        self._stat = self._file_stat()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _build(self, digest: bytes, pause=None) -> CompiledTaxonomy:
+        compiled = load_artifact(self.artifact, digest, pause)
+        if compiled is None:
+            # Niced from the start, so its interpreter startup and imports are paced too
+            nice = ["nice", "-n", str(CHILD_NICE)] if shutil.which("nice") else []
+            subprocess.run(
+                nice + [sys.executable, COMPILE_SCRIPT, "--taxonomy", self.path, "--output", self.artifact],
+                check=True, capture_output=True,
+            )
+            compiled = load_artifact(self.artifact, digest, pause)
+        if compiled is None:
+            raise RuntimeError(f"compiled artifact {self.artifact} does not match {self.path}")
+        return compiled
+
+    def check(self) -> bool:
+        """Poll once; returns True if a new taxonomy was swapped in."""
+        stat = self._file_stat()
+        if stat is None or stat == self._stat:
+            return False
+        self._stat = stat
+
+        try:
+            data = read_taxonomy(self.path)
+        except ValueError:
+            return False  # caught mid-edit; the next save changes the stat again
+        digest = taxonomy_digest(data)
+        if digest == self.current:
+            return False
+
+        pause = _Pacer(stop=self._stop)
+        compiled = self._build(digest, pause)
+        if self.active is not None:
+            compiled.warm(self.active(), pause)
+        self.on_swap(compiled)
+        self.current = digest
+        self.reloads += 1
+        print(f"Taxonomy reloaded: v{compiled.version} ({len(compiled.brands)} brands, "
+              f"{len(compiled.fuzzy_aliases)} aliases)")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the current taxonomy; a later save will be retried
+                print(f"Taxonomy reload failed, keeping current version: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="taxonomy-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
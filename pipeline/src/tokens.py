@@ -0,0 +1,186 @@
+"""
+Shared per-title token representation for the extraction layers.
+
+A batch of match titles is split once into interned tokens: a vocabulary of
+distinct token strings, one int32 token id per token occurrence and an offsets
+array (title i owns ids[offsets[i]:offsets[i + 1]]). The dictionary layers
+(brand aliases, type keywords, blocklist) and the fuzzy layer then work per
+distinct token and combine per title with NumPy reductions, instead of each
+layer re-scanning or re-splitting every title string.
+
+Dictionary matching keeps the substring semantics of the string automaton:
+a pattern without spaces can only occur inside one token, so scanning each
+distinct token once covers it; a pattern with spaces ("hand body") occurs
+exactly where consecutive tokens end with its first word, equal its middle
+words and start with its last word.
+"""
+import numpy as np
+
+from .automaton import NO_MATCH
+
+# Distinct tokens remembered per matcher before the memo is reset
+MEMO_LIMIT = 500_000
+
+class TokenizedTitles:
+    """Interned tokens of a batch of titles: vocab, ids (int32) and offsets (int64, len n + 1)."""
+
+    __slots__ = ('vocab', 'index', 'ids', 'offsets', 'canonical', '_title_of')
+
+    def __init__(self, vocab, index, ids, offsets, canonical):
+        self.vocab = vocab
+        self.index = index
+        self.ids = ids
+        self.offsets = offsets
+        # False where the title is not its tokens joined by single spaces
+        # (other whitespace, runs of spaces); only the string automaton is exact there
+        self.canonical = canonical
+        self._title_of = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def tokens(self, i: int) -> list:
+        return [self.vocab[t] for t in self.ids[self.offsets[i]:self.offsets[i + 1]]]
+
+    @property
+    def title_of(self) -> np.ndarray:
+        """Title number of every token occurrence."""
+        if self._title_of is None:
+            self._title_of = np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+        return self._title_of
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.offsets.nbytes + self.canonical.nbytes + sum(map(len, self.vocab))
+
+def tokenize(titles) -> TokenizedTitles:
+    index = {}
+    vocab = []
+    ids = []
+    lengths = []
+    canonical = []
+    for title in titles:
+        tokens = title.split()
+        for token in tokens:
+            token_id = index.get(token)
+            if token_id is None:
+                token_id = index[token] = len(vocab)
+                vocab.append(token)
+            ids.append(token_id)
+        lengths.append(len(tokens))
+        gaps = max(len(tokens) - 1, 0)
+        canonical.append(title.count(' ') == gaps and len(title) == sum(map(len, tokens)) + gaps)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return TokenizedTitles(vocab, index, np.asarray(ids, dtype=np.int32), offsets,
+                           np.asarray(canonical, dtype=bool))
+
+def segment_min(values: np.ndarray, offsets: np.ndarray, empty) -> np.ndarray:
+    """Per-title minimum of per-token `values` (first axis); `empty` for titles without tokens."""
+    n = len(offsets) - 1
+    out = np.full((n,) + values.shape[1:], empty, dtype=values.dtype)
+    nonempty = offsets[1:] > offsets[:-1]
+    if nonempty.any():
+        out[nonempty] = np.minimum.reduceat(values, offsets[:-1][nonempty], axis=0)
+    return out
+
+class TokenMatcher:
+    """Lowest rank per channel over a tokenized batch, equal to AhoCorasick.min_ranks per title."""
+
+    def __init__(self, automaton, patterns):
+        """`patterns`: the (pattern, rank, channel) entries the automaton was built from."""
+        self.automaton = automaton
+        self.channels = automaton.channels
+        lowest = {}
+        for pattern, rank, channel in patterns:
+            if ' ' in pattern:
+                key = (pattern, channel)
+                lowest[key] = min(rank, lowest.get(key, NO_MATCH))
+        # Multi-word patterns as (words, rank, channel). Tuples all the way down:
+        # the garbage collector stops tracking them, so loading a new taxonomy
+        # in a long-running process does not set off a full collection.
+        self.phrases = [(tuple(pattern.split(' ')), rank, channel)
+                        for (pattern, channel), rank in lowest.items()]
+        # Phrase ids by first / last word, so a token only looks up its own suffixes / prefixes
+        by_first, by_last = {}, {}
+        for p, (words, _, _) in enumerate(self.phrases):
+            by_first.setdefault(words[0], []).append(p)
+            by_last.setdefault(words[-1], []).append(p)
+        self._by_first = {word: tuple(ids) for word, ids in by_first.items()}
+        self._by_last = {word: tuple(ids) for word, ids in by_last.items()}
+        self._memo = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        return state
+
+    def _token_info(self, token: str):
+        """(per-channel ranks inside the token, phrases it can open, phrases it can close)."""
+        info = self._memo.get(token)
+        if info is None:
+            by_first, by_last = self._by_first, self._by_last
+            opens = tuple(sorted(p for i in range(len(token)) for p in by_first.get(token[i:], ())))
+            closes = tuple(sorted(p for i in range(1, len(token) + 1) for p in by_last.get(token[:i], ())))
+            info = (self.automaton.min_ranks(token), opens, closes)
+            if len(self._memo) >= MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[token] = info
+        return info
+
+    def seen_tokens(self) -> list:
+        """Tokens currently in the memo (a snapshot; safe while another thread matches)."""
+        return list(self._memo)
+
+    def warm(self, tokens):
+        """Memoize `tokens` ahead of the batches that will bring them."""
+        for token in tokens:
+            self._token_info(token)
+
+    def min_ranks(self, tokenized: TokenizedTitles) -> np.ndarray:
+        """(n_titles, channels) int64 array of the lowest rank found per channel, NO_MATCH if none."""
+        infos = [self._token_info(token) for token in tokenized.vocab]
+        ids = tokenized.ids
+        if infos:
+            token_ranks = np.array([info[0] for info in infos], dtype=np.int64).reshape(len(infos), self.channels)
+        else:
+            token_ranks = np.empty((0, self.channels), dtype=np.int64)
+        result = segment_min(token_ranks[ids], tokenized.offsets, NO_MATCH)
+
+        if self.phrases and len(ids) > 1:
+            self._match_phrases(tokenized, infos, result)
+        return result
+
+    def _match_phrases(self, tokenized, infos, result):
+        ids, title_of = tokenized.ids, tokenized.title_of
+        # Only the phrases some token of this batch can open are looked at
+        opens, closes = {}, {}
+        for token_id, (_, opened, closed) in enumerate(infos):
+            for p in opened:
+                opens.setdefault(p, []).append(token_id)
+            for p in closed:
+                closes.setdefault(p, []).append(token_id)
+
+        # Positions whose token opens any phrase; each phrase only looks at these
+        opens_any = np.zeros(len(infos), dtype=bool)
+        opens_any[[t for ts in opens.values() for t in ts]] = True
+        candidates = np.flatnonzero(opens_any[ids[:-1]])
+        if not len(candidates):
+            return
+
+        for p in opens.keys() & closes.keys():
+            words, rank, channel = self.phrases[p]
+            last = len(words) - 1
+            opens_p = np.zeros(len(infos), dtype=bool)
+            opens_p[opens[p]] = True
+            closes_p = np.zeros(len(infos), dtype=bool)
+            closes_p[closes[p]] = True
+
+            pos = candidates[opens_p[ids[candidates]]]
+            pos = pos[pos + last < len(ids)]
+            ok = closes_p[ids[pos + last]] & (title_of[pos] == title_of[pos + last])
+            for j, word in enumerate(words[1:-1], 1):
+                ok &= ids[pos + j] == tokenized.index.get(word, -1)
+            hit = title_of[pos[ok]]
+            if len(hit):
+                column = result[:, channel]
+                np.minimum.at(column, hit, rank)
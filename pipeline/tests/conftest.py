@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make `src` and `benchmarks` importable the same way run_pipeline.py does
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,96 @@
+import pandas as pd
+
+from src import cache, cleaning, extraction, parallel, taxonomy
+from benchmarks.common import synthetic_frame, synthetic_titles
+
+def _plain(df):
+    return extraction.enrich_data(cleaning.normalize_data(df))
+
+def test_warm_run_matches_plain_pipeline(tmp_path):
+    base = synthetic_frame(500, unique_ratio=0.5)
+    expected = _plain(base.copy())
+    path = str(tmp_path / "titles.sqlite")
+
+    cold = cache.TitleCache(path)
+    cache.normalize_and_enrich(base.copy(), cold)
+    assert cold.hits == 0 and cold.misses == base['name'].nunique()
+    cold.close()
+
+    warm = cache.TitleCache(path)
+    result = cache.normalize_and_enrich(base.copy(), warm)
+    assert warm.misses == 0 and warm.hit_rate() == 1.0
+    warm.close()
+
+    for col in cache.CACHED_COLUMNS + ['sold_quantity', 'rating']:
+        assert result[col].tolist() == expected[col].tolist(), col
+
+def test_non_string_names_match_plain_pipeline(tmp_path):
+    # e.g. a name column read_csv parsed as numbers
+    base = pd.DataFrame({'name': [12345, 6.5, "Wardah Lightening Serum 30ml", 12345],
+                         'sold_quantity': 0, 'rating': 0.0})
+    expected = _plain(base.copy())
+    title_cache = cache.TitleCache(str(tmp_path / "titles.sqlite"))
+    result = cache.normalize_and_enrich(base.copy(), title_cache)
+    title_cache.close()
+    for col in cache.CACHED_COLUMNS:
+        assert result[col].tolist() == expected[col].tolist(), col
+
+def test_taxonomy_change_invalidates_entries(tmp_path):
+    base = synthetic_frame(50)
+    path = str(tmp_path / "titles.sqlite")
+
+    first = cache.TitleCache(path, version="v1")
+    cache.normalize_and_enrich(base.copy(), first)
+    first.close()
+
+    second = cache.TitleCache(path, version="v2")
+    cache.normalize_and_enrich(base.copy(), second)
+    assert second.hits == 0
+    assert second.conn.execute("SELECT COUNT(*) FROM title_cache WHERE taxonomy_version = 'v1'").fetchone()[0] == 0
+    second.close()
+
+def test_parallel_workers_match_serial():
+    base = synthetic_frame(400, unique_ratio=0.7)
+    expected = _plain(base.copy())
+    result = cache.normalize_and_enrich(base.copy(), None, workers=2)
+    for col in cache.CACHED_COLUMNS:
+        assert result[col].tolist() == expected[col].tolist(), col
+
+def test_taxonomy_reload_drops_only_old_version(tmp_path):
+    base = synthetic_frame(60)
+    path = str(tmp_path / "titles.sqlite")
+    store = cache.TitleCache(path)
+    cache.normalize_and_enrich(base.copy(), store)
+    old = store.version
+    # An entry from another version (e.g. written by a concurrent run) survives the reload
+    store.conn.execute("INSERT INTO title_cache SELECT title_hash, 'other', title_match, title_cleaned, brand, "
+                       "product_type, brand_confidence, product_type_confidence FROM title_cache LIMIT 1")
+
+    original = extraction.active_taxonomy()
+    data = taxonomy.read_taxonomy()
+    data['brands'] = {"glowlab": ["glowlab"], **data['brands']}
+    try:
+        extraction.activate(taxonomy.compile_taxonomy(data))
+        cache.normalize_and_enrich(base.copy(), store)
+    finally:
+        extraction.activate(original)
+
+    counts = dict(store.conn.execute("SELECT taxonomy_version, COUNT(*) FROM title_cache GROUP BY 1").fetchall())
+    assert old not in counts and counts['other'] == 1
+    assert counts[store.version] == base['name'].nunique() and store.misses == 2 * base['name'].nunique()
+    store.close()
+
+def test_enrichment_pool_reused_until_taxonomy_changes(monkeypatch):
+    monkeypatch.setattr(parallel, "SERIAL_SAMPLE", 10)
+    titles = synthetic_titles(120, seed=3)
+    compiled = extraction.active_taxonomy()
+    expected = parallel.clean_and_enrich_titles(titles, 1, compiled)
+    with parallel.EnrichmentPool(2) as pool:
+        first = parallel.clean_and_enrich_titles(titles[:60], compiled=compiled, pool=pool)
+        second = parallel.clean_and_enrich_titles(titles[60:], compiled=compiled, pool=pool)
+        assert pool.starts == 1 and pool.serial_rate > 0
+        data = taxonomy.read_taxonomy()
+        data['version'] = data.get('version', 0) + 1
+        parallel.clean_and_enrich_titles(titles, compiled=taxonomy.CompiledTaxonomy(data), pool=pool)
+        assert pool.starts == 2
+    assert pd.concat([first, second], ignore_index=True).equals(expected)
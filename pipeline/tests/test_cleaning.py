@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from src import cleaning
+from benchmarks import legacy
+from benchmarks.common import synthetic_frame, synthetic_titles
+
+# Fragments chosen to make the noise patterns interact with each other
+_FRAGMENTS = ["[", "]", "(", ")", "|", "\n", " ", "  ", "\t", "BPOM", "COD", "cod",
+              "ready", "stock", "Ready Stock", "beli 2", "gratis 1", "free", "FREE",
+              "bonus", "new", "original", "flash", "sale", "best seller", "!!", "!",
+              "--", "-", "✨", "️", "​", "serum", "Wardah", "é", "ſale", "x"]
+
+def _legacy_clean(title):
+    return legacy.remove_noise(legacy.normalize_unicode(title))
+
+@pytest.mark.parametrize("title", [
+    "[BPOM] Wardah Serum (COD READY) | Free Pouch",
+    "ready[x]stock serum",
+    "(x [BPOM] y) toner",
+    "free [a|b] c",
+    "free (a|BPOM) toner",
+    "free ready\nstock x",
+    "Beli 2 Gratis 1 | bonus sample | Scarlett",
+    "NEW!!! Somethinc -- Serum ✨🔥",
+    "",
+    "   ",
+])
+def test_clean_title_matches_legacy(title):
+    assert cleaning.clean_title(title) == _legacy_clean(title)
+    assert cleaning.remove_noise(title) == legacy.remove_noise(title)
+
+def test_clean_title_matches_legacy_randomized():
+    rng = random.Random(0)
+    for _ in range(20000):
+        title = "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(1, 12)))
+        assert cleaning.clean_title(title) == _legacy_clean(title), repr(title)
+
+def test_clean_title_matches_legacy_synthetic():
+    for title in synthetic_titles(5000):
+        assert cleaning.clean_title(title) == _legacy_clean(title)
+
+def test_non_string_titles():
+    assert cleaning.clean_title(None) == ""
+    assert cleaning.clean_title(float("nan")) == ""
+
+def test_normalize_data_matches_legacy():
+    base = synthetic_frame(3000)
+    base.loc[0, 'name'] = None
+    base.loc[1, 'name'] = "ms  glow whitening glad2glow serum"
+    expected = legacy.normalize_data(base.copy())
+    result = cleaning.normalize_data(base.copy())
+
+    assert 'title_cleaned_temp' not in result.columns
+    for col in ['name', 'title_match', 'title_cleaned', 'sold_quantity', 'rating']:
+        assert result[col].tolist() == expected[col].tolist(), col
+    assert result.loc[1, 'title_cleaned'] == "MS Glow Whitening glad2glow Serum"
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from src import columnar, ingestion
+from benchmarks.common import synthetic_frame
+
+def test_to_table_fixed_schema():
+    df = synthetic_frame(50, seed=2).astype({'price_current': float, 'rating': object})
+    df.loc[0, 'price_current'] = 31_800.4
+    df.loc[1, 'rating'] = "N/A"
+    df.loc[2, 'name'] = None
+    df['shop_name'] = "extra column"
+    table = columnar.to_table(df.drop(columns=['source']))
+    assert table.schema == columnar.PRODUCT_SCHEMA
+    assert table['price_current'][0].as_py() == 31_800
+    # Missing or unparseable values are written as nulls, not placeholders
+    assert table['rating'][1].as_py() is None
+    assert table['name'][2].as_py() is None
+    assert set(table['source'].to_pylist()) == {None}
+
+@pytest.mark.parametrize("suffix", columnar.SUFFIXES)
+def test_ingest_columnar_matches_csv(tmp_path, suffix):
+    df = synthetic_frame(400, seed=8)
+    df.to_csv(tmp_path / "products.csv", index=False)
+    columnar.write_products(df, tmp_path / f"products{suffix}")
+
+    from_csv = ingestion.ingest_data(str(tmp_path / "products.csv"))
+    typed = ingestion.ingest_data(str(tmp_path / f"products{suffix}"))
+    # The dtype policy (src.dtypes) gives both the same lean frame
+    assert typed.dtypes.to_dict() == from_csv.dtypes.to_dict()
+    assert typed['rating'].dtype == np.float32 and isinstance(typed['source'].dtype, pd.CategoricalDtype)
+    assert typed['product_key'].tolist() == from_csv['product_key'].tolist()
+    assert typed['content_hash'].tolist() == from_csv['content_hash'].tolist()
+
+    streamed = pd.concat(list(ingestion.iter_chunks(str(tmp_path / f"products{suffix}"), chunksize=64)))
+    assert streamed['product_key'].tolist() == typed['product_key'].tolist()
+
+@pytest.mark.parametrize("suffix", columnar.SUFFIXES)
+def test_missing_values_match_csv(tmp_path, suffix):
+    df = synthetic_frame(20, seed=9).astype({'rating': object})
+    df.loc[0, 'name'] = None
+    df.loc[1, 'url'] = None
+    df.loc[2, ['name', 'url']] = None
+    df.loc[3, 'rating'] = None
+    df.to_csv(tmp_path / "products.csv", index=False)
+    columnar.write_products(df, tmp_path / f"products{suffix}")
+
+    from_csv = ingestion.ingest_data(str(tmp_path / "products.csv"))
+    typed = ingestion.ingest_data(str(tmp_path / f"products{suffix}"))
+    assert typed['content_hash'].tolist() == from_csv['content_hash'].tolist()
+    assert typed['product_key'].tolist() == from_csv['product_key'].tolist()
+    assert np.isnan(typed['rating'].iloc[3]) and np.isnan(from_csv['rating'].iloc[3])
+
+def test_preferred_path_skips_stale_copies(tmp_path):
+    csv = tmp_path / "data_cleaned.csv"
+    df = synthetic_frame(10)
+    columnar.write_products(df, tmp_path / "data_cleaned.parquet")
+    assert columnar.preferred_path(csv) == str(tmp_path / "data_cleaned.parquet")
+    df.to_csv(csv, index=False)
+    # A CSV rewritten after the typed copy wins
+    os.utime(tmp_path / "data_cleaned.parquet", (0, 0))
+    assert columnar.preferred_path(csv) == str(csv)
+    assert pq.read_schema(tmp_path / "data_cleaned.parquet").field('source').type == columnar.PRODUCT_SCHEMA.field('source').type
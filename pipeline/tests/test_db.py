@@ -1,22 +1,41 @@
 import os
-import psycopg2
-from dotenv import load_dotenv
 
-# Load .env from parent directory
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+import pytest
 
-db_url = os.getenv("DATABASE_URL")
+from src import db
 
-print(f"Testing connection to: {db_url}")
+def test_sanitize_url_drops_driver_options():
+    url = "postgresql://u:p@host:6543/postgres?sslmode=require&statement_cache_mode=describe&default_query_exec_mode=simple_protocol"
+    assert db.sanitize_url(url) == "postgresql://u:p@host:6543/postgres?sslmode=require"
+    assert db.sanitize_url("postgresql://u:p@host/db?statement_cache_mode=describe") == "postgresql://u:p@host/db"
+    assert db.sanitize_url("postgresql://u:p@host/db") == "postgresql://u:p@host/db"
 
-try:
-    conn = psycopg2.connect(db_url)
-    print("Successfully connected to the database!")
-    cur = conn.cursor()
-    cur.execute("SELECT version();")
-    print(f"Database version: {cur.fetchone()}")
-    cur.close()
-    conn.close()
-except Exception as e:
-    print("Failed to connect!")
-    print(e)
+def test_prepared_statements_off_on_transaction_pooler(monkeypatch):
+    monkeypatch.delenv("DB_PREPARED", raising=False)
+    assert not db.prepared_allowed("postgresql://u:p@pooler.example.com:6543/postgres")
+    assert db.prepared_allowed("postgresql://u:p@db.example.com:5432/postgres")
+    monkeypatch.setenv("DB_PREPARED", "off")
+    assert not db.prepared_allowed("postgresql://u:p@db.example.com:5432/postgres")
+
+def test_statement_placeholders():
+    statement = db.Statement("pick", "SELECT %s::INT + %s::INT")
+    assert statement.n_params == 2
+    assert statement.prepare_sql == "PREPARE pick AS SELECT $1::INT + $2::INT"
+    assert statement.execute_sql == "EXECUTE pick (%s::INT, %s::INT)"
+    assert db.Statement("bare", "SELECT 1").execute_sql == "EXECUTE bare"
+
+@pytest.mark.skipif(not os.getenv("DATABASE_URL"), reason="DATABASE_URL not set")
+def test_connection():
+    database = db.Database()
+    try:
+        statement = db.Statement("test_db_add", "SELECT %s::INT + %s::INT")
+        for _ in range(2):
+            with database.transaction(statement_timeout="5s") as cur:
+                cur.execute("SHOW statement_timeout")
+                assert cur.fetchone()[0] == "5s"
+                statement.execute(cur, (2, 3))
+                assert cur.fetchone()[0] == 5
+        # Both transactions ran on the one pooled connection
+        assert database.stats()['connections'] == 1
+    finally:
+        database.close()
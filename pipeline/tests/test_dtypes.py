@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from src import cleaning, dtypes, extraction
+from benchmarks.common import synthetic_frame
+
+def test_policy_dtypes_and_dropped_columns():
+    df = synthetic_frame(200, seed=5).astype({'name': object, 'url': object})
+    df['shop_name'] = "extra column"
+    df.loc[0, 'url'] = None
+    lean = dtypes.ingested(df.copy())
+
+    assert 'shop_name' not in lean
+    assert lean['name'].dtype == dtypes.string_dtype() and pd.isna(lean.loc[0, 'url'])
+    assert isinstance(lean['source'].dtype, pd.CategoricalDtype)
+    assert lean['price_current'].dtype == np.int32 and lean['rating'].dtype == np.float32
+    for col in ['name', 'url', 'price_current', 'source']:
+        assert lean[col].tolist()[1:] == df[col].tolist()[1:], col
+
+def test_enriched_frame_is_smaller_and_equal():
+    df = extraction.enrich_data(cleaning.normalize_data(dtypes.ingested(synthetic_frame(2000, unique_ratio=0.5))))
+    lean = dtypes.enriched(df.copy())
+    assert 'title_match' not in lean and 'title_match' in dtypes.enriched(df.copy(), keep_match_titles=True)
+    assert isinstance(lean['brand'].dtype, pd.CategoricalDtype)
+    assert lean.memory_usage(deep=True).sum() < 0.7 * df.memory_usage(deep=True).sum()
+    for col in ['title_cleaned', 'brand', 'product_type']:
+        assert lean[col].tolist() == df[col].tolist(), col
+    assert [dtypes.to_decimal(v) for v in lean['brand_confidence']] == df['brand_confidence'].round(6).tolist()
+
+def test_numeric_downcast_keeps_missing_and_fractional_values():
+    df = pd.DataFrame({'sold_quantity': [1.0, np.nan], 'price_current': [10.5, 3.0], 'price_original': [5, 70_000]})
+    lean = dtypes.apply_policy(df)
+    assert lean['sold_quantity'].dtype == np.float64 and lean['price_current'].dtype == np.float64
+    assert lean['price_original'].dtype == np.int32
+
+def test_to_decimal_undoes_float32_noise():
+    # NUMERIC(3,1) would round 4.4499998 down where 4.45 rounds up
+    assert float(np.float32(4.45)) != 4.45
+    assert dtypes.to_decimal(np.float32(4.45)) == 4.45
+    assert dtypes.to_decimal(np.float32(0.865)) == 0.865
+
+def test_memory_report_keeps_stage_peaks():
+    report = dtypes.MemoryReport(verbose=False)
+    small, large = synthetic_frame(10), synthetic_frame(100)
+    report.record('ingest', large)
+    report.record('ingest', small)
+    assert report.peaks['ingest'] == (100, int(large.memory_usage(deep=True).sum()))
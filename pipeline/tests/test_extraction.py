@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+
+from src import cleaning, extraction
+from benchmarks import legacy
+from benchmarks.common import synthetic_frame
+
+ENRICHED_COLUMNS = ['brand', 'product_type', 'brand_confidence', 'product_type_confidence']
+
+@pytest.fixture(scope="module")
+def normalized():
+    df = cleaning.normalize_data(synthetic_frame(2000, unique_ratio=0.4))
+    extra = ["wardha seruum", "skintifk toner", "pepsodent pasta gigi", "popok bayi jumbo",
+             "popok bayi wardaah", "pampers skintifiq",
+             "unknown thing", "lip cream matte", "", "somethinc", "hada labo body lotion"]
+    extra_df = pd.DataFrame({'title_match': extra})
+    return pd.concat([df[['title_match']], extra_df], ignore_index=True)
+
+def test_enrich_data_matches_legacy(normalized):
+    expected = legacy.enrich_data(normalized.copy())
+    result = extraction.enrich_data(normalized.copy())
+
+    # Blocklisted titles no longer get a fuzzy brand; everything else is unchanged
+    blocked = normalized['title_match'].map(legacy_is_non_skincare)
+    fuzzy_only = blocked & normalized['title_match'].map(
+        lambda t: legacy.extract_brand(t)[2] == "dictionary_fuzzy")
+    expected.loc[fuzzy_only, 'brand'] = "unknown"
+    expected.loc[fuzzy_only, 'brand_confidence'] = 0.0
+
+    assert fuzzy_only.any()
+    for col in ENRICHED_COLUMNS:
+        assert result[col].tolist() == expected[col].tolist(), col
+
+def legacy_is_non_skincare(title):
+    return any(k in title for k in extraction.NON_SKINCARE_KEYWORDS)
+
+@pytest.mark.parametrize("title", ["popok bayi wardah", "popok bayi wardaah", "pasta gigi closeup",
+                                   "tattoo sticker", "wardha serum", "softlens", ""])
+def test_classify_single_scan(title):
+    brand, product_type, non_skincare = extraction.classify(title)
+    assert non_skincare == extraction.is_non_skincare(title) == legacy_is_non_skincare(title)
+    assert product_type == legacy.extract_product_type(title)
+    if non_skincare and legacy.extract_brand(title)[2] != "dictionary_exact":
+        assert brand == ("unknown", 0.0, "blocklist")
+    else:
+        assert brand == legacy.extract_brand(title)
+
+def test_enrich_data_empty_frame():
+    result = extraction.enrich_data(pd.DataFrame({'title_match': pd.Series([], dtype=object)}))
+    assert list(result['brand']) == []
+
+def test_automaton_min_rank_matches_substring_scan():
+    import random
+    from src.automaton import AhoCorasick, NO_MATCH
+
+    rng = random.Random(1)
+    for _ in range(200):
+        patterns = ["".join(rng.choice("ab c") for _ in range(rng.randint(0, 4)))
+                    for _ in range(rng.randint(1, 10))]
+        matcher = AhoCorasick((p, rank) for rank, p in enumerate(patterns))
+        for _ in range(30):
+            text = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 15)))
+            expected = min((r for r, p in enumerate(patterns) if p in text), default=NO_MATCH)
+            assert matcher.min_rank(text) == expected
+
+@pytest.mark.parametrize("title", ["ms glow serum", "msglow", "glowbe lip", "the originote toner",
+                                    "dear me beauty", "pond's", "o.m.g", "nothing here", ""])
+def test_extract_brand_matches_legacy(title):
+    assert extraction.extract_brand(title) == legacy.extract_brand(title)
+
+@pytest.mark.parametrize("threshold", [85.0, 70.0, 95.0])
+def test_fuzzy_brand_matches_legacy(threshold):
+    import random
+
+    rng = random.Random(int(threshold))
+    aliases = [a for v in extraction.BRAND_DICTIONARY.values() for a in v]
+    words = ["serum", "toner", "glow", "white", "skin", "lip", "mask", "xqzt"]
+
+    def misspell(alias):
+        chars = list(alias)
+        for _ in range(rng.randint(1, 2)):
+            i = rng.randrange(len(chars))
+            chars[i] = rng.choice("aeiouxyz")
+        return "".join(chars)
+
+    for _ in range(1500):
+        tokens = [misspell(rng.choice(aliases)) if rng.random() < 0.4 else rng.choice(words)
+                  for _ in range(rng.randint(1, 5))]
+        title = " ".join(tokens)
+        assert extraction.extract_brand(title, threshold) == legacy.extract_brand(title, threshold), title
+
+def test_product_type_matches_legacy():
+    import random
+
+    rng = random.Random(2)
+    keywords = [k for config in extraction.PRODUCT_TYPES.values() for k in config["keywords"]]
+    filler = ["wardah", "100ml", "murah", "x", "lotion", "body", "lip"]
+    for _ in range(3000):
+        parts = [rng.choice(keywords) if rng.random() < 0.5 else rng.choice(filler)
+                 for _ in range(rng.randint(0, 6))]
+        title = rng.choice([" ", ""]).join(parts)
+        assert extraction.extract_product_type(title) == legacy.extract_product_type(title), title
+
+def test_enrich_batch_accepts_arrays(normalized):
+    import numpy as np
+    import pyarrow as pa
+
+    titles = normalized['title_match']
+    expected = extraction.enrich_batch(titles)
+    assert expected.brand_confidence.dtype == np.float64
+    assert expected.non_skincare.dtype == bool
+    assert len(expected.brand) == len(titles)
+
+    for variant in (titles.tolist(), titles.to_numpy(dtype=object), pa.array(titles.tolist())):
+        result = extraction.enrich_batch(variant)
+        for field in extraction.EnrichmentResult._fields:
+            assert getattr(result, field).tolist() == getattr(expected, field).tolist(), field
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from src import ingestion
+from benchmarks.common import synthetic_frame
+
+def _with_duplicates():
+    base = synthetic_frame(300, seed=3)
+    repeats = base.sample(120, random_state=1).copy()
+    # Tracking parameters don't change the content hash
+    repeats['url'] = repeats['url'] + "?spm=abc&tm=1"
+    return pd.concat([base, repeats, base.head(40)], ignore_index=True).sample(frac=1, random_state=2)
+
+def test_chunked_dedup_matches_whole_file(tmp_path):
+    path = tmp_path / "products.csv"
+    _with_duplicates().to_csv(path, index=False)
+
+    whole = ingestion.ingest_data(str(path))
+    streamed = pd.concat(list(ingestion.iter_chunks(str(path), chunksize=37)))
+
+    assert len(streamed) == len(whole) == 300
+    assert streamed['content_hash'].tolist() == whole['content_hash'].tolist()
+    assert streamed['name'].tolist() == whole['name'].tolist()
+
+def test_hash_deduper_across_chunks():
+    deduper = ingestion.HashDeduper()
+    a, b, c = ("a" * 64, "b" * 64, "c" * 64)
+    assert deduper.first_seen(pd.Series([a, b, a])).tolist() == [True, True, False]
+    assert deduper.first_seen(pd.Series([c, b, c])).tolist() == [True, False, False]
+    assert len(deduper) == 3
+
+def test_hash_deduper_matches_set_over_many_runs():
+    rng = np.random.default_rng(4)
+    pool = [rng.bytes(16).hex() for _ in range(3000)]
+    deduper, seen = ingestion.HashDeduper(), set()
+    for size in [1, 50, 7, 400, 400, 3, 1000, 2000, 600]:
+        chunk = [pool[i] for i in rng.integers(0, len(pool), size)]
+        expected = []
+        for key in chunk:
+            expected.append(key not in seen)
+            seen.add(key)
+        assert deduper.first_seen(pd.Series(chunk)).tolist() == expected
+    assert len(deduper) == len(seen) and len(deduper.runs) < 5
+
+MESSY_URLS = [
+    "https://shopee.co.id/product/1/2?spm=a&tm=1", "https://a.com/x#", "https://a.com/x?q#f?g",
+    "HTTPS://A.com/p", " https://a.com/p", "https://a.com/p;", "https://a.com/p\tq", "https://ä.com/p",
+    "https://a.com/ürl?x=1#frag#2", None, "", "//a.com/x?1", "https://a.com?x", "https://[::1]:80/p?x",
+]
+
+def test_content_hashes_match_row_hasher():
+    df = pd.concat([synthetic_frame(200, seed=4),
+                    pd.DataFrame({'name': ["n"] * len(MESSY_URLS), 'url': MESSY_URLS})], ignore_index=True)
+    df.loc[5, 'name'] = None
+    expected = [ingestion.generate_content_hash(row) for _, row in df.iterrows()]
+    assert ingestion.content_hashes(df) == expected
+
+def test_hashing_leaves_object_urls_untouched():
+    df = pd.DataFrame({'name': ["a", "b"], 'url': pd.Series(["https://a.com/p?spm=1", "https://a.com/x#"], dtype=object)})
+    ingestion.content_hashes(df)
+    assert df['url'].tolist() == ["https://a.com/p?spm=1", "https://a.com/x#"]
+
+def test_canonical_urls_per_platform():
+    urls = pd.Series([
+        "https://shopee.co.id/Serum-Wardah-i.123.456?sp_atk=1",
+        "https://shopee.co.id/product/123/456",
+        "https://www.tokopedia.com/shopx/serum-abc?extParam=1",
+        "https://www.lazada.co.id/products/serum-wardah-i123456-s789.html?spm=x",
+        "https://www.blibli.com/p/serum-abc/ps--ABC-123?ds=1",
+        "https://www.tiktok.com/view/product/17299?x=1",
+        "https://example.com/a?b",
+    ])
+    result = ingestion.canonical_urls(urls)
+    assert result['platform'].tolist() == ["shopee", "shopee", "tokopedia", "lazada", "blibli", "tiktok", "other"]
+    assert result['canonical_url'].iloc[0] == result['canonical_url'].iloc[1] == "https://shopee.co.id/product/123/456"
+    assert result['canonical_url'].iloc[3] == "https://www.lazada.co.id/products/i123456.html"
+    assert result['canonical_url'].iloc[6] == "https://example.com/a"
+
+def test_product_keys_ignore_title_and_tracking():
+    df = pd.DataFrame({
+        'name': ["Serum A", "Serum A (NEW)", "Toner", "Toner", "N/A", "N/A"],
+        'url': ["https://shopee.co.id/product/123/456?spm=1", "https://shopee.co.id/Serum-A-i.123.456",
+                "https://www.blibli.com/p/toner/ps--ABC-1", "https://www.blibli.com/p/toner-v2/ps--ABC-1?ds=2",
+                "N/A", "N/A"],
+    })
+    keys = ingestion.product_keys(df)
+    assert keys[0] == keys[1] == "01000000-0000-007b-0000-0000000001c8"
+    assert keys[2] == keys[3] and keys[2].startswith("04")
+    # No native id: the name + URL hash keeps listings without URLs apart
+    assert keys[4] == keys[5] and keys[4].startswith("00")
+    assert keys[4][2:8] == ingestion.content_hashes(df.tail(1))[0][:6]
+
+def test_product_keys_pack_large_native_ids():
+    df = pd.DataFrame({'name': ["x", "x"], 'url': [
+        "https://shop-id.tokopedia.com/pdp/krim-hari/1729595287897606803",
+        "https://shop.tiktok.com/view/product/99999999999999999999"]})
+    tokopedia, oversized = ingestion.product_keys(df)
+    assert int(tokopedia.replace('-', '')[16:], 16) == 1729595287897606803
+    assert tokopedia.startswith("02000000-0000-0000")
+    assert oversized.startswith("05") and oversized != "05000000-0000-0000-0000-000000000000"
@@ -0,0 +1,90 @@
+import pandas as pd
+
+from src import cleaning, extraction
+from src.cache import title_key
+from src.label_index import LabelIndex, propagate_labels
+
+def _frame(names):
+    df = pd.DataFrame({'name': names})
+    return extraction.enrich_data(cleaning.normalize_data(
+        df.assign(sold_quantity=0, rating=0.0)))
+
+def test_query_and_reopen(tmp_path):
+    index = LabelIndex(str(tmp_path))
+    assert index.add(["kudan acne serum 30ml", "viera lip tint red", "kudan acne serum 30ml"],
+                     ["kudan", "viera", "kudan"], ["serum", "unknown", "serum"]) == 2
+    index.close()
+
+    index = LabelIndex(str(tmp_path))
+    assert len(index) == 2
+    brands, b_scores, types, t_scores = index.query(
+        ["kudan acne serum 50ml", "viera lip tint red 02", "completely different words"])
+    assert brands.tolist() == ["kudan", "viera", "unknown"]
+    # The viera row has no type label, so it is skipped for types
+    assert types.tolist() == ["serum", "unknown", "unknown"]
+    assert b_scores[0] >= 0.8 and b_scores[2] == 0.0
+
+    # Incremental additions grow the memmap and relabel existing titles
+    titles = [f"brand{i} item {i}" for i in range(3000)]
+    index.add(titles, [f"brand{i}" for i in range(3000)], ["serum"] * 3000)
+    index.add(["viera lip tint red"], ["unknown"], ["lip_products"])
+    assert len(index) == 3002 and index.capacity >= 3002
+    assert index.query(["viera lip tint red"])[2].tolist() == ["lip_products"]
+    assert index.query(["brand2999 item 2999"])[0].tolist() == ["brand2999"]
+    index.close()
+
+    # An index in an older layout starts over instead of being misread
+    (tmp_path / "meta.json").write_text('{"dim": 256, "count": 3002, "capacity": 4096}')
+    assert len(LabelIndex(str(tmp_path))) == 0
+
+def test_reopened_keys_ending_in_nul(tmp_path):
+    # About 1 in 256 digests ends in a NUL byte, which S16 items drop on the way out
+    titles = [t for t in (f"kudan serum {i}" for i in range(5000)) if title_key(t).endswith(b"\0")][:3]
+    index = LabelIndex(str(tmp_path))
+    index.add(titles, ["kudan"] * 3, ["unknown"] * 3)
+    index.close()
+
+    index = LabelIndex(str(tmp_path))
+    assert index.add(titles, ["unknown"] * 3, ["serum"] * 3) == 0
+    assert len(index) == 3
+    assert index.query(titles)[2].tolist() == ["serum"] * 3
+    index.close()
+
+def test_near_duplicates_of_other_brands_are_not_adopted(tmp_path):
+    index = LabelIndex(str(tmp_path))
+    index.add(["wardah lightening face serum 30ml", "scarlett whitening body lotion"],
+              ["wardah", "scarlett"], ["serum", "body_lotion"])
+    brands, b_scores, types, _ = index.query(
+        ["emina lightening face serum 30ml", "scarlett whitening body scrub", "wardah lightening face serum 50ml"])
+    # Same words but another brand's name; a scrub is not the lotion
+    assert brands.tolist() == ["unknown", "unknown", "wardah"]
+    assert types.tolist()[1] == "unknown"
+    assert b_scores[0] == 0.0
+    index.close()
+
+def test_propagate_fills_only_unknown_rows(tmp_path):
+    index = LabelIndex(str(tmp_path))
+    index.add(["kudan acne serum 30ml"], ["kudan"], ["serum"])
+    df = _frame(["Kudan Acne Serum 50ml", "Wardah Lightening Serum", "Random Thing"])
+    assert df['brand'].tolist() == ["unknown", "wardah", "unknown"]
+
+    adopted = propagate_labels(df, index)
+    assert adopted.tolist() == [True, False, False]
+    assert df['brand'].tolist() == ["kudan", "wardah", "unknown"]
+    assert 0.8 <= df['brand_confidence'].iloc[0] <= 0.85
+    assert df['brand_confidence'].iloc[1] == 0.95
+    index.close()
+
+def test_labeling_csv(tmp_path):
+    labels = tmp_path / "labels.csv"
+    pd.DataFrame([
+        {'content_hash': "a", 'title_raw': "[BPOM] Kudan Acne Serum 30ml", 'current_brand': "unknown",
+         'current_product_type': "serum", 'corrected_brand': "Kudan", 'corrected_product_type': ""},
+        {'content_hash': "b", 'title_raw': "No label here", 'current_brand': "unknown",
+         'current_product_type': "unknown", 'corrected_brand': "", 'corrected_product_type': ""},
+    ]).to_csv(labels, index=False)
+    index = LabelIndex(str(tmp_path / "index"))
+    assert index.add_labeling_csv(str(labels)) == 1
+    brands, _, types, _ = index.query(["kudan acne serum 30ml"])
+    assert brands.tolist() == ["kudan"] and types.tolist() == ["unknown"]
+    index.close()
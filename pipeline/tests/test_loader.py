@@ -0,0 +1,127 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from src import dtypes, ingestion, loader
+from benchmarks.common import synthetic_frame
+
+def _final(n=20):
+    df = dtypes.ingested(ingestion._prepare(synthetic_frame(n, seed=6)))
+    df['title_cleaned'] = df['name'].str.title()
+    df['brand'], df['product_type'] = "wardah", "serum"
+    df['brand_confidence'], df['product_type_confidence'] = 0.865, 0.9
+    return dtypes.enriched(df)
+
+def test_stage_frame_matches_row_values():
+    df = _final()
+    df['discount'] = np.float32(35)
+    df.loc[df.index[0], 'discount'] = np.float32(0.45)
+    df['rating'] = np.float32(4.45)
+    stage = loader.stage_frame(df)
+    assert [c for c, _ in loader.STAGE_COLUMNS] == list(stage.columns)
+    assert stage['discount'].tolist() == [0.45] + [0.35] * (len(df) - 1)
+    assert set(stage['rating']) == {4.45} and set(stage['brand_confidence']) == {0.865}
+    assert stage['enrichment_confidence'][0] == (0.865 * 0.6) + (0.9 * 0.4)
+    assert stage['title_raw'].tolist() == df['name'].tolist()
+    assert stage['image_url'].tolist() == df['image'].tolist()
+
+def test_csv_buffer_writes_missing_values_as_nan():
+    df = _final(3)
+    df['image'] = df['image'].astype(object)
+    df.loc[df.index[0], 'image'] = None
+    df.loc[df.index[1], 'name'] = 'quoted "title", with comma'
+    stage = loader.stage_frame(df)
+    stage.loc[2, 'price_original'] = np.nan
+    rows = pd.read_csv(io.BytesIO(loader.csv_buffer(stage).getvalue()), header=None,
+                       names=[c for c, _ in loader.STAGE_COLUMNS], keep_default_na=False)
+    assert rows['image_url'][0] == "NaN" and rows['price_original'][2].lower() == "nan"
+    assert rows['title_raw'][1] == 'quoted "title", with comma'
+    assert rows['product_key'].tolist() == stage['product_key'].tolist()
+
+def test_values_statement_matches_stage_columns():
+    assert loader.UPSERT_VALUES.n_params == len(loader.STAGE_COLUMNS)
+    assert loader.UPSERT_STAGE.n_params == 0
+    # The enriched upsert reads the raw upsert's RETURNING; unchanged rows are not rewritten
+    for statement in (loader.UPSERT_VALUES, loader.UPSERT_STAGE):
+        assert "RETURNING id, product_key, (xmax = 0)" in statement.sql
+        assert statement.sql.count("IS DISTINCT FROM") == 2
+
+def test_value_arrays():
+    df = _final(3)
+    df['image'] = df['image'].astype(object)
+    df.loc[df.index[0], 'image'] = None
+    arrays = loader.value_arrays(loader.stage_frame(df))
+    assert len(arrays) == len(loader.STAGE_COLUMNS) and all(len(a) == 3 for a in arrays)
+    columns = dict(zip((name for name, _ in loader.STAGE_COLUMNS), arrays))
+    # Plain Python values (psycopg2 cannot adapt numpy scalars); missing text is 'NaN'
+    assert columns['image_url'][0] == "NaN"
+    assert all(type(v) is float for v in columns['quantity_sold'] + columns['rating'])
+    assert all(type(v) is str for v in columns['product_key'] + columns['source'])
+
+def test_load_counts():
+    counts = loader.LoadCounts(10, 2, 3, 1, 0) + loader.LoadCounts(5, 0, 0, 0, 5)
+    assert counts == (15, 2, 3, 1, 5)
+    assert counts.raw_skipped == 10 and counts.enriched_skipped == 9
+
+def test_key_ranges_are_stable_and_spread():
+    keys = ["00000000-0000-0000-0000-000000000000", "01000000-0000-03e9-0000-0000000003e9"]
+    # Lock partitions must agree across processes and releases
+    assert loader.key_ranges(keys).tolist() == loader.key_ranges(list(keys)).tolist()
+    assert loader.key_ranges(keys, n=1).tolist() == [0, 0]
+    stage = loader.staged_rows(_final(2000))
+    ranges = loader.key_ranges(stage['product_key'].tolist())
+    assert ranges.min() >= 0 and ranges.max() < loader.LOAD_PARTITIONS
+    assert len(set(ranges.tolist())) == loader.LOAD_PARTITIONS
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def execute(self, sql, params=None):
+        self.calls.append((sql, params))
+
+def _locks(stage):
+    cur = _Recorder()
+    loader.lock_partitions(cur, stage)
+    (sql, params), = cur.calls
+    pairs = list(zip(params[::2], params[1::2]))
+    assert sql.count("pg_advisory_xact_lock") == len(pairs)
+    return pairs
+
+def test_partition_locks_are_sorted_key_ranges():
+    stage = loader.staged_rows(_final(400))
+    assert stage['product_key'].is_monotonic_increasing
+    pairs = _locks(stage)
+    assert pairs == sorted(set(pairs))
+    assert {c for c, _ in pairs} == {loader.LOAD_LOCK_CLASS}
+    # Rows conflict on product_key alone: another source's load of the same keys takes the same locks
+    assert _locks(stage.assign(source="tiktok")) == _locks(stage.assign(source="shopee")) == pairs
+
+def test_partition_batches_hold_whole_partitions():
+    stage = loader.staged_rows(_final(3000))
+    batches = loader.partition_batches(stage, min_rows=500)
+    assert sum(len(b) for b in batches) == len(stage) and len(batches) > 1
+    seen = set()
+    for batch in batches:
+        assert batch['product_key'].is_monotonic_increasing
+        ranges = set(loader.key_ranges(batch['product_key'].tolist()).tolist())
+        assert not ranges & seen
+        seen |= ranges
+    assert len(loader.partition_batches(stage)) == 1
+
+def test_partitioned_load_reports_every_method(monkeypatch):
+    stage = loader.staged_rows(_final(3000))
+    batches = loader.partition_batches(stage, min_rows=500)
+    monkeypatch.setattr(loader, 'partition_batches', lambda stage: batches)
+    methods = iter(["copy", "values"] + ["copy"] * 20)
+
+    def upsert_stage(database, batch, method):
+        return loader.LoadCounts(len(batch), len(batch), 0, len(batch), 0), next(methods)
+
+    monkeypatch.setattr(loader, 'upsert_stage', upsert_stage)
+    database = type("Database", (), {'maxconn': 1})()
+    counts, method, workers = loader.upsert_partitions(database, stage, 'copy', 4)
+    assert counts.staged == len(stage) and workers == 1
+    # One batch fell back to array upserts
+    assert method == "copy+values"
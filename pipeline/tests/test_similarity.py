@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from src import extraction, similarity
+from src.cleaning import normalize_titles
+from benchmarks.common import synthetic_titles
+
+def test_split_and_glued_brands_resolve():
+    titles = ["skin tific 5x ceramide", "glad 2 glow serum", "somet hinc toner", "eminent glow"]
+    assert extraction.enrich_batch(titles).brand.tolist() == ["unknown"] * 4
+    result = extraction.enrich_batch(titles, similarity=True)
+    assert result.brand.tolist() == ["skintific", "glad2glow", "somethinc", "unknown"]
+    assert result.brand_confidence[0] == extraction.MAX_SIMILAR_CONFIDENCE
+
+def test_fallback_only_touches_unknown_rows():
+    titles = normalize_titles(pd.Series(synthetic_titles(2000, seed=12) + ["popok bayi skin tific"], dtype=object))[0]
+    plain = extraction.enrich_batch(titles)
+    full = extraction.enrich_batch(titles, similarity=True)
+    known = plain.brand != "unknown"
+    assert (full.brand[known] == plain.brand[known]).all()
+    assert (full.brand_confidence[known] == plain.brand_confidence[known]).all()
+    known = plain.product_type != "unknown"
+    assert (full.product_type[known] == plain.product_type[known]).all()
+    # Blocklisted titles are never rescued
+    assert full.brand[-1] == "unknown"
+
+def test_top_k_ordering():
+    index = similarity.NgramTfidfIndex(["wardah", "warda", "emina", "ms glow"], ["wardah", "wardah", "emina", "ms glow"])
+    t_idx, entry, score = index.top_k(["wardahh toner", "ms glowww", "nothing here"], k=2, min_score=0.3)
+    assert set(t_idx.tolist()) == {0, 1}
+    assert np.bincount(t_idx).max() <= 2
+    for t in (0, 1):
+        scores = score[t_idx == t]
+        assert (np.diff(scores) <= 0).all()
+    assert index.labels[entry[t_idx == 0][0]] == "wardah"
+    labels, scores = index.best(["war dah toner", "nothing here"])
+    assert labels.tolist() == ["wardah", "unknown"] and scores[1] == 0.0
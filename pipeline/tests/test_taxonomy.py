@@ -0,0 +1,135 @@
+import json
+
+import pandas as pd
+
+import train_logic
+from src import extraction, taxonomy
+from benchmarks.common import synthetic_titles
+
+def _copy_taxonomy(tmp_path):
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps(taxonomy.read_taxonomy()), encoding="utf-8")
+    return str(path)
+
+def test_shipped_taxonomy_matches_extraction_tables():
+    data = taxonomy.read_taxonomy()
+    assert data['brands'] == extraction.BRAND_DICTIONARY
+    assert data['product_types'] == extraction.PRODUCT_TYPES
+    assert data['non_skincare_keywords'] == extraction.NON_SKINCARE_KEYWORDS
+
+def test_artifact_round_trip(tmp_path):
+    data = taxonomy.read_taxonomy()
+    compiled = taxonomy.compile_taxonomy(data)
+    artifact = str(tmp_path / "taxonomy.bin")
+    taxonomy.save_artifact(compiled, artifact)
+
+    loaded = taxonomy.load_artifact(artifact, taxonomy.taxonomy_digest(data))
+    assert loaded is not None and loaded.version == compiled.version
+    # The automaton scans from views of the mapped file, not copies
+    assert not loaded.classifier.arrays()['ranks'].flags.owndata
+    assert loaded.type_categories == compiled.type_categories
+    for title in (t.lower() for t in synthetic_titles(300, seed=4)):
+        assert loaded.classifier.min_ranks(title) == compiled.classifier.min_ranks(title)
+        tokens = title.split()
+        assert (loaded.fuzzy_index(taxonomy.DEFAULT_THRESHOLD).match(tokens)
+                == compiled.fuzzy_index(taxonomy.DEFAULT_THRESHOLD).match(tokens))
+
+def test_load_never_writes_and_ignores_bad_artifacts(tmp_path):
+    path = _copy_taxonomy(tmp_path)
+    artifact = tmp_path / "taxonomy.bin"
+    first = taxonomy.load(path, str(artifact))
+    assert not artifact.exists()
+
+    taxonomy.save_artifact(first, str(artifact))
+    data = taxonomy.read_taxonomy(path)
+    data['brands']['newbrand'] = ["newbrand"]
+    taxonomy.write_taxonomy(data, path)
+    assert taxonomy.load_artifact(str(artifact), taxonomy.taxonomy_digest(data)) is None
+    second = taxonomy.load(path, str(artifact))
+    assert second.digest != first.digest and 'newbrand' in second.brand_names
+    assert taxonomy.load_artifact(str(artifact)).digest == first.digest
+
+    # A flipped byte fails the checksum
+    blob = bytearray(artifact.read_bytes())
+    blob[-3] ^= 0xFF
+    artifact.write_bytes(bytes(blob))
+    assert taxonomy.load_artifact(str(artifact)) is None
+
+    # Older (pickled) or garbage artifacts are skipped rather than failing the import
+    for content in (b"MDTAX003" + bytes(32) + b"\x80\x05garbage", b"garbage"):
+        artifact.write_bytes(content)
+        assert taxonomy.load_artifact(str(artifact)) is None
+        assert taxonomy.load(path, str(artifact)).digest == second.digest
+
+def test_train_from_labels_updates_json(tmp_path):
+    path = _copy_taxonomy(tmp_path)
+    labels = tmp_path / "labels.csv"
+    pd.DataFrame([
+        {'title_raw': "Glowlab Serum", 'corrected_brand': "Glowlab", 'key_words_for_brands': "glow lab",
+         'corrected_product_type': "", 'key_words_for_product': ""},
+        {'title_raw': "Wardah Hair Mist 100ml", 'corrected_brand': "wardah", 'key_words_for_brands': "wardahh",
+         'corrected_product_type': "hair_mist", 'key_words_for_product': ""},
+    ]).to_csv(labels, index=False)
+
+    before = taxonomy.read_taxonomy(path)
+    train_logic.train_from_labels(str(labels), path, recompile=False)
+    after = taxonomy.read_taxonomy(path)
+
+    assert after['version'] == before['version'] + 1
+    assert list(after['brands'])[-1] == "glowlab"
+    assert after['brands']['glowlab'] == ["glow lab", "glowlab"]
+    assert list(after['brands']).index("wardah") == list(before['brands']).index("wardah")
+    assert "wardahh" in after['brands']['wardah']
+    assert after['product_types']['hair_mist'] == {"keywords": ["wardah"], "priority": 2}
+
+def test_watcher_swaps_in_new_version(tmp_path):
+    path = _copy_taxonomy(tmp_path)
+    artifact = str(tmp_path / "taxonomy.bin")
+    current = taxonomy.load(path, artifact)
+    swapped = []
+    watcher = taxonomy.TaxonomyWatcher(swapped.append, current=current.digest, path=path, artifact=artifact)
+    assert not watcher.check()
+
+    data = taxonomy.read_taxonomy(path)
+    data['version'] += 1
+    data['brands']['glowlab'] = ["glowlab"]
+    taxonomy.write_taxonomy(data, path)
+
+    assert watcher.check()
+    assert len(swapped) == 1 and swapped[0].version == data['version']
+    (brand, _, method), _, _ = extraction.classify("glowlab serum 30ml", compiled=swapped[0])
+    assert (brand, method) == ("glowlab", "dictionary_exact")
+    assert extraction.classify("glowlab serum 30ml")[0][0] != "glowlab"
+    # Saving the same content again is not a new version
+    taxonomy.write_taxonomy(data, path)
+    assert not watcher.check() and watcher.reloads == 1
+
+def test_warm_replays_memoized_tokens():
+    data = taxonomy.read_taxonomy()
+    old = taxonomy.compile_taxonomy(data)
+    titles = ["wardah lightening serum 30ml", "emina sun battle spf 30", "emnia night cream"]
+    extraction.enrich_batch(titles, compiled=old)
+
+    new = taxonomy.compile_taxonomy(dict(data, version=data['version'] + 1))
+    new.warm(old, seconds=0)
+    assert new.token_matcher.seen_tokens() == []
+    new.warm(old)
+    assert set(new.token_matcher.seen_tokens()) == set(old.token_matcher.seen_tokens())
+    seen = old.fuzzy_index(taxonomy.DEFAULT_THRESHOLD).seen_tokens()
+    assert seen and set(new.fuzzy_index(taxonomy.DEFAULT_THRESHOLD).seen_tokens()) == set(seen)
+    # Only memos are filled; results match a cold copy
+    cold = taxonomy.compile_taxonomy(new.data)
+    assert (extraction.enrich_batch(titles, compiled=new).brand.tolist()
+            == extraction.enrich_batch(titles, compiled=cold).brand.tolist())
+
+def test_activate_switches_module_taxonomy():
+    original = extraction.active_taxonomy()
+    data = taxonomy.read_taxonomy()
+    data['brands'] = {"glowlab": ["glowlab"], **data['brands']}
+    try:
+        extraction.activate(taxonomy.compile_taxonomy(data))
+        assert extraction.extract_brand("wardah glowlab serum")[0] == "glowlab"
+        assert "glowlab" in extraction.BRAND_DICTIONARY
+    finally:
+        extraction.activate(original)
+    assert extraction.extract_brand("wardah glowlab serum")[0] == "wardah"
@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from src import extraction, tokens
+from src.cleaning import normalize_titles
+from benchmarks.common import synthetic_titles
+
+def _classify_each(titles):
+    out = [extraction.classify(t) for t in titles]
+    return ([b[0] for b, _, _ in out], [b[1] for b, _, _ in out],
+            [t[0] for _, t, _ in out], [t[1] for _, t, _ in out], [blocked for _, _, blocked in out])
+
+def _assert_parity(titles):
+    result = extraction.enrich_batch(titles)
+    brands, b_confs, types, t_confs, blocked = _classify_each(titles)
+    assert result.brand.tolist() == brands
+    assert result.brand_confidence.tolist() == b_confs
+    assert result.product_type.tolist() == types
+    assert result.product_type_confidence.tolist() == t_confs
+    assert result.non_skincare.tolist() == blocked
+
+def test_tokenize_layout():
+    tokenized = tokens.tokenize(["ms glow serum", "", "serum  ms", "glow\tserum"])
+    assert len(tokenized) == 4
+    assert tokenized.tokens(0) == ["ms", "glow", "serum"]
+    assert tokenized.tokens(1) == []
+    assert tokenized.offsets.tolist() == [0, 3, 3, 5, 7]
+    assert tokenized.vocab == ["ms", "glow", "serum"]
+    assert tokenized.title_of.tolist() == [0, 0, 0, 2, 2, 3, 3]
+    assert tokenized.canonical.tolist() == [True, True, False, False]
+
+def test_multi_word_patterns_across_tokens():
+    titles = [
+        "ms glow whitening", "xms glowing cream", "ms", "ms glow", "hand body lotion",
+        "hada labo gokujyun", "hadalabo", "eau de parfum 50ml", "eau de", "sikat gigi bayi",
+        "body lotion", "lotionbody lotionx", "glow ms", "serum ms\nglow", "  ms glow  ",
+    ]
+    _assert_parity(titles)
+
+def test_token_path_matches_string_classify():
+    names = pd.Series(synthetic_titles(3000, seed=21), dtype=object)
+    _assert_parity(list(normalize_titles(names)[0]))
+
+def test_random_token_soup_matches_string_classify():
+    compiled = extraction.active_taxonomy()
+    words = [w for aliases in compiled.brands.values() for a in aliases for w in a.split()]
+    words += [w for c in compiled.product_types.values() for k in c["keywords"] for w in k.split()]
+    words += [w for k in compiled.non_skincare_keywords for w in k.split()]
+    words += ["x", "glowy", "serumm", "50ml", "ori", "bpom"]
+    rng = random.Random(5)
+    titles = []
+    for _ in range(2000):
+        parts = rng.choices(words, k=rng.randint(0, 6))
+        # Glue some neighbours so patterns straddle token boundaries
+        title = "".join(p + ("" if rng.random() < 0.2 else " ") for p in parts).strip()
+        titles.append(title)
+    _assert_parity(titles)
+
+def test_fuzzy_batch_prefers_lowest_alias_then_earliest_token():
+    compiled = extraction.active_taxonomy()
+    index = compiled.fuzzy_index(85.0)
+    titles = ["wardahh somethinc", "somethincc wardahh", "nothing", ""]
+    tokenized = tokens.tokenize(titles)
+    alias_ids, ratios = index.match_batch(tokenized, np.arange(len(titles)))
+    for i, title in enumerate(titles):
+        hit = index.match(title.split())
+        assert (alias_ids[i], ratios[i]) == (hit if hit else (-1, 0))
@@ -1,77 +1,59 @@
 import pandas as pd
 import os
 import re
+import sys
+import argparse
 
-def train_from_labels():
-    csv_path = r"c:\Users\Jan\Downloads\Dashboard_Market Research\market_dashboard\data\unknown_products_labeling.csv"
-    extraction_path = r"c:\Users\Jan\Downloads\Dashboard_Market Research\market_dashboard\pipeline\src\extraction.py"
-    
-    if not os.path.exists(csv_path):
-        print(f"Error: {csv_path} not found.")
-        return
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src import taxonomy
+from compile_taxonomy import compile_artifact
+
+DEFAULT_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'unknown_products_labeling.csv')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge manual labels into the taxonomy and recompile the matcher artifact.")
+    parser.add_argument("--labels", default=DEFAULT_LABELS_PATH, help="Labeled export (default: data/unknown_products_labeling.csv)")
+    parser.add_argument("--taxonomy", help="Taxonomy JSON (default: TAXONOMY_PATH or taxonomy/taxonomy.json)")
+    parser.add_argument("--no-compile", action="store_true", help="Only update the taxonomy JSON")
+    return parser.parse_args()
+
+def apply_labels(data, df):
+    """Merge brand/type corrections from a labeling export into taxonomy data (in place)."""
+    brands = data['brands']
+    product_types = data['product_types']
 
-    # Read CSV and handle potential empty values
-    try:
-        df = pd.read_csv(csv_path).fillna('')
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return
-    
     # Filter rows that have corrections
     labeled_brands = df[df['corrected_brand'] != '']
     labeled_types = df[df['corrected_product_type'] != '']
-    
+
     print(f"Found {len(labeled_brands)} brand corrections and {len(labeled_types)} type corrections.")
 
-    with open(extraction_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # 1. Update BRAND_DICTIONARY
-    brand_dict_match = re.search(r'BRAND_DICTIONARY = \{(.*?)\}', content, re.DOTALL)
-    if brand_dict_match:
-        current_dict_str = brand_dict_match.group(1)
-        
-        for _, row in labeled_brands.iterrows():
-            brand = row['corrected_brand'].lower().strip()
-            keywords = row.get('key_words_for_brands', '')
-            
-            if brand == 'unknown' or not brand: continue
-            
-            # Determine aliases
-            aliases = [brand]
-            if keywords:
-                aliases.extend([k.strip().lower() for k in keywords.split(',') if k.strip()])
-            aliases = sorted(list(set(aliases)))
-            
-            # Check if brand exists
-            brand_pattern = rf'"{brand}": \[(.*?)\]'
-            existing_match = re.search(brand_pattern, content)
-            
-            if existing_match:
-                # Update aliases
-                old_aliases_str = existing_match.group(1)
-                old_aliases = [a.strip().strip('"').strip("'") for a in old_aliases_str.split(',') if a.strip()]
-                combined = sorted(list(set(old_aliases + aliases)))
-                new_aliases_str = ", ".join([f'"{a}"' for a in combined])
-                content = content.replace(f'"{brand}": [{old_aliases_str}]', f'"{brand}": [{new_aliases_str}]')
-            else:
-                # Add new entry
-                new_aliases_str = ", ".join([f'"{a}"' for a in aliases])
-                new_entry = f'    "{brand}": [{new_aliases_str}],'
-                # Insert inside the dict block
-                current_dict_str = current_dict_str.rstrip() + "\n" + new_entry + "\n"
-                # Refresh content for next brand
-                content = re.sub(r'BRAND_DICTIONARY = \{.*?\}', f'BRAND_DICTIONARY = {{{current_dict_str}}}', content, flags=re.DOTALL)
-                
-        print("Updated Brand Dictionary.")
-
-    # 2. Update PRODUCT_TYPES
+    # 1. Update brands
+    for _, row in labeled_brands.iterrows():
+        brand = row['corrected_brand'].lower().strip()
+        keywords = row.get('key_words_for_brands', '')
+
+        if brand == 'unknown' or not brand: continue
+
+        # Determine aliases
+        aliases = [brand]
+        if keywords:
+            aliases.extend([k.strip().lower() for k in keywords.split(',') if k.strip()])
+
+        # Existing brands keep their position; new brands go last
+        brands[brand] = sorted(set(brands.get(brand, []) + aliases))
+
+    print("Updated Brand Dictionary.")
+
+    # 2. Update product types
     for _, row in labeled_types.iterrows():
         cat = row['corrected_product_type'].lower().strip()
         keywords_raw = row.get('key_words_for_product', '')
-        
+
         if cat == 'unknown' or not cat: continue
-        
+
         # Determine keywords
         keywords = []
         if keywords_raw:
@@ -81,38 +63,43 @@ def train_from_labels():
             words = [w for w in re.findall(r'\w+', title) if len(w) > 3]
             if words: keywords = [words[0]]
 
-        # Check if category exists
-        cat_pattern = rf'"{cat}": \{{.*?"keywords": \[(.*?)\]'
-        cat_match = re.search(cat_pattern, content, re.DOTALL)
-        
-        if cat_match:
-            old_keywords_str = cat_match.group(1)
-            old_keywords = [k.strip().strip('"').strip("'") for k in old_keywords_str.split(',') if k.strip()]
-            combined = sorted(list(set(old_keywords + keywords)))
-            new_keywords_str = ", ".join([f'"{k}"' for k in combined])
-            
-            # Use string splice to avoid issues with overlap if multiple keywords added to same cat
-            # We re-find every time because content changes
-            curr_match = re.search(rf'"{cat}": \{{.*?"keywords": \[(.*?)\]', content, re.DOTALL)
-            if curr_match:
-                start, end = curr_match.span(1)
-                content = content[:start] + new_keywords_str + content[end:]
+        if cat in product_types:
+            product_types[cat]['keywords'] = sorted(set(product_types[cat]['keywords'] + keywords))
         else:
-            # Create NEW category
-            new_keywords_str = ", ".join([f'"{k}"' for k in keywords])
-            new_cat_block = f'    "{cat}": {{\n        "keywords": [{new_keywords_str}],\n        "priority": 2\n    }},'
-            
-            types_match = re.search(r'PRODUCT_TYPES = \{(.*?)\}', content, re.DOTALL)
-            if types_match:
-                inner_types = types_match.group(1)
-                updated_inner = inner_types.rstrip() + "\n" + new_cat_block + "\n"
-                content = content.replace(inner_types, updated_inner)
-                print(f"Created new category: {cat}")
-
-    with open(extraction_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
+            product_types[cat] = {"keywords": keywords, "priority": 2}
+            print(f"Created new category: {cat}")
+
+    return data
+
+def train_from_labels(labels_path=DEFAULT_LABELS_PATH, taxonomy_path=None, recompile=True):
+    if not os.path.exists(labels_path):
+        print(f"Error: {labels_path} not found.")
+        return
+
+    # Read CSV and handle potential empty values
+    try:
+        df = pd.read_csv(labels_path).fillna('')
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        return
+
+    data = taxonomy.read_taxonomy(taxonomy_path)
+    before = taxonomy.taxonomy_digest(data)
+    apply_labels(data, df)
+
+    if taxonomy.taxonomy_digest(data) == before:
+        print("Taxonomy unchanged.")
+        return
+
+    data['version'] = data.get('version', 0) + 1
+    taxonomy.write_taxonomy(data, taxonomy_path)
+    print(f"Saved taxonomy v{data['version']} to {taxonomy_path or taxonomy.taxonomy_path()}")
+
+    if recompile:
+        compile_artifact(taxonomy_path)
+
     print("Training complete. Run the pipeline to see improvements.")
 
 if __name__ == "__main__":
-    train_from_labels()
+    args = parse_args()
+    train_from_labels(args.labels, args.taxonomy, recompile=not args.no_compile)